@@ -1,6 +1,7 @@
 import logging
 import subprocess
 from kubernetes import client, config
+from modules.api_client import InstrumentedApiClient
 import os
 import json, requests
 
@@ -8,8 +9,9 @@ import json, requests
 config.load_kube_config()
 class K8sAPI:
     def __init__(self):
-        self.core_v1 = client.CoreV1Api()
-        self.apps_v1 = client.AppsV1Api()
+        api_client = InstrumentedApiClient()
+        self.core_v1 = client.CoreV1Api(api_client)
+        self.apps_v1 = client.AppsV1Api(api_client)
 
 k8s_api = K8sAPI()
 
@@ -127,6 +129,7 @@ class ClusterAnalyzer:
             logger.error(f"Failed to send report: {e}")
 
 if __name__ == '__main__':
+    InstrumentedApiClient.summary_at_exit()
     ca = ClusterAnalyzer()
     ca.send_daily_report()
     print(ca.generate_report())
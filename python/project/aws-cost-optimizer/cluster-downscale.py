@@ -1,6 +1,7 @@
 import argparse
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
+from modules.api_client import InstrumentedApiClient
 
 def scale_down_deployments(exclude_namespaces=None, exclude_deployments=None):
     if exclude_namespaces is None:
@@ -9,7 +10,7 @@ def scale_down_deployments(exclude_namespaces=None, exclude_deployments=None):
         exclude_deployments = []
     
     config.load_kube_config()
-    apps_v1 = client.AppsV1Api()
+    apps_v1 = client.AppsV1Api(InstrumentedApiClient())
     
     print("Starting cluster scale-down operation...")
     
@@ -59,6 +60,7 @@ if __name__ == "__main__":
     parser.add_argument('--exclude-deploy', nargs='+', help='Deployment names to exclude', default=[])
     
     args = parser.parse_args()
+    InstrumentedApiClient.summary_at_exit()
     
     scale_down_deployments(
         exclude_namespaces=args.exclude_ns,
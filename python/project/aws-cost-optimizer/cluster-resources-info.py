@@ -3,12 +3,14 @@ from datetime import datetime
 import pytz
 import openpyxl
 from openpyxl.styles import Font
+from modules.api_client import InstrumentedApiClient
 
 def get_deployments_data():
     config.load_kube_config()
 
-    apps_v1 = client.AppsV1Api()
-    hpa_api = client.AutoscalingV1Api()
+    api_client = InstrumentedApiClient()
+    apps_v1 = client.AppsV1Api(api_client)
+    hpa_api = client.AutoscalingV1Api(api_client)
 
     deployments = apps_v1.list_namespaced_deployment(namespace="default").items
     hpas = {h.metadata.name: h for h in hpa_api.list_namespaced_horizontal_pod_autoscaler("default").items}
@@ -59,5 +61,6 @@ def save_to_excel(data, filename="k8s_deployments.xlsx"):
     print(f"✅ Data written to: {filename}")
 
 if __name__ == "__main__":
+    InstrumentedApiClient.summary_at_exit()
     deployments_data = get_deployments_data()
     save_to_excel(deployments_data)
@@ -21,6 +21,7 @@ from modules.get_custom_object import K8sCustomObjects
 from modules.get_nodes import GetNodes
 from modules.output import Output
 from modules.get_ns import K8sNameSpace
+from modules.api_client import InstrumentedApiClient
 
 start_time = time.time()
 urllib3.disable_warnings()
@@ -256,6 +257,7 @@ def main():
         options = GetOpts.get_opts()
         logger = Logger.get_logger(options[3])
         k8s_config = KubeConfig.load_kube_config(options[3], logger)
+        InstrumentedApiClient.summary_at_exit()
         analyzer = K8sResourceAnalyzer(k8s_config, logger, options[3])
         
         if options[0]:  # Help option
@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import atexit
+import threading
+from typing import Dict, List, Optional, Tuple
+from kubernetes.client.api_client import ApiClient
+from kubernetes.client.rest import RESTResponse
+from tabulate import tabulate
+
+HTTP_VERBS = {"POST": "create", "PUT": "update", "PATCH": "patch", "DELETE": "delete"}
+
+
+class ApiCallStats:
+    """Per (verb, resource) totals of Kubernetes API calls made by this process."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[Tuple[str, str], Dict] = {}
+
+    def record(self, verb: str, resource: str, seconds: float, response_bytes: int,
+               deserialize_seconds: float, retries: int, failed: bool) -> None:
+        """Add one call to the totals."""
+        with self._lock:
+            row = self._rows.setdefault((verb, resource), {
+                "calls": 0, "errors": 0, "retries": 0, "seconds": 0.0, "max_seconds": 0.0,
+                "bytes": 0, "deserialize_seconds": 0.0
+            })
+            row["calls"] += 1
+            row["errors"] += failed
+            row["retries"] += retries
+            row["seconds"] += seconds
+            row["max_seconds"] = max(row["max_seconds"], seconds)
+            row["bytes"] += response_bytes
+            row["deserialize_seconds"] += deserialize_seconds
+
+    def rows(self) -> List[List]:
+        """Summary rows, slowest total first."""
+        with self._lock:
+            items = sorted(self._rows.items(), key=lambda item: -item[1]["seconds"])
+        return [
+            [verb, resource, row["calls"], row["errors"], row["retries"],
+             round(row["seconds"] * 1000 / row["calls"], 1), round(row["max_seconds"] * 1000, 1),
+             round(row["bytes"] / 1024, 1), round(row["deserialize_seconds"] * 1000, 1)]
+            for (verb, resource), row in items
+        ]
+
+    def print_summary(self, stream=None) -> None:
+        """Print the summary table (to stderr by default, so json/csv output stays clean)."""
+        rows = self.rows()
+        if not rows:
+            return
+        headers = ["VERB", "RESOURCE", "CALLS", "ERRORS", "RETRIES", "AVG MS", "MAX MS", "KIB", "DESERIALIZE MS"]
+        print(f"\nKubernetes API calls:\n{tabulate(rows, headers=headers, tablefmt='simple')}", file=stream or sys.stderr)
+
+
+def api_verb(method: str, resource_path: str, query_params: Optional[List] = None) -> str:
+    """Kubernetes verb (get/list/watch/create/...) of a client call."""
+    if method != "GET":
+        return HTTP_VERBS.get(method, method.lower())
+    if any(k == "watch" and v for k, v in (query_params or [])):
+        return "watch"
+    return "get" if "{name}" in resource_path else "list"
+
+
+def api_resource(resource_path: str, path_params: Optional[Dict] = None) -> str:
+    """Resource (e.g. "pods", "pods/log") addressed by a client call."""
+    segments = resource_path.strip("/").split("/")
+    if "{name}" in segments:
+        index = segments.index("{name}")
+        resource = segments[index - 1]
+        if index + 1 < len(segments):
+            resource = f"{resource}/{segments[index + 1]}"
+    else:
+        resource = segments[-1]
+    if resource.startswith("{plural}"):
+        resource = resource.replace("{plural}", (path_params or {}).get("plural", "custom"))
+    return resource
+
+
+def response_retries(response: object) -> int:
+    """Retries urllib3 made before this response (connection errors, retried statuses)."""
+    raw = response.urllib3_response if isinstance(response, RESTResponse) else response
+    retries = getattr(raw, "retries", None)
+    return len(retries.history) if retries is not None and retries.history else 0
+
+
+class InstrumentedApiClient(ApiClient):
+    """ApiClient that records verb, resource, latency, response size, deserialize time
+    and retries of every call into InstrumentedApiClient.stats."""
+    stats = ApiCallStats()
+    _call = threading.local()
+
+    def call_api(self, resource_path, method, path_params=None, query_params=None, *args, **kwargs):
+        # request() and deserialize() fill in the call's details on this thread
+        call = self._call.current = {"bytes": 0, "deserialize_seconds": 0.0, "retries": 0}
+        failed = False
+        start = time.perf_counter()
+        try:
+            return super().call_api(resource_path, method, path_params, query_params, *args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._call.current = None
+            self.stats.record(
+                api_verb(method, resource_path, query_params), api_resource(resource_path, path_params),
+                time.perf_counter() - start, call["bytes"], call["deserialize_seconds"], call["retries"], failed
+            )
+
+    def request(self, *args, **kwargs):
+        response = super().request(*args, **kwargs)
+        call = getattr(self._call, "current", None)
+        if call is not None:
+            # Streamed responses (_preload_content=False) are read by the caller, so their size is unknown
+            if isinstance(response, RESTResponse):
+                call["bytes"] = len(response.data or b"")
+            call["retries"] = response_retries(response)
+        return response
+
+    def deserialize(self, response, response_type):
+        start = time.perf_counter()
+        try:
+            return super().deserialize(response, response_type)
+        finally:
+            call = getattr(self._call, "current", None)
+            if call is not None:
+                call["deserialize_seconds"] += time.perf_counter() - start
+
+    @staticmethod
+    def summary_at_exit() -> None:
+        """Print the call summary when the CLI exits, unless K8S_API_SUMMARY=0."""
+        if os.getenv("K8S_API_SUMMARY", "1") != "0":
+            atexit.register(InstrumentedApiClient.stats.print_summary)
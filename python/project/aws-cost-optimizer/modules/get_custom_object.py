@@ -1,13 +1,13 @@
 from typing import Dict, Optional
 from kubernetes.client import ApiException, CustomObjectsApi
-from kubernetes.client.api_client import ApiClient
+from modules.api_client import InstrumentedApiClient
 
 class K8sCustomObjects:
     def __init__(self, output: str, k8s_config: object, logger: object):
         self.output = output
         self.logger = logger
         self.k8s_config = k8s_config
-        self.api = CustomObjectsApi(ApiClient(self.k8s_config))
+        self.api = CustomObjectsApi(InstrumentedApiClient(self.k8s_config))
 
     def get_custom_object_nodes(self) -> Dict:
         """Get node metrics from metrics-server."""
@@ -1,6 +1,6 @@
 from typing import Optional
 from kubernetes.client import ApiException, CoreV1Api
-from kubernetes.client.api_client import ApiClient
+from modules.api_client import InstrumentedApiClient
 
 class GetNodes:
     @staticmethod
@@ -8,7 +8,7 @@ class GetNodes:
         """Get node information from Kubernetes API."""
         try:
             logger.info("Fetching node details...")
-            api = CoreV1Api(ApiClient(k8s_config))
+            api = CoreV1Api(InstrumentedApiClient(k8s_config))
             return api.list_node(timeout_seconds=10)
         except ApiException as e:
             logger.error(f"Failed to get node list: {e}")
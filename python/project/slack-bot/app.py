@@ -1,14 +1,35 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
 import logging, json
 import os
-from apscheduler.schedulers.background import BackgroundScheduler
+import time
 from jarvis.auth import slack_auth_required
-from jarvis.slack_handler import handle_slash_command, handle_interaction, handle_options_request
-from scripts.facets_prod_release_pause_resume import run_pause_release
+from jarvis.kubectl import resource_cache_state
+from jarvis.log import configure_logging
+from jarvis.leader import run_when_leader
+from jarvis.metrics import render_metrics
+from jarvis.ratelimit import SLASH_COMMAND_RATE_LIMIT, slash_limited_response
+from jarvis.scheduler import start_leader_services, scheduler_state
+from jarvis.slack_handler import handle_slash_command, handle_interaction, handle_options_request, is_slack_timeout_retry
 
 app = Flask(__name__)
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+configure_logging()
+
+def slack_user_key():
+    """Rate-limit Slack requests per user rather than per Slack egress IP"""
+    return request.form.get("user_id") or get_remote_address()
+
+def slash_command_limited(request_limit):
+    logger.warning("Slash command rate limit hit", extra={'user_id': request.form.get("user_id")})
+    return jsonify(slash_limited_response(request_limit.reset_at - time.time()))
+
+limiter = Limiter(
+    slack_user_key,
+    app=app,
+    storage_uri=os.getenv("RATELIMIT_STORAGE_URI", "memory://")
+)
 
 @app.before_request
 def log_request():
@@ -22,8 +43,19 @@ def log_request():
         }
     )
 
+@app.before_request
+def drop_slack_timeout_retries():
+    """Ack Slack's timeout retries without processing them again"""
+    if request.path in ("/slack/command", "/slack/interactions") and is_slack_timeout_retry(request.headers):
+        logger.info(
+            "Dropping Slack retry",
+            extra={'retry_num': request.headers.get("X-Slack-Retry-Num"), 'path': request.path}
+        )
+        return "", 200
+
 @app.route("/slack/command", methods=["POST"])
 @slack_auth_required
+@limiter.limit(SLASH_COMMAND_RATE_LIMIT, on_breach=slash_command_limited)
 def slack_command():
     try:
         logger.debug("Handling slash command")
@@ -61,10 +93,17 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "components": {
-            "scheduler": "active" if app.config.get('scheduler') else "inactive"
+            "scheduler": scheduler_state(),
+            "resource_cache": resource_cache_state(),
+            "pid": os.getpid()
         }
     }), 200
 
+@app.route("/metrics")
+def metrics_endpoint():
+    body, content_type = render_metrics()
+    return Response(body, status=200, content_type=content_type)
+
 @app.route("/slack/options", methods=["POST"])
 @slack_auth_required
 def slack_options():
@@ -76,100 +115,8 @@ def slack_options():
         logger.error("Options request failed", exc_info=True)
         return jsonify({"options": []})
 
-def scheduled_pause():
-    try:
-        logger.info("Running scheduled pause_release job")
-        run_pause_release(
-            cluster_name="cluster_name_placeholder",  # Replace with actual cluster name
-            pause_releases="true"
-        )
-        logger.info("pause_release completed")
-    except Exception as e:
-        logger.error("Scheduled pause job failed", exc_info=True)
-
-def scheduled_resume():
-    try:
-        logger.info("Running scheduled resume_release job")
-        run_pause_release(
-            cluster_name="cluster_name_placeholder",  # Replace with actual cluster name
-            pause_releases="false"
-        )
-        logger.info("resume_release completed")
-    except Exception as e:
-        logger.error("Scheduled resume job failed", exc_info=True)
-
-def schedule_jobs():
-    scheduler = BackgroundScheduler(timezone='Asia/Kolkata')
-
-    scheduler.add_job(
-        scheduled_resume,
-        trigger='cron',
-        day_of_week='mon',
-        hour=5,  # 5 AM IST
-        minute=0
-    )
-
-    scheduler.add_job(
-        scheduled_pause,
-        trigger='cron',
-        day_of_week='mon',
-        hour=9,  # 9 AM IST
-        minute=0
-    )
-
-    scheduler.add_job(
-        scheduled_resume,
-        trigger='cron',
-        day_of_week='mon',
-        hour=22, # 10 PM IST
-        minute=0
-    )
-
-    scheduler.add_job(
-        scheduled_pause,
-        trigger='cron',
-        day_of_week='tue',
-        hour=2, # 2 AM IST
-        minute=0
-    )
-
-    scheduler.add_job(
-        scheduled_resume,
-        trigger='cron',
-        day_of_week='thu',
-        hour=5,  # 5 AM IST
-        minute=0
-    )
-
-    scheduler.add_job(
-        scheduled_pause,
-        trigger='cron',
-        day_of_week='thu',
-        hour=9,  # 9 AM IST
-        minute=0
-    )
-
-    scheduler.add_job(
-        scheduled_resume,
-        trigger='cron',
-        day_of_week='thu',
-        hour=22, # 10 PM IST
-        minute=0
-    )
-
-    scheduler.add_job(
-        scheduled_pause,
-        trigger='cron',
-        day_of_week='fri',
-        hour=2, # 2 AM IST
-        minute=0
-    )
-
-    scheduler.start()
-    app.config['scheduler'] = scheduler
-    logger.info("Scheduled pause/resume jobs")
-
-schedule_jobs()
+# Only the elected worker runs the scheduler and the cache refresher
+run_when_leader(start_leader_services)
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8080)
\ No newline at end of file
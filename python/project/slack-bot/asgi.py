@@ -0,0 +1,150 @@
+"""asyncio-native serving path for the Slack endpoints.
+
+Serves the same routes as app.py without Flask, so one process can hold
+hundreds of in-flight Slack requests on a single event loop:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8080 --workers 2
+"""
+import os
+import json
+import time
+import logging
+from urllib.parse import parse_qsl
+from limits import parse as parse_limit, storage, strategies
+from slack_sdk.signature import SignatureVerifier
+from jarvis import async_handler, metrics, tracing
+from jarvis.kubectl import resource_cache_state
+from jarvis.leader import run_when_leader
+from jarvis.log import configure_logging
+from jarvis.ratelimit import SLASH_COMMAND_RATE_LIMIT, slash_limited_response
+from jarvis.scheduler import start_leader_services, scheduler_state
+from jarvis.slack_handler import is_slack_timeout_retry
+
+logger = logging.getLogger(__name__)
+configure_logging()
+
+MAX_INTERACTION_BYTES = 100000  # 100KB
+
+verifier = SignatureVerifier(os.environ.get('SLACK_SIGNING_SECRET', ''))
+
+# Same per-user slash command limit as Flask-Limiter applies in app.py
+slash_limit = parse_limit(SLASH_COMMAND_RATE_LIMIT)
+slash_limiter = strategies.FixedWindowRateLimiter(storage.MemoryStorage())
+
+
+async def _read_body(receive):
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def _respond(send, status, body=None, content_type=b"application/json"):
+    if body is None:
+        payload = b""
+    elif isinstance(body, bytes):
+        payload = body
+    else:
+        payload = json.dumps(body).encode()
+    headers = [(b"content-length", str(len(payload)).encode())]
+    if body is not None:
+        headers.append((b"content-type", content_type))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Only the elected worker runs the scheduler and the cache refresher
+            run_when_leader(start_leader_services)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def slack_command(form):
+    user_id = form.get("user_id", "")
+    if not slash_limiter.hit(slash_limit, "slash", user_id):
+        logger.warning("Slash command rate limit hit", extra={'user_id': user_id})
+        reset_at = slash_limiter.get_window_stats(slash_limit, "slash", user_id).reset_time
+        return 200, slash_limited_response(reset_at - time.time())
+    with tracing.span("slack.command"), metrics.observe_phase("total", command="slash"):
+        return await async_handler.handle_slash_command(form)
+
+
+async def slack_interactions(form):
+    with tracing.span("slack.interaction"):
+        return await async_handler.handle_interaction(form)
+
+
+async def slack_options(form):
+    with tracing.span("slack.options"), metrics.observe_phase("total", command="options"):
+        return await async_handler.handle_options_request(json.loads(form["payload"]))
+
+
+SLACK_ROUTES = {
+    "/slack/command": slack_command,
+    "/slack/interactions": slack_interactions,
+    "/slack/options": slack_options,
+}
+
+FALLBACK_BODIES = {
+    "/slack/command": {"response_type": "ephemeral", "text": "⚠️ Command processing failed"},
+    "/slack/interactions": {"response_type": "ephemeral", "text": "⚠️ Interaction processing failed"},
+    "/slack/options": {"options": []},
+}
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    path = scope["path"]
+    logger.info("Incoming request", extra={'method': scope["method"], 'path': path})
+
+    if path == "/health":
+        return await _respond(send, 200, {
+            "status": "healthy",
+            "components": {"scheduler": scheduler_state(), "resource_cache": resource_cache_state(), "pid": os.getpid()}
+        })
+
+    if path == "/metrics":
+        body, content_type = metrics.render_metrics()
+        return await _respond(send, 200, body, content_type.encode())
+
+    route = SLACK_ROUTES.get(path)
+    if route is None or scope["method"] != "POST":
+        return await _respond(send, 404, {"error": "Not found"})
+
+    headers = {k.decode().lower(): v.decode() for k, v in scope["headers"]}
+    body = await _read_body(receive)
+
+    if not verifier.is_valid(body, headers.get("x-slack-request-timestamp"), headers.get("x-slack-signature")):
+        logger.warning("Invalid Slack request signature")
+        return await _respond(send, 403, {"error": "Invalid request signature"})
+
+    if path != "/slack/options" and is_slack_timeout_retry({
+        "X-Slack-Retry-Num": headers.get("x-slack-retry-num"),
+        "X-Slack-Retry-Reason": headers.get("x-slack-retry-reason"),
+    }):
+        logger.info("Dropping Slack retry", extra={'retry_num': headers.get("x-slack-retry-num"), 'path': path})
+        return await _respond(send, 200)
+
+    if path == "/slack/interactions" and len(body) > MAX_INTERACTION_BYTES:
+        logger.warning("Payload too large", extra={'size': len(body)})
+        return await _respond(send, 413, {"response_type": "ephemeral", "text": "Payload too large"})
+
+    try:
+        status, response = await route(dict(parse_qsl(body.decode())))
+    except Exception:
+        logger.error("%s processing failed", path, exc_info=True)
+        status, response = 200, FALLBACK_BODIES[path]
+    await _respond(send, status, response)
@@ -0,0 +1,97 @@
+"""Ack latency of /slack/command under concurrent slash commands.
+
+Fires signed slash-command requests at a running bot and reports ack latency
+percentiles, e.g. to compare `WEB_CONCURRENCY=1` against several workers:
+
+    SLACK_SIGNING_SECRET=... python bench/ack_latency.py --url http://localhost:8080 -n 200 -c 20
+
+Slack gives up on an ack after 3 seconds, so the report also counts requests
+slower than that.
+"""
+import argparse
+import hashlib
+import hmac
+import os
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+
+SLACK_ACK_DEADLINE = 3.0
+
+
+def sign(secret, body, timestamp):
+    basestring = f"v0:{timestamp}:{body}".encode()
+    return "v0=" + hmac.new(secret.encode(), basestring, hashlib.sha256).hexdigest()
+
+
+def slash_command_body(user_id):
+    return urlencode({
+        "command": "/jarvis",
+        "text": "",
+        "user_id": user_id,
+        "channel_id": "C0BENCH",
+        "trigger_id": f"bench.{uuid.uuid4().hex}",
+        "response_url": "https://hooks.slack.com/commands/bench",
+    })
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def send_one(session, url, secret, user_id):
+    body = slash_command_body(user_id)
+    timestamp = str(int(time.time()))
+    headers = {
+        "Content-Type": "application/x-www-form-urlencoded",
+        "X-Slack-Request-Timestamp": timestamp,
+        "X-Slack-Signature": sign(secret, body, timestamp),
+    }
+    start = time.perf_counter()
+    response = session.post(f"{url}/slack/command", data=body, headers=headers, timeout=30)
+    return time.perf_counter() - start, response.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=20)
+    parser.add_argument("--user-id", default="UBENCH0001")
+    args = parser.parse_args()
+
+    secret = os.environ["SLACK_SIGNING_SECRET"]
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(
+            lambda _: send_one(session, args.url, secret, args.user_id),
+            range(args.requests)
+        ))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    errors = sum(1 for _, status in results if status != 200)
+    late = sum(1 for latency in latencies if latency > SLACK_ACK_DEADLINE)
+
+    print(f"requests={args.requests} concurrency={args.concurrency} elapsed={elapsed:.2f}s "
+          f"throughput={args.requests / elapsed:.1f}/s")
+    print(f"ack latency ms: p50={percentile(latencies, 50) * 1000:.1f} "
+          f"p95={percentile(latencies, 95) * 1000:.1f} "
+          f"p99={percentile(latencies, 99) * 1000:.1f} "
+          f"max={max(latencies) * 1000:.1f} mean={statistics.mean(latencies) * 1000:.1f}")
+    print(f"non-200={errors} slower-than-{SLACK_ACK_DEADLINE:.0f}s={late}")
+
+
+if __name__ == "__main__":
+    main()
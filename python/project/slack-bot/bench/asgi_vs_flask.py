@@ -0,0 +1,88 @@
+"""Side-by-side latency of the Flask (gunicorn) and asyncio (uvicorn) paths.
+
+Start both servers against the same Slack workspace or stand-ins, e.g.
+
+    gunicorn -c gunicorn.conf.py -b 0.0.0.0:8080 app:app
+    uvicorn asgi:app --port 8081
+
+then replay the same signed slash-command and options load against each:
+
+    SLACK_SIGNING_SECRET=... python bench/asgi_vs_flask.py \\
+        --flask-url http://localhost:8080 --asgi-url http://localhost:8081 -n 500 -c 100
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+
+from ack_latency import percentile, sign, slash_command_body
+
+
+def options_body(query):
+    return urlencode({"payload": json.dumps({
+        "type": "block_suggestion",
+        "action_id": "resource_search",
+        "value": query,
+        "view": {"private_metadata": json.dumps({"command": "describe", "namespace": "default"})},
+    })})
+
+
+def post(session, url, path, secret, body):
+    timestamp = str(int(time.time()))
+    headers = {
+        "Content-Type": "application/x-www-form-urlencoded",
+        "X-Slack-Request-Timestamp": timestamp,
+        "X-Slack-Signature": sign(secret, body, timestamp),
+    }
+    start = time.perf_counter()
+    response = session.post(f"{url}{path}", data=body, headers=headers, timeout=30)
+    return time.perf_counter() - start, response.status_code
+
+
+def run(url, path, make_body, secret, requests_total, concurrency):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: post(session, url, path, secret, make_body(i)), range(requests_total)))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for latency, _ in results]
+    return {
+        "throughput": requests_total / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "errors": sum(1 for _, status in results if status != 200),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flask-url", default="http://localhost:8080")
+    parser.add_argument("--asgi-url", default="http://localhost:8081")
+    parser.add_argument("-n", "--requests", type=int, default=500)
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    parser.add_argument("--user-id", default="UBENCH0001")
+    args = parser.parse_args()
+
+    secret = os.environ["SLACK_SIGNING_SECRET"]
+    scenarios = [
+        ("slash command", "/slack/command", lambda i: slash_command_body(args.user_id)),
+        ("options", "/slack/options", lambda i: options_body(f"app{i % 10}")),
+    ]
+
+    print(f"{'scenario':<15} {'server':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, path, make_body in scenarios:
+        for server, url in (("flask", args.flask_url), ("asgi", args.asgi_url)):
+            r = run(url, path, make_body, secret, args.requests, args.concurrency)
+            print(f"{name:<15} {server:<6} {r['throughput']:>8.1f} {r['p50']:>8.1f} "
+                  f"{r['p95']:>8.1f} {r['p99']:>8.1f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""End-to-end load test of the Flask app against local Slack and Kubernetes stand-ins.
+
+Starts the bot under gunicorn with SLACK_API_URL and a kubeconfig pointing at
+stand-ins served from this process, then replays signed slash-command,
+block-action, view-submission and options requests at a fixed rate. The
+stand-ins answer after a configurable delay, so slow Slack or API server
+responses can be simulated. Requests are scheduled open-loop: latency is
+measured from each request's scheduled send time, so a stalled server shows up
+as queueing delay instead of a lower request rate.
+
+    python bench/loadtest.py --rate 50 --duration 30 --slack-latency 150 --k8s-latency 40
+
+Reports ack latency percentiles per request type (options included), requests
+over Slack's 3s ack deadline, Slack and Kubernetes calls made by the bot, and
+thread count and RSS of the gunicorn processes sampled during the run.
+Pass --url to load an already running bot instead; it must be configured
+with the same SLACK_SIGNING_SECRET and point at stand-ins of its own.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, parse_qs, urlparse
+
+import requests
+from aiohttp import web
+
+from ack_latency import SLACK_ACK_DEADLINE, percentile, sign, slash_command_body
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIGNING_SECRET = "loadtest-signing-secret"
+DEFAULT_MIX = "command=1,block_actions=2,view_submission=1,options=6"
+
+KUBECONFIG_TEMPLATE = """apiVersion: v1
+kind: Config
+clusters: [{{name: loadtest, cluster: {{server: "http://127.0.0.1:{port}"}}}}]
+users: [{{name: loadtest, user: {{token: loadtest}}}}]
+contexts: [{{name: loadtest, context: {{cluster: loadtest, user: loadtest}}}}]
+current-context: loadtest
+"""
+
+
+class StandIns:
+    """Slack Web API and Kubernetes API stand-ins on one event loop"""
+    def __init__(self, slack_latency, k8s_latency, deployments, replicas):
+        self.slack_latency = slack_latency
+        self.k8s_latency = k8s_latency
+        self.calls = {"slack": {}, "kubernetes": {}}
+        self.deployments = [f"service-{i}" for i in range(deployments)]
+        self.pods = [
+            self._pod(name, f"{name}-7d9f8b6c4-{j:05d}")
+            for name in self.deployments for j in range(replicas)
+        ]
+        self.ports = {}
+
+    def _count(self, kind, key):
+        self.calls[kind][key] = self.calls[kind].get(key, 0) + 1
+
+    @staticmethod
+    def _pod(deployment, name):
+        return {
+            "metadata": {"name": name, "namespace": "default", "labels": {"app": deployment},
+                         "uid": uuid.uuid4().hex, "creationTimestamp": "2024-01-01T00:00:00Z"},
+            "spec": {"nodeName": "node-1", "containers": [{"name": "app", "image": f"{deployment}:1"}]},
+            "status": {"phase": "Running", "containerStatuses": [{
+                "name": "app", "ready": True, "restartCount": 0, "image": f"{deployment}:1",
+                "imageID": "sha256:0", "state": {"running": {}}}]},
+        }
+
+    @staticmethod
+    def _deployment(name, replicas):
+        return {
+            "metadata": {"name": name, "namespace": "default", "generation": 1},
+            "spec": {
+                "replicas": replicas,
+                "selector": {"matchLabels": {"app": name}},
+                "template": {"metadata": {"labels": {"app": name}},
+                             "spec": {"containers": [{"name": "app", "image": f"{name}:1"}]}},
+                "strategy": {"type": "RollingUpdate"},
+            },
+            "status": {"observedGeneration": 1, "replicas": replicas, "updatedReplicas": replicas,
+                       "readyReplicas": replicas, "availableReplicas": replicas},
+        }
+
+    async def slack_api(self, request):
+        method = request.match_info["method"]
+        self._count("slack", method)
+        await asyncio.sleep(self.slack_latency)
+        form = await request.post()
+        user_id = form.get("user", "ULOADTEST")
+        return web.json_response({
+            "ok": True,
+            "ts": f"{time.time():.6f}",
+            "channel": form.get("channel", "D0LOADTEST"),
+            "user": {"id": user_id, "real_name": "Load Test", "profile": {"email": f"{user_id.lower()}@loadtest.local"}},
+        })
+
+    def _select(self, items, query):
+        fields = dict(f.split("=", 1) for f in query.get("fieldSelector", [""])[0].split(",") if "=" in f)
+        labels = dict(f.split("=", 1) for f in query.get("labelSelector", [""])[0].split(",") if "=" in f)
+        selected = []
+        for item in items:
+            if "metadata.name" in fields and item["metadata"]["name"] != fields["metadata.name"]:
+                continue
+            if "status.phase" in fields and item.get("status", {}).get("phase") != fields["status.phase"]:
+                continue
+            if any(item["metadata"].get("labels", {}).get(k) != v for k, v in labels.items()):
+                continue
+            selected.append(item)
+        return selected
+
+    async def kube_api(self, request):
+        path = request.path
+        query = parse_qs(urlparse(str(request.url)).query)
+        self._count("kubernetes", f"{request.method} {path.rsplit('/', 1)[0] if path.count('/') > 6 else path}")
+        await asyncio.sleep(self.k8s_latency)
+        parts = path.strip("/").split("/")
+        if path.endswith("/pods") and "metrics.k8s.io" not in path:
+            return web.json_response({"kind": "PodList", "metadata": {"resourceVersion": "1"},
+                                      "items": self._select(self.pods, query)})
+        if path.endswith("/deployments"):
+            replicas = len(self.pods) // len(self.deployments)
+            items = [self._deployment(name, replicas) for name in self.deployments]
+            return web.json_response({"kind": "DeploymentList", "metadata": {"resourceVersion": "1"},
+                                      "items": self._select(items, query)})
+        if parts[-2] == "deployments":
+            if parts[-1] in self.deployments:
+                return web.json_response(self._deployment(parts[-1], len(self.pods) // len(self.deployments)))
+        if parts[-2] == "pods":
+            pod = next((p for p in self.pods if p["metadata"]["name"] == parts[-1]), None)
+            if pod:
+                return web.json_response(pod)
+        if path.endswith(("/events", "/horizontalpodautoscalers")) or "metrics.k8s.io" in path:
+            return web.json_response({"metadata": {"resourceVersion": "1"}, "items": []})
+        return web.json_response({"kind": "Status", "status": "Failure", "reason": "NotFound", "code": 404},
+                                 status=404)
+
+    async def start(self):
+        for kind, handler in (("slack", self.slack_api), ("kubernetes", self.kube_api)):
+            app = web.Application()
+            if kind == "slack":
+                app.router.add_post("/api/{method}", handler)
+            else:
+                app.router.add_route("*", "/{tail:.*}", handler)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            self.ports[kind] = site._server.sockets[0].getsockname()[1]
+
+
+def modal_view(command="get"):
+    return {
+        "id": f"V{uuid.uuid4().hex[:10].upper()}",
+        "hash": uuid.uuid4().hex,
+        "callback_id": "k8s_command",
+        "title": {"type": "plain_text", "text": "Kubernetes Commander"},
+        "submit": {"type": "plain_text", "text": "Execute"},
+        "private_metadata": json.dumps({"channel_id": "C0LOADTEST", "command": command, "namespace": "default"}),
+        "blocks": [{"block_id": "command_type", "type": "input"}, {"block_id": "resource_name", "type": "input"}],
+    }
+
+
+def interaction_body(payload):
+    return urlencode({"payload": json.dumps(payload)})
+
+
+def make_request(kind, i, users, stand_ins):
+    """(path, form body) for request i of the given kind"""
+    user_id = f"ULOAD{i % users:05d}"
+    if kind == "command":
+        return "/slack/command", slash_command_body(user_id)
+    if kind == "options":
+        return "/slack/options", interaction_body({
+            "type": "block_suggestion",
+            "user": {"id": user_id},
+            "action_id": "resource_search",
+            "value": f"service-{random.randrange(len(stand_ins.deployments))}",
+            "view": modal_view("describe"),
+        })
+    if kind == "block_actions":
+        return "/slack/interactions", interaction_body({
+            "type": "block_actions",
+            "user": {"id": user_id},
+            "trigger_id": f"load.{uuid.uuid4().hex}",
+            "actions": [{"action_id": "command_select", "selected_option": {"value": random.choice(["get", "describe", "logs"])}}],
+            "view": modal_view(),
+        })
+    pod = random.choice(stand_ins.pods)["metadata"]["name"]
+    view = modal_view()
+    view["state"] = {"values": {
+        "command_type": {"command_select": {"selected_option": {"value": "get"}}},
+        "resource_name": {"resource_search": {"selected_option": {"value": pod}}},
+    }}
+    return "/slack/interactions", interaction_body({"type": "view_submission", "user": {"id": user_id}, "view": view})
+
+
+def parse_mix(spec):
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def process_tree(pid):
+    """pid and all its descendants, read from /proc"""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def sample_processes(pid, samples, stop):
+    """Append (threads, rss_mb) summed over the process tree every 0.5s until stop is set"""
+    while not stop.wait(0.5):
+        threads = rss_kb = 0
+        for member in process_tree(pid):
+            try:
+                with open(f"/proc/{member}/status") as f:
+                    for line in f:
+                        if line.startswith("Threads:"):
+                            threads += int(line.split()[1])
+                        elif line.startswith("VmRSS:"):
+                            rss_kb += int(line.split()[1])
+            except OSError:
+                pass
+        samples.append((threads, rss_kb / 1024))
+
+
+def start_bot(workdir, stand_ins, port, workers, threads, users):
+    kubeconfig = os.path.join(workdir, "kubeconfig")
+    with open(kubeconfig, "w") as f:
+        f.write(KUBECONFIG_TEMPLATE.format(port=stand_ins.ports["kubernetes"]))
+    roles = os.path.join(workdir, "roles.json")
+    with open(roles, "w") as f:
+        json.dump({"allowed_users": [f"uload{i:05d}@loadtest.local" for i in range(users)],
+                   "admin_users": [], "permissions": {}}, f)
+    env = dict(
+        os.environ,
+        KUBECONFIG=kubeconfig,
+        SLACK_API_URL=f"http://127.0.0.1:{stand_ins.ports['slack']}/api/",
+        SLACK_BOT_TOKEN="xoxb-loadtest",
+        SLACK_SIGNING_SECRET=SIGNING_SECRET,
+        ROLES_CONFIG_PATH=roles,
+        SNAPSHOT_PATH=os.path.join(workdir, "resources.snap"),
+        TOP_PATH=os.path.join(workdir, "top.json"),
+        LEADER_LOCK_PATH=os.path.join(workdir, "leader.lock"),
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_THREADS=str(threads),
+        LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"),
+        # Load comes from a few hundred synthetic users; keep the per-user limits out of the way
+        SLASH_COMMAND_RATE_LIMIT="100000/minute",
+        COMMAND_RATE_LIMITS="read=100000/60,expensive=100000/60,mutating=100000/60",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "app:app"],
+        cwd=BOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=open(os.path.join(workdir, "bot.log"), "w")
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/health", timeout=1).status_code == 200:
+                return process, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Bot did not start, see {workdir}/bot.log")
+
+
+def wait_for_live_cache(url, timeout=60):
+    """Wait for the leader's first live cache refresh, so early searches are not counted as errors"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            health = requests.get(f"{url}/health", timeout=1).json()
+            if health["components"].get("resource_cache") == "live":
+                return
+        except (requests.RequestException, ValueError, KeyError):
+            pass
+        time.sleep(0.2)
+    print(f"Resource cache not live after {timeout}s; searches may come back empty", file=sys.stderr)
+
+
+def run_load(url, rate, duration, mix, users, stand_ins, max_in_flight):
+    """Send requests open-loop at rate/s; returns {kind: [(latency, status, body)]}"""
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=max_in_flight))
+    kinds, weights = zip(*mix.items())
+    total = int(rate * duration)
+    results = {kind: [] for kind in kinds}
+
+    def send(kind, i, scheduled):
+        path, body = make_request(kind, i, users, stand_ins)
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "X-Slack-Request-Timestamp": timestamp,
+            "X-Slack-Signature": sign(SIGNING_SECRET, body, timestamp),
+        }
+        try:
+            response = session.post(f"{url}{path}", data=body, headers=headers, timeout=30)
+            status, text = response.status_code, response.text
+        except requests.RequestException as e:
+            status, text = 0, str(e)
+        results[kind].append((time.perf_counter() - scheduled, status, text))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, random.choices(kinds, weights)[0], i, scheduled)
+    return results, time.perf_counter() - start
+
+
+def acked(kind, status, body):
+    """Whether a response is the ack the handler should give, not an error or an empty options list"""
+    if status != 200 or '"errors"' in body or "failed" in body:
+        return False
+    return kind != "options" or '"options": []' not in body.replace('"options":[]', '"options": []')
+
+
+def report(results, elapsed, samples, stand_ins):
+    sent = sum(len(r) for r in results.values())
+    print(f"{sent} requests in {elapsed:.1f}s ({sent / elapsed:.1f} req/s)")
+    print(f"  {'request':<16} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'>3s':>5} {'errors':>7}")
+    for kind, rows in results.items():
+        if not rows:
+            continue
+        latencies = [latency for latency, _, _ in rows]
+        ms = lambda pct: percentile(latencies, pct) * 1000
+        late = sum(1 for latency in latencies if latency > SLACK_ACK_DEADLINE)
+        errors = sum(1 for _, status, body in rows if not acked(kind, status, body))
+        print(f"  {kind:<16} {len(rows):>5} {ms(50):>8.1f} {ms(95):>8.1f} {ms(99):>8.1f} {max(latencies) * 1000:>8.1f}"
+              f" {late:>5} {errors:>7}")
+    if samples:
+        threads = [t for t, _ in samples]
+        rss = [r for _, r in samples]
+        print(f"  bot threads: start {threads[0]}, max {max(threads)}, end {threads[-1]}")
+        print(f"  bot RSS MB:  start {rss[0]:.0f}, max {max(rss):.0f}, end {rss[-1]:.0f}")
+    for kind, calls in stand_ins.calls.items():
+        print(f"  {kind} calls: " + ", ".join(f"{k}={v}" for k, v in sorted(calls.items(), key=lambda kv: -kv[1])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=20, help="requests per second")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="request kinds and weights")
+    parser.add_argument("--users", type=int, default=200, help="distinct Slack users")
+    parser.add_argument("--slack-latency", type=float, default=100, help="Slack stand-in delay, ms")
+    parser.add_argument("--k8s-latency", type=float, default=20, help="Kubernetes stand-in delay, ms")
+    parser.add_argument("--deployments", type=int, default=200)
+    parser.add_argument("--replicas", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--url", help="load an already running bot instead of starting one")
+    args = parser.parse_args()
+
+    stand_ins = StandIns(args.slack_latency / 1000, args.k8s_latency / 1000, args.deployments, args.replicas)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(stand_ins.start(), loop).result()
+
+    workdir = tempfile.mkdtemp(prefix="jarvis-load-")
+    process = None
+    samples, stop = [], threading.Event()
+    url = args.url
+    if url is None:
+        process, url = start_bot(workdir, stand_ins, args.port, args.workers, args.threads, args.users)
+        threading.Thread(target=sample_processes, args=(process.pid, samples, stop), daemon=True).start()
+        wait_for_live_cache(url)
+        time.sleep(1)  # other workers remap the snapshot within SnapshotReader's 1s recheck
+
+    print(f"Load: {args.rate:g} req/s for {args.duration:g}s, mix {args.mix}, "
+          f"Slack +{args.slack_latency:g}ms, Kubernetes +{args.k8s_latency:g}ms")
+    try:
+        results, elapsed = run_load(url, args.rate, args.duration, parse_mix(args.mix), args.users,
+                                    stand_ins, args.max_in_flight)
+        time.sleep(2)  # let submitted commands finish their Slack and Kubernetes calls
+    finally:
+        stop.set()
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+    report(results, elapsed, samples, stand_ins)
+
+
+if __name__ == "__main__":
+    main()
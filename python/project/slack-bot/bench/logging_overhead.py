@@ -0,0 +1,137 @@
+"""Logging cost of the request hot path at INFO versus DEBUG.
+
+Drives handle_options_request and handle_interaction in-process against a
+local resource snapshot and reports the time per request at each level. It
+also counts payload serialization done for logging: indented json.dumps calls
+and reprs of the form data. At INFO both counts must be zero, otherwise the
+script exits non-zero.
+
+    python bench/logging_overhead.py -n 5000
+
+No cluster is contacted. Without KUBECONFIG a throwaway kubeconfig pointing at
+an unused local port is written so the Kubernetes client can initialize.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+KUBECONFIG_TEMPLATE = """apiVersion: v1
+kind: Config
+clusters: [{name: bench, cluster: {server: "http://127.0.0.1:9"}}]
+users: [{name: bench, user: {token: bench}}]
+contexts: [{name: bench, context: {cluster: bench, user: bench}}]
+current-context: bench
+"""
+
+dumps_calls = 0
+form_reprs = 0
+
+
+class CountingForm(dict):
+    """Form data that counts how often it is rendered to a string"""
+    def __repr__(self):
+        global form_reprs
+        form_reprs += 1
+        return super().__repr__()
+
+    __str__ = __repr__
+
+
+def setup_environment(workdir, pods):
+    if "KUBECONFIG" not in os.environ:
+        path = os.path.join(workdir, "kubeconfig")
+        with open(path, "w") as f:
+            f.write(KUBECONFIG_TEMPLATE)
+        os.environ["KUBECONFIG"] = path
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-bench")
+    os.environ["SNAPSHOT_PATH"] = os.path.join(workdir, "resources.snap")
+    os.environ["ROLES_CONFIG_PATH"] = os.path.join(workdir, "roles.json")
+    with open(os.environ["ROLES_CONFIG_PATH"], "w") as f:
+        json.dump({"allowed_users": [], "admin_users": [], "permissions": {}}, f)
+
+    from jarvis.snapshot import write_snapshot
+    names = [f"service-{i}-7d9f8b6c4-{i:05d}" for i in range(pods)]
+    write_snapshot(os.environ["SNAPSHOT_PATH"], {"pods": names, "deployments": names[: pods // 4]})
+
+
+def count_indented_dumps():
+    """Wrap json.dumps to count the pretty-printed dumps used only for logging"""
+    original = json.dumps
+
+    def dumps(*args, **kwargs):
+        global dumps_calls
+        if kwargs.get("indent"):
+            dumps_calls += 1
+        return original(*args, **kwargs)
+
+    json.dumps = dumps
+
+
+def options_payload(query):
+    return {
+        "type": "block_suggestion",
+        "value": query,
+        "view": {"private_metadata": json.dumps({"command": "describe", "namespace": "default"})},
+    }
+
+
+def interaction_form(i):
+    payload = {
+        "type": "block_actions",
+        "trigger_id": f"bench.{i}",
+        "actions": [{"action_id": "bench_noop"}],
+    }
+    return CountingForm(payload=json.dumps(payload))
+
+
+def run(level, iterations, app, slack_handler):
+    global dumps_calls, form_reprs
+    logging.getLogger().setLevel(level)
+    dumps_calls = form_reprs = 0
+    start = time.perf_counter()
+    with app.app_context():
+        for i in range(iterations):
+            slack_handler.handle_options_request(options_payload(f"service-{i % 500}"))
+            slack_handler.handle_interaction(interaction_form(i))
+    elapsed = time.perf_counter() - start
+    return elapsed / iterations * 1e6, dumps_calls, form_reprs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    parser.add_argument("--pods", type=int, default=5000, help="pod names in the snapshot")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="jarvis-bench-")
+    setup_environment(workdir, args.pods)
+
+    from flask import Flask
+    from jarvis.log import configure_logging
+    from jarvis import slack_handler
+
+    configure_logging(stream=open(os.devnull, "w"))
+    count_indented_dumps()
+    app = Flask(__name__)
+
+    print(f"{args.iterations} options + interaction requests per level, {args.pods} pods in snapshot")
+    results = {}
+    for name, level in (("INFO", logging.INFO), ("DEBUG", logging.DEBUG)):
+        per_request, dumps, reprs = run(level, args.iterations, app, slack_handler)
+        results[name] = (dumps, reprs)
+        print(f"  {name:5}  {per_request:8.1f} us/request  payload dumps={dumps}  form reprs={reprs}")
+
+    if results["INFO"] != (0, 0):
+        print("FAIL: payloads were serialized for logging at INFO")
+        sys.exit(1)
+    print("OK: no payload serialization at INFO")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Local stand-in for Slack's Socket Mode endpoint, for exercising jarvis.socket_mode.
+
+Serves apps.connections.open and a websocket on 127.0.0.1, connects the bot's
+Socket Mode client to it in-process and pushes slash command and options
+envelopes through the one connection. It reports ack latency per envelope
+type and checks that every envelope was acked with the expected payload.
+Other Web API calls made by the handlers (views.open, users.info, ...) are
+answered with {"ok": true} by the same server.
+
+    python bench/socket_mode_standin.py -n 500 -c 20
+
+No Slack workspace or cluster is contacted. Without KUBECONFIG a throwaway
+kubeconfig pointing at an unused local port is written so the Kubernetes
+client can initialize.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from aiohttp import web, WSMsgType
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logging_overhead import setup_environment  # noqa: E402
+
+SLACK_ACK_DEADLINE = 3.0
+
+
+class StandIn:
+    """Slack's side of one Socket Mode connection"""
+    def __init__(self):
+        self.port = None
+        self.connected = asyncio.Event()
+        self.ws = None
+        self.pending = {}
+        self.api_calls = {}
+
+    async def connections_open(self, request):
+        return web.json_response({"ok": True, "url": f"ws://127.0.0.1:{self.port}/link"})
+
+    async def api(self, request):
+        method = request.match_info["method"]
+        self.api_calls[method] = self.api_calls.get(method, 0) + 1
+        form = await request.post()
+        user_id = form.get("user", "UBENCH")
+        return web.json_response({
+            "ok": True,
+            "ts": "1.0",
+            "user": {"id": user_id, "real_name": "Bench User", "profile": {"email": f"{user_id.lower()}@bench.local"}},
+        })
+
+    async def link(self, request):
+        ws = web.WebSocketResponse(autoping=True)
+        await ws.prepare(request)
+        await ws.send_str(json.dumps({"type": "hello", "num_connections": 1}))
+        self.ws = ws
+        self.connected.set()
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+            ack = json.loads(message.data)
+            waiter = self.pending.pop(ack.get("envelope_id"), None)
+            if waiter:
+                waiter.set_result((time.perf_counter(), ack.get("payload")))
+        return ws
+
+    async def send(self, envelope_type, payload):
+        """Push one envelope and wait for its ack; returns (latency, ack payload)"""
+        envelope_id = uuid.uuid4().hex
+        waiter = asyncio.get_running_loop().create_future()
+        self.pending[envelope_id] = waiter
+        start = time.perf_counter()
+        await self.ws.send_str(json.dumps({
+            "type": envelope_type,
+            "envelope_id": envelope_id,
+            "payload": payload,
+            "accepts_response_payload": True,
+        }))
+        acked_at, ack_payload = await asyncio.wait_for(waiter, timeout=10)
+        return acked_at - start, ack_payload
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/api/apps.connections.open", self.connections_open)
+        app.router.add_post("/api/{method}", self.api)
+        app.router.add_get("/link", self.link)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+
+def slash_payload(i):
+    return {
+        "command": "/jarvis",
+        "text": "",
+        "user_id": f"UBENCH{i % 50}",
+        "channel_id": "C0BENCH",
+        "trigger_id": f"bench.{uuid.uuid4().hex}",
+    }
+
+
+def options_payload(i):
+    return {
+        "type": "block_suggestion",
+        "value": f"service-{i % 500}",
+        "view": {"private_metadata": json.dumps({"command": "describe", "namespace": "default"})},
+    }
+
+
+async def drive(standin, iterations, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {"slash_commands": [], "options": []}
+    failures = []
+
+    async def one(i):
+        async with semaphore:
+            if i % 2:
+                latency, payload = await standin.send("interactive", options_payload(i))
+                results["options"].append(latency)
+                if not payload or not payload.get("options"):
+                    failures.append(("options", payload))
+            else:
+                latency, payload = await standin.send("slash_commands", slash_payload(i))
+                results["slash_commands"].append(latency)
+                if not payload or payload.get("response_type") != "ephemeral":
+                    failures.append(("slash_commands", payload))
+
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    return results, failures
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="jarvis-socket-")
+    setup_environment(workdir, 5000)
+    os.environ["LEADER_LOCK_PATH"] = os.path.join(workdir, "leader.lock")
+    with open(os.environ["ROLES_CONFIG_PATH"], "w") as f:
+        json.dump({"allowed_users": [f"ubench{i}@bench.local" for i in range(50)], "admin_users": [], "permissions": {}}, f)
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    standin = StandIn()
+    asyncio.run_coroutine_threadsafe(standin.start(), loop).result()
+    # The handlers' own Web API calls go to the stand-in as well
+    os.environ["SLACK_API_URL"] = f"http://127.0.0.1:{standin.port}/api/"
+
+    from jarvis.log import configure_logging
+    from jarvis import socket_mode
+
+    configure_logging(stream=open(os.devnull, "w"))
+    client = socket_mode.build_client("xapp-bench")
+    client.connect()
+    asyncio.run_coroutine_threadsafe(asyncio.wait_for(standin.connected.wait(), 10), loop).result()
+
+    start = time.perf_counter()
+    results, failures = asyncio.run_coroutine_threadsafe(
+        drive(standin, args.iterations, args.concurrency), loop
+    ).result()
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    print(f"{args.iterations} envelopes over one connection, concurrency {args.concurrency}, {elapsed:.2f}s")
+    for kind, latencies in results.items():
+        if not latencies:
+            continue
+        ms = [x * 1000 for x in latencies]
+        late = sum(1 for x in latencies if x > SLACK_ACK_DEADLINE)
+        print(f"  {kind:15} n={len(ms):4}  p50={percentile(ms, 50):7.1f}ms  p95={percentile(ms, 95):7.1f}ms"
+              f"  p99={percentile(ms, 99):7.1f}ms  max={max(ms):7.1f}ms  over 3s={late}")
+    print(f"  Web API calls answered by the stand-in: {standin.api_calls}")
+    if failures:
+        print(f"FAIL: {len(failures)} envelopes acked with an unexpected payload, e.g. {failures[0]}")
+        sys.exit(1)
+    print("OK: every envelope acked with the handler's response")
+
+
+if __name__ == "__main__":
+    main()
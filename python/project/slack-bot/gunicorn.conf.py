@@ -0,0 +1,42 @@
+import os
+import glob
+from prometheus_client import multiprocess
+
+# Serving mode for the bot. Slack needs an ack within 3 seconds, so requests
+# are handled by threaded workers; the APScheduler jobs run in exactly one of
+# them (see jarvis/leader.py), however many workers are configured.
+# Defaults to one worker: delivery dedup, the result cache and the rate limits
+# are held per process, so with more workers each one enforces them separately.
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8080")
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 20
+keepalive = 5
+accesslog = "-"
+
+# Do not preload: the scheduler and cache threads must start after fork
+preload_app = False
+
+
+def on_starting(server):
+    if server.cfg.workers > 1:
+        server.log.warning(
+            "Running %d workers: delivery dedup, the result cache, per-user rate limits and the "
+            "exec/describe cap are per worker, so limits are %dx the configured values and "
+            "retries/invalidations only reach the worker that saw them",
+            server.cfg.workers, server.cfg.workers
+        )
+
+    # Metric files left by a previous run would be summed into the new one
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,121 @@
+"""asyncio counterparts of the Slack handlers in slack_handler.py.
+
+They keep the same behaviour but return ``(status, body)`` instead of Flask
+responses, and await Slack through AsyncWebClient so a slow views_open or
+views_update parks a coroutine instead of a worker thread. Kubernetes work
+for submitted commands still runs on the bounded command_executor pool.
+"""
+import os
+import json
+import asyncio
+import logging
+from slack_sdk.errors import SlackApiError
+from jarvis.auth import is_user_allowed, is_user_admin
+from jarvis.tracing import TracedAsyncWebClient, SLACK_API_URL
+from jarvis.slack_handler import (
+    build_initial_modal, build_command_view, resolve_resource_options,
+    is_first_delivery, command_executor, admit_submission, process_admitted_command,
+    PAGE_ACTIONS, page_update
+)
+
+logger = logging.getLogger(__name__)
+async_client = TracedAsyncWebClient(token=os.getenv("SLACK_BOT_TOKEN"), base_url=SLACK_API_URL)
+
+CLEAR_VIEW = {"response_action": "clear"}
+
+
+async def handle_slash_command(form_data):
+    try:
+        user_id = form_data.get("user_id")
+        trigger_id = form_data.get("trigger_id")
+        channel_id = form_data.get("channel_id")
+
+        if not is_first_delivery(("command", trigger_id)):
+            logger.info("Duplicate delivery of trigger %s - ignoring", trigger_id)
+            return 200, None
+
+        # Email lookups are cached; a miss blocks on Slack, so keep it off the loop
+        is_admin = await asyncio.to_thread(is_user_admin, user_id)
+        if not await asyncio.to_thread(is_user_allowed, user_id):
+            return 200, {"response_type": "ephemeral", "text": "❌ Unauthorized"}
+
+        if not trigger_id:
+            return 200, {
+                "response_type": "ephemeral",
+                "text": "⚠️ Missing trigger ID. Please try the command again."
+            }
+
+        response = {
+            "response_type": "ephemeral",
+            "text": "JARVIS on duty..!!",
+            "replace_original": True
+        }
+        try:
+            await async_client.views_open(trigger_id=trigger_id, view=build_initial_modal(channel_id, is_admin))
+        except SlackApiError as e:
+            logger.error("Modal open failed: %s", e.response['error'])
+            response["text"] = "⚠️ Failed to open command panel"
+        return 200, response
+
+    except Exception as e:
+        logger.error("Slash command failed: %s", e, exc_info=True)
+        return 200, {"response_type": "ephemeral", "text": "⚠️ Failed to process command"}
+
+
+async def handle_interaction(form_data):
+    try:
+        payload_str = form_data.get("payload")
+        if not payload_str:
+            return 200, {"response_type": "ephemeral", "text": "Empty request"}
+        payload = json.loads(payload_str)
+
+        if payload.get("type") == "block_actions":
+            if not is_first_delivery(("action", payload.get("trigger_id"))):
+                return 200, None
+
+            action = payload["actions"][0]
+            if action["action_id"] in PAGE_ACTIONS:
+                # Result pages are files shared between workers
+                update = await asyncio.to_thread(page_update, payload, action)
+                if update:
+                    await async_client.chat_update(**update)
+            elif action["action_id"] == "command_select":
+                view = payload["view"]
+                new_command = action["selected_option"]["value"]
+                await async_client.views_update(
+                    view_id=view["id"],
+                    hash=view["hash"],
+                    view=build_command_view(view, new_command)
+                )
+            return 200, None
+
+        if payload.get("type") == "view_submission":
+            if not all(key in payload for key in ["user", "view"]):
+                return 200, {"response_action": "errors", "errors": {"_": "Invalid payload structure"}}
+
+            error, release = admit_submission(payload)
+            if error:
+                return 200, {"response_action": "errors", "errors": {"command_type": error}}
+
+            if is_first_delivery(("view", payload["view"].get("id"))):
+                command_executor.submit(process_admitted_command, payload, release)
+            elif release:
+                release()
+            return 200, CLEAR_VIEW
+
+        return 200, None
+
+    except json.JSONDecodeError:
+        return 200, {"response_type": "ephemeral", "text": "Invalid payload format"}
+    except Exception as e:
+        logger.error("Interaction handler failed: %s", e, exc_info=True)
+        return 200, {"response_type": "ephemeral", "text": "Processing started (check logs for errors)"}
+
+
+async def handle_options_request(payload):
+    try:
+        # Searches touch the shared snapshot and search-activity files, so keep them off the loop
+        return 200, {"options": await asyncio.to_thread(resolve_resource_options, payload)}
+    except Exception as e:
+        logger.error("Options request failed: %s", e)
+        return 200, {"options": []}
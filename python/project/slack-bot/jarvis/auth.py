@@ -1,102 +1,161 @@
 import os
 import json
 import logging
-from slack_sdk import WebClient
+import threading
+import time
+from collections import namedtuple
 from slack_sdk.errors import SlackApiError
 from slack_sdk.signature import SignatureVerifier
 from functools import wraps
 from flask import request, abort
-from datetime import datetime, timedelta
+from jarvis.cache import LoadingCache
+from jarvis import metrics
+from jarvis.tracing import TracedWebClient, SLACK_API_URL
 
 logger = logging.getLogger(__name__)
-client = WebClient(token=os.getenv("SLACK_BOT_TOKEN"))
+client = TracedWebClient(token=os.getenv("SLACK_BOT_TOKEN"), base_url=SLACK_API_URL)
 
-# Load roles configuration
-with open('roles_config.json', 'r') as file:
-    roles_config = json.load(file)
+# Roles configuration, compiled at load time and hot-reloaded on change
+ROLES_CONFIG_PATH = os.getenv("ROLES_CONFIG_PATH", "roles_config.json")
+ROLES_RELOAD_INTERVAL = int(os.getenv("ROLES_RELOAD_INTERVAL", "10"))
+
+CompiledRoles = namedtuple("CompiledRoles", ["allowed", "admins", "mtime"])
+
+def compile_roles(config, mtime=None):
+    """Compile raw roles config into frozensets for O(1) membership checks
+
+    Besides the flat ``allowed_users`` / ``admin_users`` lists, an optional
+    ``groups`` section grants permissions to every member of a group:
+    ``{"groups": {"oncall": {"members": [...], "permissions": ["allowed", "admin"]}}}``
+    """
+    user_permissions = {}
+    for email in config.get("allowed_users", []):
+        user_permissions.setdefault(email.lower(), set()).add("allowed")
+    for email in config.get("admin_users", []):
+        user_permissions.setdefault(email.lower(), set()).add("admin")
+
+    for spec in config.get("groups", {}).values():
+        for email in spec.get("members", []):
+            user_permissions.setdefault(email.lower(), set()).update(spec.get("permissions", []))
+
+    return CompiledRoles(
+        allowed=frozenset(e for e, perms in user_permissions.items() if "allowed" in perms),
+        admins=frozenset(e for e, perms in user_permissions.items() if "admin" in perms),
+        mtime=mtime
+    )
+
+def load_roles(path=ROLES_CONFIG_PATH):
+    """Read and compile the roles file"""
+    mtime = os.stat(path).st_mtime_ns
+    with open(path, 'r') as file:
+        config = json.load(file)
+    return config, compile_roles(config, mtime)
+
+roles_config, compiled_roles = load_roles()
+
+def reload_roles_if_changed(path=ROLES_CONFIG_PATH):
+    """Swap in a freshly compiled roles config when the file has changed"""
+    global roles_config, compiled_roles
+    try:
+        if os.stat(path).st_mtime_ns == compiled_roles.mtime:
+            return False
+        new_config, new_roles = load_roles(path)
+    except Exception as e:
+        # Keep serving the last good config if the file is missing or half-written
+        logger.error("Failed to reload roles config: %s", e)
+        return False
+    roles_config, compiled_roles = new_config, new_roles
+    logger.info("Reloaded roles config: %s allowed, %s admins", len(new_roles.allowed), len(new_roles.admins))
+    return True
+
+def start_roles_watcher():
+    """Background thread polling the roles file mtime"""
+    def watcher():
+        while True:
+            time.sleep(ROLES_RELOAD_INTERVAL)
+            reload_roles_if_changed()
+
+    thread = threading.Thread(target=watcher, daemon=True)
+    thread.start()
+    logger.info("Roles config watcher started")
+
+start_roles_watcher()
 
 # Cache for user email lookups
-user_email_cache = {}
 CACHE_TTL = 3600
+CACHE_STALE_TTL = 600
+CACHE_MAXSIZE = 1024
 
 def verify_slack_request(request):
     """Verify Slack request signature"""
-    logger.info("Verifying Slack request signature")
-    print(f"Verifying Slack equest signature: {request.headers}")
+    logger.debug("Verifying Slack request signature: %s", request.headers)
     verifier = SignatureVerifier(os.environ['SLACK_SIGNING_SECRET'])
     if not verifier.is_valid_request(request.get_data(), request.headers):
         logger.warning("Invalid Slack request signature")
-        print("Invalid Slack request signature")
         return False
-    logger.info("Valid Slack request signature")
-    print("Valid Slack request signature")
+    logger.debug("Valid Slack request signature")
     return True
 
 def get_user_email(user_id):
-    """Get user email with TTL caching"""
-    logger.info(f"Fetching email for user ID: {user_id}")
-    print(f"Fetching email for user ID: {user_id}")
+    """Get user email through the bounded TTL cache"""
+    logger.debug("Fetching email for user ID: %s", user_id)
     if not isinstance(user_id, str) or not user_id.startswith('U'):
-        logger.warning(f"Invalid user ID format: {user_id}")
-        print(f"Invalid user ID format: {user_id}")
+        logger.warning("Invalid user ID format: %s", user_id)
         return None
     
-    # Check cache
-    cache_entry = user_email_cache.get(user_id)
-    if cache_entry:
-        email, timestamp = cache_entry
-        if datetime.now() - timestamp < timedelta(seconds=CACHE_TTL):
-            return email
-    
-    # Fetch from API
+    return user_email_cache.get(user_id)
+
+def _fetch_user_email(user_id):
+    """Fetch user email from the Slack API (cache loader)"""
     try:
         response = client.users_info(user=user_id)
-        logger.debug(f"Full Slack API response: {response}")
+        logger.debug("Full Slack API response: %s", response)
         email = response['user']['profile']['email'].lower()
-        print(f"Fetched email: {email}")
-        user_email_cache[user_id] = (email, datetime.now())
+        logger.debug("Fetched email: %s", email)
         return email
     except Exception as e:
-        logger.error(f"Error fetching user email: {str(e)}")
-        print(f"Error fetching user email: {str(e)}")
+        logger.error("Error fetching user email: %s", e)
         return None
 
+user_email_cache = LoadingCache(
+    _fetch_user_email,
+    maxsize=CACHE_MAXSIZE,
+    ttl=CACHE_TTL,
+    stale_ttl=CACHE_STALE_TTL,
+    name="user_email"
+)
+
+def get_user_email_cache_stats():
+    """Hit/miss counters for the user email cache"""
+    return user_email_cache.stats()
+
+metrics.register_cache(get_user_email_cache_stats)
 
 def is_user_allowed(user_id):
-    logger.info(f"Checking if user {user_id} is allowed")
-    print(f"Checking if user {user_id} is allowed")
+    logger.debug("Checking if user %s is allowed", user_id)
     
     user_email = get_user_email(user_id)
     if not user_email:
-        logger.warning(f"Could not determine email for user {user_id}")
-        print(f"Could not determine email for user {user_id}")
+        logger.warning("Could not determine email for user %s", user_id)
         return False
     
-    allowed_emails = [email.lower() for email in roles_config.get("allowed_users", [])]
-    is_allowed = user_email in allowed_emails
+    is_allowed = user_email in compiled_roles.allowed
     
-    logger.info(f"User {user_id} {'is' if is_allowed else 'is not'} allowed")
-    print(f"User {user_id} {'is' if is_allowed else 'is not'} allowed")
+    logger.debug("User %s %s allowed", user_id, 'is' if is_allowed else 'is not')
     return is_allowed
 
 def is_user_admin(user_id):
-    logger.info(f"Checking if user {user_id} is an admin")
-    print(f"Checking if user {user_id} is an admin")
+    logger.debug("Checking if user %s is an admin", user_id)
     
     user_email = get_user_email(user_id)
     if not user_email:
-        logger.warning(f"Could not determine email for user {user_id}")
-        print(f"Could not determine email for user {user_id}")
+        logger.warning("Could not determine email for user %s", user_id)
         return False
     
-    logger.info(f"User email resolved: {user_email}")
-    print(f"User email resolved: {user_email}")
-    logger.info(f"Admin emails list: {roles_config.get('admin_users', [])}")
-    
-    admin_emails = [email.lower() for email in roles_config.get("admin_users", [])]
-    is_admin = user_email in admin_emails
+    logger.debug("User email resolved: %s", user_email)
+    is_admin = user_email in compiled_roles.admins
     
-    logger.info(f"User {user_id} {'is' if is_admin else 'is not'} an admin")
+    logger.debug("User %s %s an admin", user_id, 'is' if is_admin else 'is not')
     return is_admin
 
 def slack_auth_required(f):
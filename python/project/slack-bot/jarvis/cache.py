@@ -0,0 +1,286 @@
+import os
+import re
+import json
+import logging
+import threading
+import time
+import uuid
+from cachetools import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CURSOR_PATTERN = re.compile(r"[0-9a-f]{16}")
+
+
+class _Call:
+    """In-flight call shared by every caller of SingleFlight.do for one key"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into a single execution"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn once per key; concurrent callers wait for and share its result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+class LoadingCache:
+    """Bounded TTL LRU cache with single-flight loads and stale-while-revalidate
+
+    Entries younger than ``ttl`` are served directly. Entries older than ``ttl``
+    but younger than ``ttl + stale_ttl`` are served as-is while one background
+    thread reloads them. Anything older (or missing) is loaded synchronously,
+    with concurrent misses for the same key sharing one loader call. A loader
+    returning None is treated as a failed load and is never cached.
+    """
+    def __init__(self, loader, maxsize=1024, ttl=3600, stale_ttl=0, name="cache"):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._loader = loader
+        self._entries = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, loaded_at = entry
+                age = now - loaded_at
+                if age < self.ttl:
+                    self.hits += 1
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
+                    return value
+            self.misses += 1
+
+        return self._flight.do(key, self._load, key)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "maxsize": self._entries.maxsize,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            }
+
+    def _load(self, key):
+        value = self._loader(key)
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (value, time.monotonic())
+        return value
+
+    def _refresh(self, key):
+        try:
+            self._flight.do(key, self._load, key)
+        except Exception as e:
+            logger.warning("Background refresh of %s[%s] failed: %s", self.name, key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+class ResultCache:
+    """Short-TTL read-through cache that reports the age of each hit
+
+    Loads go through a SingleFlight, so concurrent misses for one key share a
+    single loader call. A load that started before an invalidation is not
+    stored, which keeps a mutation from being masked by an in-flight read.
+    """
+    def __init__(self, maxsize=256, ttl=5, should_cache=None, name="result"):
+        self.name = name
+        self.ttl = ttl
+        self._should_cache = should_cache or (lambda value: value is not None)
+        self._entries = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, loader):
+        """Return (value, age_seconds); age is None when the value was just loaded"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, loaded_at = entry
+                if now - loaded_at < self.ttl:
+                    self.hits += 1
+                    return value, now - loaded_at
+                del self._entries[key]
+            self.misses += 1
+
+        return self._flight.do(key, self._load, key, loader), None
+
+    def invalidate(self, match):
+        """Drop every entry whose key satisfies match(key)"""
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._entries.keys() if match(k)]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "maxsize": self._entries.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _load(self, key, loader):
+        with self._lock:
+            generation = self._generation
+        value = loader()
+        if self._should_cache(value):
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = (value, time.monotonic())
+        return value
+
+
+class CursorStore:
+    """Bounded TTL store of JSON values looked up by an opaque cursor
+
+    Used for state that a later Slack interaction refers back to, such as the
+    pages of a long result. Each entry is a file in ``directory``, written to a
+    temporary name and os.replace()d in, so the interaction can land on any
+    worker process. A hit refreshes the file's mtime, so entries expire ``ttl``
+    seconds after they were last stored or read, and the least recently used
+    are removed once ``maxsize`` is exceeded. A lookup can miss and callers
+    must handle None.
+    """
+    def __init__(self, directory, maxsize=512, ttl=3600, name="cursor"):
+        self.name = name
+        self.directory = directory
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, cursor):
+        return os.path.join(self.directory, f"{cursor}.json")
+
+    def put(self, value):
+        cursor = uuid.uuid4().hex[:16]
+        path = self._path(cursor)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+        self._prune()
+        return cursor
+
+    def get(self, cursor):
+        value = None
+        # The cursor comes back from a button value, so only well-formed ones become paths
+        if CURSOR_PATTERN.fullmatch(cursor or ""):
+            try:
+                path = self._path(cursor)
+                if time.time() - os.stat(path).st_mtime < self.ttl:
+                    with open(path) as f:
+                        value = json.load(f)
+                    os.utime(path)
+            except (OSError, ValueError):
+                pass
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def _entries(self):
+        """(mtime, path) of stored entries, least recently used first"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+        return sorted(entries)
+
+    def _prune(self):
+        entries = self._entries()
+        cutoff = time.time() - self.ttl
+        excess = len(entries) - self.maxsize
+        for index, (mtime, path) in enumerate(entries):
+            if mtime >= cutoff and index >= excess:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # removed by another worker
+
+    def stats(self):
+        size = len(self._entries())
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": size,
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
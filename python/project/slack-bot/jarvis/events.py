@@ -0,0 +1,187 @@
+"""Digest of Kubernetes Warning events posted to a Slack channel.
+
+One watch on Warning events per configured namespace feeds an aggregator
+keyed by (namespace, reason, involved object). Repeats of an event only raise
+its count, and counts older than EVENT_WINDOW seconds fall out of the window.
+Every EVENT_DIGEST_INTERVAL seconds the top rows are posted as a single
+message, and only if something new arrived since the last digest, so a
+crash-looping pod never produces a message per event.
+
+Configuration:
+    EVENT_DIGEST_CHANNEL   channel ID to post to; the digest is off when unset
+    EVENT_NAMESPACES       comma-separated namespaces to watch (default "default")
+    EVENT_DIGEST_INTERVAL  seconds between digests (default 300)
+    EVENT_WINDOW           seconds of history a digest covers (default 900)
+    EVENT_DIGEST_ROWS      rows per digest (default 20)
+
+Runs in the elected leader only.
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from cachetools import TTLCache
+from kubernetes import watch
+from kubernetes.client.exceptions import ApiException
+from jarvis.kubectl import k8s_api
+from jarvis.slack_handler import send_slack_message
+
+logger = logging.getLogger(__name__)
+
+EVENT_DIGEST_CHANNEL = os.getenv("EVENT_DIGEST_CHANNEL", "")
+EVENT_NAMESPACES = [ns.strip() for ns in os.getenv("EVENT_NAMESPACES", "default").split(",") if ns.strip()]
+EVENT_DIGEST_INTERVAL = int(os.getenv("EVENT_DIGEST_INTERVAL", "300"))
+EVENT_WINDOW = int(os.getenv("EVENT_WINDOW", "900"))
+EVENT_DIGEST_ROWS = int(os.getenv("EVENT_DIGEST_ROWS", "20"))
+WATCH_TIMEOUT = 300
+# Last counts outlive the window: the API server keeps an event for an hour
+# after its last update (default --event-ttl), and an update arriving after its
+# uid was forgotten would count the event's whole history as new
+EVENT_SEEN_TTL = max(EVENT_WINDOW, 7200)
+
+
+def event_time(event):
+    """Wall-clock seconds of an event's latest occurrence"""
+    stamp = event.last_timestamp or event.event_time or event.metadata.creation_timestamp
+    return stamp.timestamp() if stamp else time.time()
+
+
+def event_count(event):
+    if event.series and event.series.count:
+        return event.series.count
+    return event.count or 1
+
+
+class EventDigest:
+    """Warning counts per (namespace, reason, object) over a sliding window"""
+    def __init__(self, window):
+        self.window = window
+        self._rows = {}
+        # Last count seen per event uid, so an updated event adds only its delta
+        self._seen = TTLCache(maxsize=20000, ttl=EVENT_SEEN_TTL)
+        self._lock = threading.Lock()
+        self.last_digest_at = time.time()
+
+    def record(self, event):
+        """Add one watched event; returns the number of new occurrences it carried"""
+        now = time.time()
+        if event_time(event) < now - self.window:
+            return 0
+        uid = event.metadata.uid
+        count = event_count(event)
+        obj = event.involved_object
+        key = (event.metadata.namespace, event.reason, f"{(obj.kind or '').lower()}/{obj.name}")
+        with self._lock:
+            delta = count - self._seen.get(uid, 0)
+            self._seen[uid] = count
+            if delta <= 0:
+                return 0
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = {"occurrences": deque(), "message": ""}
+            # Keyed by arrival, so a late-delivered event still counts as new in the next digest
+            row["occurrences"].append((now, delta))
+            row["message"] = event.message or ""
+        return delta
+
+    def _prune(self, now):
+        cutoff = now - self.window
+        for key in list(self._rows):
+            occurrences = self._rows[key]["occurrences"]
+            while occurrences and occurrences[0][0] < cutoff:
+                occurrences.popleft()
+            if not occurrences:
+                del self._rows[key]
+
+    def digest(self, now=None):
+        """Rows with activity since the last digest, busiest first, or [] if nothing is new
+
+        Each row is (namespace, reason, object, count in window, new since last digest, message).
+        """
+        now = now or time.time()
+        with self._lock:
+            self._prune(now)
+            since = self.last_digest_at
+            self.last_digest_at = now
+            rows = []
+            for (namespace, reason, obj), row in self._rows.items():
+                new = sum(n for t, n in row["occurrences"] if t > since)
+                if new:
+                    total = sum(n for _, n in row["occurrences"])
+                    rows.append((namespace, reason, obj, total, new, row["message"]))
+        rows.sort(key=lambda r: (-r[4], -r[3]))
+        return rows
+
+
+digest = EventDigest(EVENT_WINDOW)
+
+
+def format_digest(rows, limit=EVENT_DIGEST_ROWS):
+    new_total = sum(r[4] for r in rows)
+    lines = [f":rotating_light: *{new_total} Warning events* in the last "
+             f"{EVENT_DIGEST_INTERVAL // 60}m across {len(rows)} objects"]
+    for namespace, reason, obj, total, new, message in rows[:limit]:
+        lines.append(f"• `{reason}` {obj} ({namespace}) ×{new} new, {total} in {EVENT_WINDOW // 60}m: {message[:150]}")
+    if len(rows) > limit:
+        lines.append(f"_…and {len(rows) - limit} more objects_")
+    return "\n".join(lines)
+
+
+def watch_events(namespace):
+    """Feed one namespace's Warning events into the digest forever, resuming from the last resource version"""
+    resource_version = None
+    while True:
+        try:
+            if resource_version is None:
+                # Start from now; events already in the window are picked up from the list
+                initial = k8s_api.core_v1.list_namespaced_event(namespace, field_selector="type=Warning")
+                for event in initial.items:
+                    digest.record(event)
+                resource_version = initial.metadata.resource_version
+            stream = watch.Watch().stream(
+                k8s_api.core_v1.list_namespaced_event,
+                namespace,
+                field_selector="type=Warning",
+                resource_version=resource_version,
+                timeout_seconds=WATCH_TIMEOUT
+            )
+            for change in stream:
+                event = change["object"]
+                resource_version = event.metadata.resource_version
+                if change["type"] in ("ADDED", "MODIFIED"):
+                    digest.record(event)
+        except ApiException as e:
+            if e.status == 410:
+                logger.info("Event watch of %s expired, relisting", namespace)
+                resource_version = None
+                continue
+            logger.warning("Event watch of %s failed: %s", namespace, e)
+            time.sleep(5)
+        except Exception as e:
+            logger.warning("Event watch of %s failed: %s", namespace, e)
+            time.sleep(5)
+
+
+def post_digests():
+    while True:
+        time.sleep(EVENT_DIGEST_INTERVAL)
+        try:
+            rows = digest.digest()
+            if rows:
+                send_slack_message(EVENT_DIGEST_CHANNEL, format_digest(rows), is_channel_message=True)
+                logger.info("Posted event digest with %d rows", len(rows))
+        except Exception as e:
+            logger.error("Event digest failed: %s", e)
+
+
+def start_event_digest():
+    """Start the watch and the digest poster when EVENT_DIGEST_CHANNEL is set"""
+    if not EVENT_DIGEST_CHANNEL:
+        logger.info("EVENT_DIGEST_CHANNEL not set, event digest disabled")
+        return
+    # One namespaced watch each: the bot's RBAC is per namespace, not cluster-wide
+    for namespace in EVENT_NAMESPACES:
+        threading.Thread(target=watch_events, args=[namespace], daemon=True, name=f"event-watch-{namespace}").start()
+    threading.Thread(target=post_digests, daemon=True, name="event-digest").start()
+    logger.info("Event digest started for %s every %ss", ",".join(EVENT_NAMESPACES), EVENT_DIGEST_INTERVAL)
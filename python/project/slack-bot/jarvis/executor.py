@@ -0,0 +1,55 @@
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class CommandExecutor:
+    """Bounded thread pool that tracks queued and in-flight work"""
+    def __init__(self, max_workers, name="executor"):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn on the pool inside a copy of the caller's context"""
+        context = contextvars.copy_context()
+        with self._lock:
+            self.queued += 1
+
+        def run():
+            with self._lock:
+                self.queued -= 1
+                self.in_flight += 1
+            try:
+                return context.run(fn, *args, **kwargs)
+            except Exception:
+                logger.error("%s task %s failed", self.name, getattr(fn, "__name__", fn), exc_info=True)
+                raise
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+        future = self._pool.submit(run)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        # A task cancelled while queued never runs, so it leaves the queue here
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+            }
@@ -1,41 +1,257 @@
-from kubernetes.client import CoreV1Api, AppsV1Api, AutoscalingV1Api, CustomObjectsApi
-from kubernetes.config import load_incluster_config
+from kubernetes.client import CoreV1Api, AppsV1Api, AutoscalingV1Api, CustomObjectsApi, ApiClient
+from kubernetes.client.rest import RESTResponse
+from kubernetes.config import load_incluster_config, load_kube_config, ConfigException
 import logging
 import re
+import regex
 import datetime
 from datetime import timezone
 import threading
 import time
 from functools import lru_cache
+import os
 import subprocess
+import heapq
+import math
+import random
+from operator import itemgetter
+from collections import namedtuple, deque
+from concurrent.futures import wait
 from kubernetes.stream import stream
+from jarvis.executor import CommandExecutor
+from jarvis.snapshot import FLAG_STALE, SnapshotReader, read_sections, write_snapshot
+from jarvis import metrics, tracing
 
 logger = logging.getLogger(__name__)
 
-pod_search_cache = {"names": [], "lower": []}
-deployment_search_cache = {"names": [], "lower": []}
+pod_search_cache = {"names": [], "lower": [], "summaries": [], "refreshed_at": float("-inf")}
+deployment_search_cache = {"names": [], "lower": [], "rolling": 0, "refreshed_at": float("-inf")}
 cache_lock = threading.Lock()
 CACHE_REFRESH_INTERVAL = 15
 
+# The refresher speeds up while a rollout is in progress, slows down while
+# nothing changes, backs off on API errors and pauses when nobody is searching
+CACHE_REFRESH_MIN = int(os.getenv("CACHE_REFRESH_MIN", "5"))
+CACHE_REFRESH_MAX = int(os.getenv("CACHE_REFRESH_MAX", "120"))
+CACHE_BACKOFF_MAX = int(os.getenv("CACHE_BACKOFF_MAX", "300"))
+CACHE_UNCHANGED_STREAK = 3
+CACHE_IDLE_AFTER = int(os.getenv("CACHE_IDLE_AFTER", "900"))
+
+# Per-pod fields kept by the refresher so a deployment can be described without listing its pods
+PodSummary = namedtuple("PodSummary", "name labels phase ready restarts reason")
+
+# Deployment describe fans out metrics/events/HPA reads and renders whatever
+# arrived within the budget
+DESCRIBE_BUDGET = float(os.getenv("DESCRIBE_BUDGET", "2.5"))
+describe_executor = CommandExecutor(max_workers=int(os.getenv("DESCRIBE_WORKERS", "8")), name="describe")
+
+# Exec output limits; longer replies are paged by slack_handler
+EXEC_MAX_OUTPUT_LENGTH = 40000
+EXEC_MAX_LINES = 2000
+EXEC_TRUNCATE_MSG = "\n...[output truncated - showing last {} lines]...\n"
+EXEC_SHELL_OPERATORS = {'|', '&', '>', '<', ';', '&&', '||', '`', '$'}
+
+# Blocked command patterns
+EXEC_BLOCKED_COMMANDS = {
+    'psql': "Database access via psql is not permitted",
+    'mysql': "Database access via mysql is not permitted",
+    'mongo': "Database access via mongo is not permitted",
+    'redis-cli': "Database access via redis-cli is not permitted",
+    'nc ': "Netcat commands are not permitted",
+    'curl': "Direct curl commands are not permitted",
+    'wget': "Direct wget commands are not permitted",
+    'ssh ': "SSH commands are not permitted",
+}
+
+# Blocked sensitive patterns (case insensitive)
+EXEC_BLOCKED_PATTERNS = [
+    r'password\s*=\s*',
+    r'pwd\s*=\s*',
+    r'secret\s*=\s*',
+    r'passwd\s*',
+    r'export\s+\w*password\w*',
+]
+
+# Fan-out exec runs one command in every replica, each with its own deadline
+EXEC_POD_TIMEOUT = float(os.getenv("EXEC_POD_TIMEOUT", "15"))
+EXEC_MAX_PODS = int(os.getenv("EXEC_MAX_PODS", "50"))
+EXEC_GROUP_NAMES = 10
+EXEC_GROUP_OUTPUT = 2000
+exec_executor = CommandExecutor(max_workers=int(os.getenv("EXEC_WORKERS", "10")), name="exec")
+
+# Log search streams every replica at once; each stream is capped by time,
+# lines and bytes, and only matching lines are held in memory
+LOGS_SINCE = int(os.getenv("LOGS_SINCE", "900"))
+LOGS_TAIL_LINES = int(os.getenv("LOGS_TAIL_LINES", "20000"))
+LOGS_LIMIT_BYTES = int(os.getenv("LOGS_LIMIT_BYTES", str(8 * 1024 * 1024)))
+LOGS_MAX_LINES = int(os.getenv("LOGS_MAX_LINES", "500"))
+LOGS_LINE_LENGTH = 400
+# The pattern is user-supplied: each line is matched on its first LOGS_MATCH_LENGTH
+# characters, with the GIL released and a per-line timeout against backtracking
+LOGS_MATCH_LENGTH = 4096
+LOGS_MATCH_TIMEOUT = 0.1
+LOGS_BUDGET = float(os.getenv("LOGS_BUDGET", "10"))
+logs_executor = CommandExecutor(max_workers=int(os.getenv("LOGS_WORKERS", "16")), name="logs")
+
+# Resource names are refreshed by the leader worker only and shared with the
+# other workers through a memory-mapped snapshot file
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "/tmp/jarvis-resources.snap")
+snapshot_reader = SnapshotReader(SNAPSHOT_PATH)
+
+# A copy of the live snapshot kept on a volume that outlives the container;
+# the leader restores it at startup, flagged stale until its first refresh
+SNAPSHOT_PERSIST_PATH = os.getenv("SNAPSHOT_PERSIST_PATH", "")
+SNAPSHOT_PERSIST_INTERVAL = int(os.getenv("SNAPSHOT_PERSIST_INTERVAL", "300"))
+
+# Every worker touches this file (at most every few seconds) when it serves a
+# search; the leader's refresher reads its mtime to tell whether anyone is searching
+SEARCH_ACTIVITY_PATH = f"{SNAPSHOT_PATH}.searched"
+SEARCH_ACTIVITY_TOUCH = 5
+search_touched_at = float("-inf")
+
+# Searches answered from the snapshot/in-memory cache vs. falling through
+search_cache_stats = {"name": "search", "hits": 0, "misses": 0}
+search_stats_lock = threading.Lock()
+
+def _record_search(hit):
+    global search_touched_at
+    with search_stats_lock:
+        search_cache_stats["hits" if hit else "misses"] += 1
+        now = time.monotonic()
+        if now - search_touched_at < SEARCH_ACTIVITY_TOUCH:
+            return
+        search_touched_at = now
+    mark_search_activity()
+
+def mark_search_activity():
+    try:
+        with open(SEARCH_ACTIVITY_PATH, "a"):
+            os.utime(SEARCH_ACTIVITY_PATH)
+    except OSError as e:
+        logger.debug("Failed to mark search activity: %s", e)
+
+def last_search_age():
+    """Seconds since any worker last served a search, or None if none has"""
+    try:
+        return time.time() - os.stat(SEARCH_ACTIVITY_PATH).st_mtime
+    except FileNotFoundError:
+        return None
+
+def _search_stats():
+    with search_stats_lock:
+        lookups = search_cache_stats["hits"] + search_cache_stats["misses"]
+        return {**search_cache_stats, "hit_ratio": search_cache_stats["hits"] / lookups if lookups else 0.0}
+
+def _snapshot_age():
+    snapshot = snapshot_reader.current()
+    return time.time() - snapshot.created_at if snapshot else None
+
+metrics.register_cache(_search_stats)
+metrics.register_executor(describe_executor.stats)
+metrics.register_executor(logs_executor.stats)
+metrics.register_executor(exec_executor.stats)
+metrics.register_cache_age("resources", _snapshot_age)
+
+HTTP_VERBS = {"POST": "create", "PUT": "update", "PATCH": "patch", "DELETE": "delete"}
+
+def api_verb(method, resource_path, query_params=None):
+    """Kubernetes verb (get/list/watch/create/...) of a client call"""
+    if method != "GET":
+        return HTTP_VERBS.get(method, method.lower())
+    if any(k == "watch" and v for k, v in (query_params or [])):
+        return "watch"
+    return "get" if "{name}" in resource_path else "list"
+
+def api_resource(resource_path, path_params=None):
+    """Resource (e.g. "pods", "pods/log") addressed by a client call"""
+    segments = resource_path.strip("/").split("/")
+    if "{name}" in segments:
+        index = segments.index("{name}")
+        resource = segments[index - 1]
+        if index + 1 < len(segments):
+            resource = f"{resource}/{segments[index + 1]}"
+    else:
+        resource = segments[-1]
+    if resource.startswith("{plural}"):
+        resource = resource.replace("{plural}", (path_params or {}).get("plural", "custom"))
+    return resource
+
+def response_retries(response):
+    """Retries urllib3 made before this response (connection errors, retried statuses)"""
+    raw = response.urllib3_response if isinstance(response, RESTResponse) else response
+    retries = getattr(raw, "retries", None)
+    return len(retries.history) if retries is not None and retries.history else 0
+
+class InstrumentedApiClient(ApiClient):
+    """ApiClient that records every Kubernetes API call
+
+    Latency, response size, deserialize time and retries go to the
+    jarvis_kubernetes_api_* metrics. request() and deserialize() run on the
+    calling thread inside call_api(), so they report into a thread-local record.
+    """
+    _call = threading.local()
+
+    def call_api(self, resource_path, method, path_params=None, query_params=None, *args, **kwargs):
+        verb = api_verb(method, resource_path, query_params)
+        resource = api_resource(resource_path, path_params)
+        call = self._call.current = {"bytes": None, "deserialize_seconds": 0.0, "retries": 0}
+        failed = False
+        start = time.perf_counter()
+        with tracing.span(f"k8s.{verb} {resource}", **{"k8s.verb": verb, "k8s.resource": resource}):
+            try:
+                return super().call_api(resource_path, method, path_params, query_params, *args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                self._call.current = None
+                metrics.observe_k8s_call(
+                    verb, resource, time.perf_counter() - start, call["bytes"],
+                    call["deserialize_seconds"], call["retries"], failed=failed
+                )
+
+    def request(self, *args, **kwargs):
+        response = super().request(*args, **kwargs)
+        call = getattr(self._call, "current", None)
+        if call is not None:
+            # Streamed responses (_preload_content=False) are read by the caller, so their size is unknown
+            if isinstance(response, RESTResponse):
+                call["bytes"] = len(response.data or b"")
+            call["retries"] = response_retries(response)
+        return response
+
+    def deserialize(self, response, response_type):
+        start = time.perf_counter()
+        try:
+            return super().deserialize(response, response_type)
+        finally:
+            call = getattr(self._call, "current", None)
+            if call is not None:
+                call["deserialize_seconds"] += time.perf_counter() - start
+
 class KubernetesAPI:
     def __init__(self):
         try:
-            print("Initializing Kubernetes API client...")
-            load_incluster_config()
-            self.core_v1 = CoreV1Api()
-            self.apps_v1 = AppsV1Api()
-            self.autoscaling_v1 = AutoscalingV1Api()
-            self.custom_metrics = CustomObjectsApi()
-            print("Kubernetes API client initialized successfully")
+            logger.debug("Initializing Kubernetes API client...")
+            try:
+                load_incluster_config()
+            except ConfigException:
+                # Outside a cluster (local runs, benchmarks) use the kubeconfig
+                load_kube_config()
+            api_client = InstrumentedApiClient()
+            self.core_v1 = CoreV1Api(api_client)
+            self.apps_v1 = AppsV1Api(api_client)
+            self.autoscaling_v1 = AutoscalingV1Api(api_client)
+            self.custom_metrics = CustomObjectsApi(api_client)
+            self._exec_local = threading.local()
+            logger.info("Kubernetes API client initialized successfully")
         except Exception as e:
-            print(f"ERROR: Failed to initialize Kubernetes client: {str(e)}")
-            logger.error(f"Failed to initialize Kubernetes client: {str(e)}")
+            logger.error("Failed to initialize Kubernetes client: %s", e)
             raise
 
     def execute_command(self, command_parts):
         """Execute kubectl command safely using Kubernetes API"""
-        print(f"Executing command: {' '.join(command_parts)}")
-        logger.info(f"Executing command: {' '.join(command_parts)}")
+        logger.info("Executing command: %s", ' '.join(command_parts))
         try:
             # Remove kubectl prefix if present
             if command_parts and command_parts[0] == "kubectl":
@@ -43,13 +259,13 @@ class KubernetesAPI:
 
             # Handle rollout restart first
             if len(command_parts) >= 2 and command_parts[0] == "rollout" and command_parts[1] == "restart":
-                print("Handling rollout restart command")
+                logger.debug("Handling rollout restart command")
                 return self._handle_restart(command_parts[2:])
             
             # Validate command structure
             if len(command_parts) < 2:
                 error_msg = "Invalid command format"
-                print(f"ERROR: {error_msg}")
+                logger.error(error_msg)
                 raise ValueError(error_msg)
                 
             cmd_type = command_parts[0]
@@ -60,7 +276,7 @@ class KubernetesAPI:
                 resource_type, resource_name = full_resource.split("/", 1)
                 if not resource_name:
                     error_msg = "Missing resource name after '/'"
-                    print(f"ERROR: {error_msg}")
+                    logger.error(error_msg)
                     raise ValueError(error_msg)
             else:
                 resource_type = full_resource
@@ -72,29 +288,30 @@ class KubernetesAPI:
                 "describe": ["pod", "deployment"],
                 "rollout": ["restart"],
                 "scale": ["deployment"],
-                "exec": ["pod"]
+                "exec": ["pod", "deployment"],
+                "logs": ["deployment"]
             }
 
             # Validate command type
             if cmd_type not in allowed_commands:
                 error_msg = f"Unsupported command type: {cmd_type}"
-                print(f"ERROR: {error_msg}")
+                logger.error(error_msg)
                 raise ValueError(error_msg)
                 
             # Validate resource type
             if resource_type not in allowed_commands[cmd_type]:
                 error_msg = f"Unsupported resource type for {cmd_type}: {resource_type}. Allowed: {allowed_commands[cmd_type]}"
-                print(f"ERROR: {error_msg}")
+                logger.error(error_msg)
                 raise ValueError(error_msg)
 
             # Validate resource name format
             if resource_name and not re.match(r'^[a-zA-Z0-9-]+$', resource_name):
                 error_msg = f"Invalid resource name: {resource_name}"
-                print(f"ERROR: {error_msg}")
+                logger.error(error_msg)
                 raise ValueError(error_msg)
                 
             # Execute command
-            print(f"Executing {cmd_type} command for {resource_type}/{resource_name if resource_name else ''}")
+            logger.debug("Executing %s command for %s/%s", cmd_type, resource_type, resource_name if resource_name else '')
             if cmd_type == "get":
                 return self._handle_get(full_resource, command_parts[2:])
             elif cmd_type == "scale":
@@ -108,24 +325,24 @@ class KubernetesAPI:
                 except ValueError:
                     exec_args = command_parts[2:]
                 return self._handle_exec(resource_type, resource_name, exec_args)
+            elif cmd_type == "logs":
+                return self._handle_logs(resource_name, command_parts[2:])
                 
         except Exception as e:
-            print(f"ERROR in execute_command: {str(e)}")
-            logger.error(f"Command failed: {str(e)}")
+            logger.error("Command failed: %s", e)
             return f"Error: {str(e)}"
 
     def _handle_restart(self, args):
         """Handle rollout restart deployment command"""
-        print("Handling rollout restart command")
-        logger.info("Handling rollout restart command")
+        logger.debug("Handling rollout restart command")
         if not args or not args[0].startswith("deployment/"):
             error_msg = "Restart command requires deployment name"
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
             
         deploy_name = args[0].split("/")[1]
         namespace = "default"
-        print(f"Restarting deployment: {deploy_name} in namespace: {namespace}")
+        logger.info("Restarting deployment: %s in namespace: %s", deploy_name, namespace)
         
         try:
             self.apps_v1.patch_namespaced_deployment(
@@ -135,15 +352,15 @@ class KubernetesAPI:
                     "kubectl.kubernetes.io/restartedAt": datetime.datetime.now().isoformat()
                 }}}}}
             )
-            print(f"Successfully restarted deployment/{deploy_name}")
+            logger.info("Successfully restarted deployment/%s", deploy_name)
             return f"Successfully restarted deployment/{deploy_name} in {namespace}"
         except Exception as e:
             error_msg = f"Failed to restart deployment: {str(e)}"
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
 
     def _handle_get(self, resource, args):
-        print(f"Handling get command for resource: {resource}")
+        logger.debug("Handling get command for resource: %s", resource)
         logger.info("Handling get command")
         namespace = "default"
         field_selector = None
@@ -155,16 +372,16 @@ class KubernetesAPI:
 
         if "/" in resource:
             error_msg = "Use 'describe' command for detailed resource information"
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
         else:
             if resource == "pods":
-                print(f"Fetching pods in namespace: {namespace}")
+                logger.debug("Fetching pods in namespace: %s", namespace)
                 pods = self.core_v1.list_namespaced_pod(
                     namespace=namespace,
                     field_selector=field_selector if field_selector else "status.phase=Running"
                 )
-                print(f"Found {len(pods.items)} pods")
+                logger.debug("Found %s pods", len(pods.items))
                 pod_list = []
                 for pod in pods.items:
                     name = pod.metadata.name
@@ -182,27 +399,27 @@ class KubernetesAPI:
                 return "\n".join(pod_list)
 
             elif resource == "deployments":
-                print(f"Fetching deployments in namespace: {namespace}")
+                logger.debug("Fetching deployments in namespace: %s", namespace)
                 deployments = self.apps_v1.list_namespaced_deployment(
                     namespace=namespace,
                     field_selector=field_selector
                 )
-                print(f"Found {len(deployments.items)} deployments")
+                logger.debug("Found %s deployments", len(deployments.items))
                 return "\n".join(deploy.metadata.name for deploy in deployments.items)
 
             elif resource == "namespaces":
-                print("Fetching namespaces")
+                logger.debug("Fetching namespaces")
                 namespaces = self.core_v1.list_namespace(field_selector=field_selector)
-                print(f"Found {len(namespaces.items)} namespaces")
+                logger.debug("Found %s namespaces", len(namespaces.items))
                 return "\n".join(ns.metadata.name for ns in namespaces.items)
 
             else:
                 error_msg = f"Unsupported resource: {resource}"
-                print(f"ERROR: {error_msg}")
+                logger.error(error_msg)
                 raise ValueError(error_msg)
 
     def _handle_scale(self, resource_type, resource_name, args):
-        print(f"Handling scale command for {resource_type}/{resource_name}")
+        logger.debug("Handling scale command for %s/%s", resource_type, resource_name)
         logger.info("Handling scale command")
         namespace = "default"
 
@@ -211,11 +428,11 @@ class KubernetesAPI:
         
         if resource_type != "deployment":
             error_msg = "Scale is only supported for deployments."
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
         if not resource_name:
             error_msg = "Deployment name required for scaling."
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
 
         # Get replica count
@@ -228,194 +445,184 @@ class KubernetesAPI:
 
         if replica_count is None:
             error_msg = "Replica count not specified or invalid."
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
 
-        print(f"Attempting to scale {resource_name} to {replica_count} replicas")
+        logger.debug("Attempting to scale %s to %s replicas", resource_name, replica_count)
 
         # Check HPA constraints if exists
         try:
-            print(f"Checking HPA constraints for {resource_name}")
+            logger.debug("Checking HPA constraints for %s", resource_name)
             hpa = self.autoscaling_v1.read_namespaced_horizontal_pod_autoscaler(
                 name=resource_name,
                 namespace=namespace
             )
             if replica_count > hpa.spec.max_replicas:
                 error_msg = f"Cannot exceed HPA max replicas ({hpa.spec.max_replicas})"
-                print(f"ERROR: {error_msg}")
+                logger.error(error_msg)
                 raise ValueError(error_msg)
             if replica_count < hpa.spec.min_replicas:
                 error_msg = f"Cannot go below HPA min replicas ({hpa.spec.min_replicas})"
-                print(f"ERROR: {error_msg}")
+                logger.error(error_msg)
                 raise ValueError(error_msg)
         except Exception as e:
             if "Not Found" not in str(e):
                 error_msg = f"HPA verification failed: {str(e)}"
-                print(f"ERROR: {error_msg}")
+                logger.error(error_msg)
                 raise ValueError(error_msg)
 
         # Execute scaling
         try:
-            print(f"Executing scale operation for {resource_name} to {replica_count} replicas")
+            logger.debug("Executing scale operation for %s to %s replicas", resource_name, replica_count)
             self.apps_v1.patch_namespaced_deployment_scale(
                 name=resource_name,
                 namespace=namespace,
                 body={"spec": {"replicas": replica_count}}
             )
-            print(f"Successfully scaled {resource_name} to {replica_count} replicas")
+            logger.info("Successfully scaled %s to %s replicas", resource_name, replica_count)
             return f"✅ Scaled deployment `{resource_name}` to {replica_count} replicas in `{namespace}`"
         except Exception as e:
             error_msg = f"Failed to scale deployment: {str(e)}"
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
 
     def _handle_exec(self, resource_type, resource_name, args):
-        """Handle exec command in a pod using Kubernetes Python client"""
-        print(f"Handling exec command for {resource_type}/{resource_name}")
-        logger.info(f"Handling exec command for {resource_name} with args: {args}")
-        
-        # Constants for output management
-        MAX_OUTPUT_LENGTH = 2000  # Keep under Slack's 4000 character limit
-        MAX_LINES = 100           # Maximum lines to return
-        TRUNCATE_MSG = "\n...[output truncated - showing last {} lines]...\n"
-        SHELL_OPERATORS = {'|', '&', '>', '<', ';', '&&', '||', '`', '$'}
-
-        # Blocked command patterns
-        BLOCKED_COMMANDS = {
-            'psql': "Database access via psql is not permitted",
-            'mysql': "Database access via mysql is not permitted",
-            'mongo': "Database access via mongo is not permitted",
-            'redis-cli': "Database access via redis-cli is not permitted",
-            'nc ': "Netcat commands are not permitted",
-            'curl': "Direct curl commands are not permitted",
-            'wget': "Direct wget commands are not permitted",
-            'ssh ': "SSH commands are not permitted",
-        }
-        
-        # Blocked sensitive patterns (case insensitive)
-        BLOCKED_PATTERNS = [
-            r'password\s*=\s*',
-            r'pwd\s*=\s*',
-            r'secret\s*=\s*',
-            r'passwd\s*',
-            r'export\s+\w*password\w*',
-        ]
-        
-        # Validation
-        if resource_type != "pod":
-            error_msg = "Exec is only supported for pods."
-            logger.error(error_msg)
-            raise ValueError(error_msg)
+        """Handle exec in one pod, or in every pod of a deployment"""
+        logger.info("Handling exec command for %s/%s with args: %s", resource_type, resource_name, args)
         if not resource_name:
-            error_msg = "Pod name required for exec."
-            logger.error(error_msg)
-            raise ValueError(error_msg)
-        if not args:
-            error_msg = "No command provided to execute in the pod."
+            error_msg = f"{resource_type.capitalize()} name required for exec."
             logger.error(error_msg)
             raise ValueError(error_msg)
+        command_to_exec = vet_exec_command(args)
 
-        # Prepare the command strings
-        original_command_str = ' '.join(args)
-        check_command_str = original_command_str.lower()
+        if resource_type == "pod":
+            try:
+                return self._run_exec(resource_name, command_to_exec) or "Command executed successfully (no output)"
+            except Exception as e:
+                error_msg = f"Exec command failed: {str(e)}"
+                logger.error(error_msg)
+                raise ValueError(error_msg)
+        return self._fan_out_exec(resource_name, command_to_exec, ' '.join(args))
 
-        # Security validation
-        # 1. Check blocked commands
-        for cmd, msg in BLOCKED_COMMANDS.items():
-            if check_command_str.startswith(cmd.lower()):
-                logger.error(f"Blocked command attempt: {original_command_str}")
-                raise ValueError(f"Security violation: {msg}")
-        
-        # 2. Check blocked patterns
-        for pattern in BLOCKED_PATTERNS:
-            if re.search(pattern, check_command_str, re.IGNORECASE):
-                logger.error(f"Blocked sensitive pattern in: {original_command_str}")
-                raise ValueError("Security violation: Sensitive pattern detected")
-
-        # Determine if shell execution is needed
-        needs_shell = any(op in original_command_str for op in SHELL_OPERATORS)
-        
-        if needs_shell:
-            command_to_exec = ["sh", "-c", original_command_str]
-            logger.info(f"Executing as shell command: {original_command_str}")
-        else:
-            command_to_exec = args
-            logger.info(f"Executing direct command: {original_command_str}")
+    def _exec_api(self):
+        """CoreV1Api for pod exec on the calling thread
 
-        try:
-            # Execute command in pod
-            resp = stream(
-                self.core_v1.connect_get_namespaced_pod_exec,
-                name=resource_name,
-                namespace="default",
-                command=command_to_exec,
-                stderr=True,
-                stdin=False,
-                stdout=True,
-                tty=False,
-                _preload_content=False
-            )
+        stream() swaps its client's request() for a websocket call while it runs,
+        so an exec must never share a client with another exec or a REST call.
+        """
+        api = getattr(self._exec_local, "core_v1", None)
+        if api is None:
+            api = self._exec_local.core_v1 = CoreV1Api(InstrumentedApiClient())
+        return api
 
-            # Process output
-            output_buffer = []
-            line_count = 0
-            
+    def _run_exec(self, pod_name, command_to_exec, timeout=None, namespace="default"):
+        """Run a vetted command in one pod and return its trimmed output
+
+        ``timeout`` counts from when the command starts, not from when it was queued.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        resp = stream(
+            self._exec_api().connect_get_namespaced_pod_exec,
+            name=pod_name,
+            namespace=namespace,
+            command=command_to_exec,
+            stderr=True,
+            stdin=False,
+            stdout=True,
+            tty=False,
+            _preload_content=False
+        )
+
+        # Process output
+        output_buffer = []
+        line_count = 0
+        try:
             while resp.is_open():
                 resp.update(timeout=1)
-                
+
                 # Capture stdout
                 if resp.peek_stdout():
                     line = resp.read_stdout()
                     output_buffer.append(line)
                     line_count += 1
-                    
+
                 # Capture stderr
                 if resp.peek_stderr():
                     err_line = resp.read_stderr()
                     output_buffer.append(f"Error: {err_line}")
                     line_count += 1
-                
+
                 # Manage buffer size
-                if line_count > MAX_LINES * 1.5:  # 1.5x buffer before trimming
-                    keep_lines = MAX_LINES // 2
+                if line_count > EXEC_MAX_LINES * 1.5:  # 1.5x buffer before trimming
+                    keep_lines = EXEC_MAX_LINES // 2
                     output_buffer = output_buffer[-keep_lines:]
                     line_count = keep_lines
 
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError("timed out")
+        finally:
             resp.close()
 
-            # Prepare final output
-            full_output = ''.join(output_buffer).strip()
-            
-            # Truncate if needed (keeping the end which is usually most relevant)
-            if len(full_output) > MAX_OUTPUT_LENGTH:
-                logger.info(f"Truncating long output ({len(full_output)} chars)")
-                keep_chars = MAX_OUTPUT_LENGTH - len(TRUNCATE_MSG)
-                full_output = TRUNCATE_MSG.format(MAX_LINES//2) + full_output[-keep_chars:]
-            
-            logger.info(f"Command execution completed successfully")
-            return full_output or "Command executed successfully (no output)"
+        # Prepare final output
+        full_output = ''.join(output_buffer).strip()
 
-        except Exception as e:
-            error_msg = f"Exec command failed: {str(e)}"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
+        # Truncate if needed (keeping the end which is usually most relevant)
+        if len(full_output) > EXEC_MAX_OUTPUT_LENGTH:
+            logger.info("Truncating long output (%s chars)", len(full_output))
+            keep_chars = EXEC_MAX_OUTPUT_LENGTH - len(EXEC_TRUNCATE_MSG)
+            full_output = EXEC_TRUNCATE_MSG.format(EXEC_MAX_LINES // 2) + full_output[-keep_chars:]
+
+        logger.debug("Exec in %s completed", pod_name)
+        return full_output
+
+    def _fan_out_exec(self, deployment_name, command_to_exec, command_str):
+        """Run one command in every running pod of a deployment in parallel and group identical outputs"""
+        namespace = "default"
+        deployment = self.apps_v1.read_namespaced_deployment(deployment_name, namespace)
+        pods = self._deployment_pods(deployment, namespace, request_timeout(EXEC_POD_TIMEOUT))
+        target = f"deployment/{deployment_name}"
+
+        pods = [p for p in pods if p.phase == "Running"]
+        if not pods:
+            raise ValueError(f"No running pods for {target}")
+        if len(pods) > EXEC_MAX_PODS:
+            raise ValueError(f"{target} selects {len(pods)} pods; exec fan-out is limited to {EXEC_MAX_PODS}")
+        logger.info("Fanning out exec to %d pods of %s: %s", len(pods), target, command_str)
+
+        futures = {p.name: exec_executor.submit(self._run_exec, p.name, command_to_exec, EXEC_POD_TIMEOUT)
+                   for p in pods}
+        # Pods beyond the pool size wait for a worker, then get their full EXEC_POD_TIMEOUT
+        batches = math.ceil(len(pods) / exec_executor.max_workers)
+        _, pending = wait(futures.values(), timeout=EXEC_POD_TIMEOUT * batches + 5)
+        for future in pending:
+            future.cancel()
+
+        groups = {}
+        for pod_name, future in futures.items():
+            if future.cancelled() or not future.done() or isinstance(future.exception(), TimeoutError):
+                result = "[timed out]"
+            elif future.exception() is not None:
+                result = f"[failed: {future.exception()}]"
+            else:
+                result = future.result() or "[no output]"
+            groups.setdefault(result, []).append(pod_name)
+        return format_exec_groups(target, command_str, groups, f"{deployment_name}-")
 
     def _handle_describe(self, resource, args):
-        print(f"Handling describe command for resource: {resource}")
-        logger.info("Describe resource:", resource)
+        logger.debug("Handling describe command for resource: %s", resource)
         namespace = "default"
         
         if "/" not in resource:
             error_msg = "Invalid resource format. Use: describe pod/<name> or describe deployment/<name>"
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
 
         resource_type, resource_name = resource.split("/", 1)
-        print(f"Describing {resource_type}: {resource_name}")
+        logger.debug("Describing %s: %s", resource_type, resource_name)
         
         if resource_type == "pod":
             try:
-                print(f"Fetching pod details for {resource_name}")
+                logger.debug("Fetching pod details for %s", resource_name)
                 pod = self.core_v1.read_namespaced_pod(resource_name, namespace)
                 pod_labels = pod.metadata.labels or {}
 
@@ -425,17 +632,16 @@ class KubernetesAPI:
                     owners = pod.metadata.owner_references or []
                     for owner in owners:
                         if owner.kind == "ReplicaSet":
-                            print(f"Found owner ReplicaSet: {owner.name}")
+                            logger.debug("Found owner ReplicaSet: %s", owner.name)
                             rs = self.apps_v1.read_namespaced_replica_set(owner.name, namespace)
                             rs_owners = rs.metadata.owner_references or []
                             for rs_owner in rs_owners:
                                 if rs_owner.kind == "Deployment":
                                     deployment_name = rs_owner.name
-                                    print(f"Found owner Deployment: {deployment_name}")
+                                    logger.debug("Found owner Deployment: %s", deployment_name)
                                     break
                 except Exception as e:
-                    print(f"WARNING: Could not determine deployment for pod {resource_name}: {str(e)}")
-                    logger.warning(f"Could not determine deployment for pod {resource_name}: {str(e)}")
+                    logger.warning("Could not determine deployment for pod %s: %s", resource_name, e)
 
                 # Get pod metrics if metrics server is available
                 metrics_info = "\nMetrics: Not available"        
@@ -449,7 +655,7 @@ class KubernetesAPI:
                             metrics_info += f"\n  {container.name}: CPU={cpu}, Memory={memory}"
                 except Exception as e:
                     metrics_info = "\nMetrics: Error fetching - ensure metrics-server is installed"
-                    print(f"Metrics error: {str(e)}")
+                    logger.warning("Metrics error: %s", e)
 
                 # HPA details if deployment found
                 hpa_info = "Not Available"
@@ -457,7 +663,7 @@ class KubernetesAPI:
                 replicas_info = ""
                 if deployment_name:
                     try:
-                        print(f"Fetching HPA details for deployment {deployment_name}")
+                        logger.debug("Fetching HPA details for deployment %s", deployment_name)
                         try:
                             hpas = self.autoscaling_v1.list_namespaced_horizontal_pod_autoscaler(namespace)
                             for hpa in hpas.items:
@@ -478,14 +684,13 @@ class KubernetesAPI:
                                     if current_metrics:
                                         hpa_metrics = f"\nCurrent Utilization: {', '.join(current_metrics)}"
                                     
-                                    print(f"Found HPA for deployment: {hpa_info}")
+                                    logger.debug("Found HPA for deployment: %s", hpa_info)
                                     break
                         except Exception as e:
-                            print(f"WARNING: HPA access failed: {str(e)}")
-                            logger.error(f"HPA access failed: {str(e)}")
+                            logger.warning("HPA access failed: %s", e)
                             hpa_info = "HPA details unavailable (missing permissions)"
 
-                        print(f"Fetching deployment details for {deployment_name}")
+                        logger.debug("Fetching deployment details for %s", deployment_name)
                         deployment = self.apps_v1.read_namespaced_deployment(deployment_name, namespace)
                         replicas_info = (
                             f"\nDeployment: {deployment_name}\n"
@@ -493,8 +698,7 @@ class KubernetesAPI:
                             f"Desired Replicas: {deployment.spec.replicas}"
                         )
                     except Exception as e:
-                        print(f"WARNING: Failed to fetch HPA/deployment for {deployment_name}: {str(e)}")
-                        logger.warning(f"Failed to fetch HPA/deployment for {deployment_name}: {str(e)}")
+                        logger.warning("Failed to fetch HPA/deployment for %s: %s", deployment_name, e)
 
                 # Get pod events
                 events_info = "\nEvents: None"
@@ -510,7 +714,7 @@ class KubernetesAPI:
                     else:
                         events_info = "\nEvents: No recent events found"
                 except Exception as e:
-                    print(f"WARNING: Could not fetch pod events: {str(e)}")
+                    logger.warning("Could not fetch pod events: %s", e)
 
                 # Final pod details
                 details = f"""```
@@ -538,156 +742,658 @@ HPA: {hpa_info}{hpa_metrics}
 -- Activity --
 {events_info}
 ```"""
-                print("Successfully generated pod description")
+                logger.debug("Successfully generated pod description")
                 return details
             
             except Exception as e:
                 error_msg = f"Failed to describe pod: {str(e)}"
-                print(f"ERROR: {error_msg}")
+                logger.error(error_msg)
                 raise ValueError(error_msg)
         
+        elif resource_type == "deployment":
+            try:
+                return self._describe_deployment(resource_name, namespace)
+            except Exception as e:
+                error_msg = f"Failed to describe deployment: {str(e)}"
+                logger.error(error_msg)
+                raise ValueError(error_msg)
+
         else:
             error_msg = f"Unsupported resource type for describe: {resource_type}"
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
 
+    def _describe_deployment(self, deployment_name, namespace):
+        """Rollout, HPA and a per-replica table, with the reads fanned out under DESCRIBE_BUDGET"""
+        deadline = time.monotonic() + DESCRIBE_BUDGET
+        deployment = self.apps_v1.read_namespaced_deployment(deployment_name, namespace)
+        label_selector = selector_string(deployment.spec.selector.match_labels)
+        pods = self._deployment_pods(deployment, namespace, request_timeout(DESCRIBE_BUDGET))
+
+        remaining = request_timeout(max(deadline - time.monotonic(), 0.1))
+        metrics_future = describe_executor.submit(self._pod_usage, namespace, label_selector, remaining)
+        hpa_future = describe_executor.submit(self._find_hpa, namespace, deployment_name, remaining)
+        event_futures = {
+            p.name: describe_executor.submit(self._last_pod_event, namespace, p.name, remaining)
+            for p in pods
+        }
+        futures = [metrics_future, hpa_future, *event_futures.values()]
+        done, pending = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+        if pending:
+            logger.warning("describe deployment/%s: %d reads missed the %.1fs budget",
+                           deployment_name, len(pending), DESCRIBE_BUDGET)
+            # Reads still queued are dropped; running ones end at their own request timeout
+            for future in pending:
+                future.cancel()
+
+        def result(future, default):
+            if future not in done or future.exception() is not None:
+                return default
+            return future.result()
+
+        usage = result(metrics_future, None)
+        hpa = result(hpa_future, None)
+        last_events = {name: result(f, "n/a") for name, f in event_futures.items()}
+
+        rows = [("POD", "STATUS", "READY", "RESTARTS", "CPU", "MEMORY", "LAST EVENT")]
+        for p in pods:
+            cpu, memory = (usage or {}).get(p.name, ("n/a", "n/a"))
+            rows.append((
+                p.name, p.reason or p.phase, str(p.ready), str(p.restarts),
+                cpu, memory, last_events[p.name] or "-"
+            ))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]) - 1)]
+        table = "\n".join(
+            "  ".join(cell.ljust(width) for cell, width in zip(row, widths)) + "  " + row[-1]
+            for row in rows
+        )
+
+        status = deployment.status
+        strategy = deployment.spec.strategy
+        strategy_info = strategy.type if strategy else "Unknown"
+        if strategy and strategy.rolling_update:
+            strategy_info += (f" (maxSurge {strategy.rolling_update.max_surge}, "
+                              f"maxUnavailable {strategy.rolling_update.max_unavailable})")
+        if hpa:
+            hpa_info = (
+                f"min {hpa.spec.min_replicas}, max {hpa.spec.max_replicas}, "
+                f"current {hpa.status.current_replicas}, desired {hpa.status.desired_replicas}, "
+                f"CPU {hpa.status.current_cpu_utilization_percentage or 'n/a'}%"
+                f" / target {hpa.spec.target_cpu_utilization_percentage}%"
+            )
+        else:
+            hpa_info = "None" if hpa_future in done else "n/a (timed out)"
+        if usage is None:
+            table += "\n\nMetrics: " + ("not available" if metrics_future in done else "timed out")
+
+        return f"""```
+Deployment: {deployment.metadata.name}
+Replicas: desired {deployment.spec.replicas} | updated {status.updated_replicas or 0} | ready {status.ready_replicas or 0} | available {status.available_replicas or 0}
+Rollout: {rollout_state(deployment)}
+Strategy: {strategy_info}
+Image: {[c.image for c in deployment.spec.template.spec.containers]}
+HPA: {hpa_info}
+
+{table}
+```"""
+
+    def _handle_logs(self, deployment_name, args):
+        """Search the recent logs of every replica of a deployment
+
+        ``args`` are ``--since=<seconds>`` and, after ``--``, the pattern.
+        Replicas are streamed concurrently and filtered line by line, keeping
+        at most LOGS_MAX_LINES matches per pod; the per-pod matches are then
+        merged by timestamp and the newest LOGS_MAX_LINES returned.
+        """
+        namespace = "default"
+        since = LOGS_SINCE
+        pattern = None
+        if "--" in args:
+            dash_index = args.index("--")
+            pattern = " ".join(args[dash_index + 1:]) or None
+            args = args[:dash_index]
+        for arg in args:
+            if not arg.startswith("--since="):
+                raise ValueError(f"Unsupported logs option: {arg}")
+            since = int(arg.split("=", 1)[1])
+        if not 0 < since <= 86400:
+            raise ValueError("--since must be between 1 and 86400 seconds")
+        if pattern and len(pattern) > 200:
+            raise ValueError("Pattern is limited to 200 characters")
+        try:
+            matcher = regex.compile(pattern) if pattern else None
+        except regex.error as e:
+            raise ValueError(f"Invalid pattern: {e}")
+
+        deployment = self.apps_v1.read_namespaced_deployment(deployment_name, namespace)
+        template = deployment.spec.template
+        container = ((template.metadata.annotations or {}).get("kubectl.kubernetes.io/default-container")
+                     or template.spec.containers[0].name)
+        pods = [p for p in self._deployment_pods(deployment, namespace, request_timeout(LOGS_BUDGET))
+                if p.phase != "Pending"]
+        logger.info("Searching logs of %d pods of %s for %r over %ss", len(pods), deployment_name, pattern, since)
+
+        deadline = time.monotonic() + LOGS_BUDGET
+        futures = {
+            p.name: logs_executor.submit(self._scan_pod_log, namespace, p.name, container, since, matcher, deadline)
+            for p in pods
+        }
+        wait(futures.values(), timeout=LOGS_BUDGET + 5)
+
+        streams, notes = [], []
+        for pod_name, future in futures.items():
+            if not future.done():
+                notes.append(f"{pod_name}: timed out")
+            elif future.exception() is not None:
+                notes.append(f"{pod_name}: {future.exception()}")
+            else:
+                matches, note = future.result()
+                streams.append(matches)
+                if note:
+                    notes.append(f"{pod_name}: {note}")
+
+        merged = deque(heapq.merge(*streams, key=itemgetter(0)), maxlen=LOGS_MAX_LINES)
+        prefix = f"{deployment_name}-"
+        lines = [
+            f"{ts[11:23]} {pod_name.removeprefix(prefix)} | {text[:LOGS_LINE_LENGTH]}"
+            for ts, pod_name, text in merged
+        ]
+        header = f"{len(merged)} matching lines from {len(pods)} pods, last {since}s"
+        if pattern:
+            header += f", pattern /{pattern}/"
+        if len(merged) == LOGS_MAX_LINES:
+            header += f" (newest {LOGS_MAX_LINES} shown)"
+        return "\n".join([header, *lines, *notes])
+
+    def _scan_pod_log(self, namespace, pod_name, container, since, matcher, deadline):
+        """Matching (timestamp_key, pod, text) lines of one pod's log, newest LOGS_MAX_LINES kept"""
+        response = self.core_v1.read_namespaced_pod_log(
+            pod_name, namespace,
+            container=container,
+            since_seconds=since,
+            tail_lines=LOGS_TAIL_LINES,
+            limit_bytes=LOGS_LIMIT_BYTES,
+            timestamps=True,
+            _preload_content=False,
+            _request_timeout=(5, LOGS_BUDGET)
+        )
+        matches = deque(maxlen=LOGS_MAX_LINES)
+        scanned = 0
+        note = None
+        try:
+            for raw in iter_lines(response):
+                scanned += len(raw) + 1
+                ts, _, text = raw.decode("utf-8", "replace").partition(" ")
+                try:
+                    matched = matcher is None or matcher.search(
+                        text[:LOGS_MATCH_LENGTH], timeout=LOGS_MATCH_TIMEOUT, concurrent=True
+                    )
+                except TimeoutError:
+                    note = f"pattern too slow, stopped after {scanned} bytes"
+                    break
+                if matched:
+                    matches.append((timestamp_key(ts), pod_name, text))
+                if time.monotonic() > deadline:
+                    note = f"stopped after {scanned} bytes at the time budget"
+                    break
+            else:
+                if scanned >= LOGS_LIMIT_BYTES:
+                    note = f"only the first {LOGS_LIMIT_BYTES} bytes searched"
+        finally:
+            response.release_conn()
+        return list(matches), note
+
+    def _deployment_pods(self, deployment, namespace, timeout):
+        """Pods selected by a deployment, from the refresher's cache when it is fresh"""
+        match_labels = deployment.spec.selector.match_labels or {}
+        pods = cached_pod_summaries(match_labels)
+        if pods is None:
+            logger.debug("Pod cache cold, listing pods of %s", deployment.metadata.name)
+            pods = [summarize_pod(p) for p in self.core_v1.list_namespaced_pod(
+                namespace, label_selector=selector_string(match_labels), _request_timeout=timeout
+            ).items]
+        return sorted(pods, key=lambda p: p.name)
+
+    def _pod_usage(self, namespace, label_selector, timeout):
+        """{pod: (cpu, memory)} from metrics-server in one list call"""
+        pod_metrics = self.custom_metrics.list_namespaced_custom_object(
+            "metrics.k8s.io", "v1beta1", namespace, "pods",
+            label_selector=label_selector, _request_timeout=timeout
+        )
+        usage = {}
+        for item in pod_metrics.get("items", []):
+            containers = item.get("containers", [])
+            cpu = "+".join(c["usage"].get("cpu", "?") for c in containers)
+            memory = "+".join(c["usage"].get("memory", "?") for c in containers)
+            usage[item["metadata"]["name"]] = (cpu, memory)
+        return usage
+
+    def _find_hpa(self, namespace, deployment_name, timeout):
+        hpas = self.autoscaling_v1.list_namespaced_horizontal_pod_autoscaler(namespace, _request_timeout=timeout)
+        for hpa in hpas.items:
+            if hpa.spec.scale_target_ref.kind == "Deployment" and hpa.spec.scale_target_ref.name == deployment_name:
+                return hpa
+        return None
+
+    def _last_pod_event(self, namespace, pod_name, timeout):
+        events = self.core_v1.list_namespaced_event(
+            namespace,
+            field_selector=f"involvedObject.name={pod_name},involvedObject.kind=Pod",
+            _request_timeout=timeout
+        ).items
+        if not events:
+            return None
+        last = max(events, key=lambda e: e.last_timestamp or e.event_time or e.metadata.creation_timestamp)
+        return f"{last.type}/{last.reason}: {(last.message or '')[:60]}"
+
 # Initialize singleton instance
-print("Initializing Kubernetes API instance...")
+logger.debug("Initializing Kubernetes API instance...")
 k8s_api = KubernetesAPI()
-print("Kubernetes API instance ready")
+logger.debug("Kubernetes API instance ready")
 
 def get_pods(namespace="default", limit=50):
     """Get pods with limit and field selector"""
-    print(f"Getting pods in namespace: {namespace} with limit: {limit}")
+    logger.debug("Getting pods in namespace: %s with limit: %s", namespace, limit)
     try:
         pods = k8s_api.core_v1.list_namespaced_pod(
             namespace=namespace,
             limit=limit,
             field_selector="status.phase=Running"  # Only show running pods
         )
-        print(f"Successfully fetched {len(pods.items)} pods")
+        logger.debug("Successfully fetched %s pods", len(pods.items))
         return [pod.metadata.name for pod in pods.items][:limit]
     except Exception as e:
-        print(f"ERROR: Failed to get pods: {str(e)}")
-        logger.error(f"Failed to get pods: {str(e)}")
+        logger.error("Failed to get pods: %s", e)
         return ["Error fetching pods"]
 
 def get_deployments(namespace="default", limit=50):
     """Get deployments with limit"""
-    print(f"Getting deployments in namespace: {namespace} with limit: {limit}")
+    logger.debug("Getting deployments in namespace: %s with limit: %s", namespace, limit)
     try:
         deployments = k8s_api.apps_v1.list_namespaced_deployment(
             namespace=namespace,
             limit=limit
         )
-        print(f"Successfully fetched {len(deployments.items)} deployments")
+        logger.debug("Successfully fetched %s deployments", len(deployments.items))
         return [deploy.metadata.name for deploy in deployments.items][:limit]
     except Exception as e:
-        print(f"ERROR: Failed to get deployments: {str(e)}")
-        logger.error(f"Failed to get deployments: {str(e)}")
+        logger.error("Failed to get deployments: %s", e)
         return ["Error fetching deployments"]
 
 def execute_safe_kubectl(command):
-    print(f"Executing kubectl command: {command}")
-    logger.info(f"Executing kubectl command: {command}")
+    logger.info("Executing kubectl command: %s", command)
     try:
         if not isinstance(command, str):
             error_msg = "Command must be a string"
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
              
         parts = command.split()
         if not parts:
             error_msg = "Empty command"
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
+        if parts[0] == "logs" and " -- " in command:
+            # The log pattern is passed through as typed, whitespace included
+            head, _, pattern = command.partition(" -- ")
+            parts = head.split() + ["--", pattern]
  
         result = k8s_api.execute_command(parts)
-        print(f"Command executed successfully. Result: {result[:200]}...")  # Truncate long output
+        logger.debug("Command executed successfully. Result: %s...", result[:200])  # Truncate long output
         return result
     except Exception as e:
-        print(f"ERROR: Failed to execute kubectl command: {str(e)}")
-        logger.error(f"Failed to execute kubectl command: {str(e)}")
+        logger.error("Failed to execute kubectl command: %s", e)
         raise
     
 def start_cache_updater():
     """Background thread to refresh search data"""
-    print("Starting cache updater thread")
+    logger.debug("Starting cache updater thread")
+    try:
+        restore_snapshot()
+    except Exception as e:
+        logger.warning("Failed to restore persisted snapshot: %s", e)
+
+    # Startup counts as activity, so an idle bot still refreshes for CACHE_IDLE_AFTER seconds
+    mark_search_activity()
+
     def updater():
+        schedule = RefreshSchedule()
+        persisted_at = float("-inf")
         while True:
+            pods_changed = deployments_changed = None
             try:
-                print("Running cache refresh...")
-                refresh_pod_cache()
-                refresh_deployment_cache()
-                print("Cache refresh completed")
+                logger.debug("Running cache refresh...")
+                with tracing.span("cache.refresh"), metrics.CACHE_REFRESH_DURATION.time():
+                    pods_changed = refresh_pod_cache()
+                    deployments_changed = refresh_deployment_cache()
+                # A failed listing leaves its cache as it was; skip the publish if both failed
+                if pods_changed is not None or deployments_changed is not None:
+                    publish_snapshot()
+                logger.debug("Cache refresh completed")
+                if SNAPSHOT_PERSIST_PATH and time.monotonic() - persisted_at >= SNAPSHOT_PERSIST_INTERVAL:
+                    if persist_snapshot():
+                        persisted_at = time.monotonic()
             except Exception as e:
-                print(f"ERROR in cache updater: {str(e)}")
-                logger.error(f"Cache update failed: {str(e)}")
-            time.sleep(CACHE_REFRESH_INTERVAL)
+                logger.error("Cache update failed: %s", e)
+            with cache_lock:
+                rolling = deployment_search_cache["rolling"]
+            delay = schedule.next_delay(
+                failed=pods_changed is None or deployments_changed is None,
+                changed=bool(pods_changed or deployments_changed),
+                rolling=rolling > 0
+            )
+            logger.debug("Next cache refresh in %.1fs", delay)
+            time.sleep(delay)
+            wait_for_searches()
 
     thread = threading.Thread(target=updater, daemon=True)
     thread.start()
-    print("Cache updater thread started")
+    logger.info("Cache updater thread started")
+
+class RefreshSchedule:
+    """Delay before the next cache refresh, from the outcome of the last one
+
+    Failures back off exponentially with jitter up to CACHE_BACKOFF_MAX. A
+    rollout in progress refreshes every CACHE_REFRESH_MIN seconds. After
+    CACHE_UNCHANGED_STREAK unchanged refreshes the delay doubles per refresh up
+    to CACHE_REFRESH_MAX, and any change resets it to CACHE_REFRESH_INTERVAL.
+    """
+    def __init__(self):
+        self.failures = 0
+        self.unchanged = 0
+
+    def next_delay(self, failed, changed, rolling):
+        if failed:
+            self.failures += 1
+            # Full jitter, so restarted bots do not retry a struggling API server in step
+            return random.uniform(CACHE_REFRESH_MIN, min(CACHE_BACKOFF_MAX, CACHE_REFRESH_INTERVAL * 2 ** self.failures))
+        self.failures = 0
+        if rolling:
+            self.unchanged = 0
+            return CACHE_REFRESH_MIN
+        if changed:
+            self.unchanged = 0
+            return CACHE_REFRESH_INTERVAL
+        self.unchanged += 1
+        slowdown = max(0, self.unchanged - CACHE_UNCHANGED_STREAK + 1)
+        return min(CACHE_REFRESH_MAX, CACHE_REFRESH_INTERVAL * 2 ** slowdown)
+
+def wait_for_searches(poll_interval=2):
+    """Block while no worker has served a search for CACHE_IDLE_AFTER seconds"""
+    idle_logged = False
+    while True:
+        age = last_search_age()
+        if age is None or age < CACHE_IDLE_AFTER:
+            if idle_logged:
+                logger.info("Search activity resumed, refreshing resource cache")
+            return
+        if not idle_logged:
+            logger.info("No searches for %ds, pausing resource cache refresh", age)
+            idle_logged = True
+        time.sleep(poll_interval)
+
+def summarize_pod(pod):
+    statuses = pod.status.container_statuses or []
+    # A waiting or terminated container explains a pod better than its phase
+    reason = None
+    for cs in statuses:
+        state = cs.state
+        if state and state.waiting and state.waiting.reason:
+            reason = state.waiting.reason
+            break
+        if state and state.terminated and state.terminated.reason:
+            reason = state.terminated.reason
+    return PodSummary(
+        name=pod.metadata.name,
+        labels=pod.metadata.labels or {},
+        phase=pod.status.phase,
+        ready=sum(1 for cs in statuses if cs.ready),
+        restarts=sum(cs.restart_count for cs in statuses),
+        reason=reason
+    )
+
+def cached_pod_summaries(match_labels, max_age=CACHE_REFRESH_INTERVAL * 2):
+    """Summaries of pods whose labels include match_labels, or None if the cache is cold"""
+    with cache_lock:
+        if time.monotonic() - pod_search_cache["refreshed_at"] > max_age:
+            return None
+        summaries = pod_search_cache["summaries"]
+    return [p for p in summaries if all(p.labels.get(k) == v for k, v in match_labels.items())]
 
 def refresh_pod_cache():
-    """Refresh pod cache with efficient query"""
+    """Refresh pod cache with efficient query; returns whether it changed, or None on failure"""
     try:
-        print("Refreshing pod cache...")
+        logger.debug("Refreshing pod cache...")
         pods = k8s_api.core_v1.list_namespaced_pod(
             namespace="default",
-            field_selector="status.phase=Running",
             timeout_seconds=5
         ).items
-        names = [p.metadata.name for p in pods]
+        # Search offers running pods only; summaries cover every phase for describe
+        names = [p.metadata.name for p in pods if p.status.phase == "Running"]
+        summaries = [summarize_pod(p) for p in pods]
         with cache_lock:
+            changed = names != pod_search_cache["names"] or summaries != pod_search_cache["summaries"]
             pod_search_cache["names"] = names
             pod_search_cache["lower"] = [n.lower() for n in names]
-        print(f"Pod cache refreshed with {len(names)} items")
+            pod_search_cache["summaries"] = summaries
+            pod_search_cache["refreshed_at"] = time.monotonic()
         logger.debug("Refreshed pod cache with %d items", len(names))
+        return changed
     except Exception as e:
-        print(f"WARNING: Failed to refresh pod cache: {str(e)}")
-        logger.warning("Failed to refresh pod cache: %s", str(e))
+        logger.warning("Failed to refresh pod cache: %s", e)
+        return None
+
+def vet_exec_command(args):
+    """Check an exec command against the block lists; returns the argv to run"""
+    if not args:
+        error_msg = "No command provided to execute in the pod."
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+    # Prepare the command strings
+    original_command_str = ' '.join(args)
+    check_command_str = original_command_str.lower()
+
+    # Security validation
+    # 1. Check blocked commands
+    for cmd, msg in EXEC_BLOCKED_COMMANDS.items():
+        if check_command_str.startswith(cmd.lower()):
+            logger.error("Blocked command attempt: %s", original_command_str)
+            raise ValueError(f"Security violation: {msg}")
+
+    # 2. Check blocked patterns
+    for pattern in EXEC_BLOCKED_PATTERNS:
+        if re.search(pattern, check_command_str, re.IGNORECASE):
+            logger.error("Blocked sensitive pattern in: %s", original_command_str)
+            raise ValueError("Security violation: Sensitive pattern detected")
+
+    # Determine if shell execution is needed
+    if any(op in original_command_str for op in EXEC_SHELL_OPERATORS):
+        logger.info("Executing as shell command: %s", original_command_str)
+        return ["sh", "-c", original_command_str]
+    logger.info("Executing direct command: %s", original_command_str)
+    return list(args)
+
+def format_exec_groups(target, command_str, groups, prefix=""):
+    """Fan-out exec results, one section per distinct output, largest group first"""
+    total = sum(len(pods) for pods in groups.values())
+    sections = [f"`{command_str}` on {total} pods of {target}: {len(groups)} distinct results"]
+    for output, pods in sorted(groups.items(), key=lambda item: -len(item[1])):
+        names = sorted(p.removeprefix(prefix) for p in pods)
+        shown = ", ".join(names[:EXEC_GROUP_NAMES])
+        if len(names) > EXEC_GROUP_NAMES:
+            shown += f", +{len(names) - EXEC_GROUP_NAMES} more"
+        if len(output) > EXEC_GROUP_OUTPUT:
+            output = output[:EXEC_GROUP_OUTPUT] + "\n...[truncated]"
+        sections.append(f"── {len(pods)} pod{'s' if len(pods) > 1 else ''} ({shown}) ──\n{output}")
+    return "\n\n".join(sections)
+
+def selector_string(match_labels):
+    return ",".join(f"{k}={v}" for k, v in (match_labels or {}).items())
+
+def request_timeout(seconds):
+    """_request_timeout for a budget in seconds
+
+    The client only honours an int or a (connect, read) tuple; a float is
+    silently dropped and the request then has no timeout at all.
+    """
+    return (seconds, seconds)
+
+def iter_lines(response, chunk_size=65536):
+    """Complete lines of a streamed HTTP response, without reading the whole body"""
+    pending = b""
+    for chunk in response.stream(chunk_size):
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+def timestamp_key(ts):
+    """Sortable form of an RFC 3339 timestamp whose fraction may have trailing zeros trimmed"""
+    seconds, _, fraction = ts.rstrip("Z").partition(".")
+    return f"{seconds}.{fraction.ljust(9, '0')}"
+
+def rollout_state(deployment):
+    """Summarise a deployment's rollout like `kubectl rollout status`"""
+    status = deployment.status
+    if (status.observed_generation or 0) < (deployment.metadata.generation or 0):
+        return "waiting for the controller to observe the new spec"
+    for condition in status.conditions or []:
+        if condition.type == "Progressing" and condition.reason == "ProgressDeadlineExceeded":
+            return f"failed ({condition.message})"
+    desired = deployment.spec.replicas or 0
+    if (status.updated_replicas or 0) < desired:
+        return f"in progress: {status.updated_replicas or 0} of {desired} replicas updated"
+    if (status.replicas or 0) > (status.updated_replicas or 0):
+        return f"in progress: {(status.replicas or 0) - (status.updated_replicas or 0)} old replicas pending termination"
+    if (status.available_replicas or 0) < (status.updated_replicas or 0):
+        return f"in progress: {status.available_replicas or 0} of {status.updated_replicas} updated replicas available"
+    return "complete"
+
+def is_rolling_out(deployment):
+    """Whether a new spec is still being rolled out
+
+    Unlike rollout_state, replicas that are merely unavailable do not count: a
+    crashlooping pod after a finished rollout must not hold the cache refresh at
+    CACHE_REFRESH_MIN.
+    """
+    status = deployment.status
+    if (status.observed_generation or 0) < (deployment.metadata.generation or 0):
+        return True
+    for condition in status.conditions or []:
+        if condition.type == "Progressing" and condition.reason == "ProgressDeadlineExceeded":
+            return False
+    updated = status.updated_replicas or 0
+    return updated < (deployment.spec.replicas or 0) or (status.replicas or 0) > updated
 
 def refresh_deployment_cache():
-    """Refresh deployment cache with efficient query"""
+    """Refresh deployment cache with efficient query; returns whether it changed, or None on failure"""
     try:
-        print("Refreshing deployment cache...")
+        logger.debug("Refreshing deployment cache...")
         deployments = k8s_api.apps_v1.list_namespaced_deployment(
             namespace="default",
             timeout_seconds=5
         ).items
         names = [d.metadata.name for d in deployments]
+        rolling = sum(1 for d in deployments if is_rolling_out(d))
         with cache_lock:
+            changed = names != deployment_search_cache["names"] or rolling != deployment_search_cache["rolling"]
             deployment_search_cache["names"] = names
             deployment_search_cache["lower"] = [n.lower() for n in names]
-        print(f"Deployment cache refreshed with {len(names)} items")
-        logger.debug("Refreshed deployment cache with %d items", len(names))
+            deployment_search_cache["rolling"] = rolling
+            deployment_search_cache["refreshed_at"] = time.monotonic()
+        logger.debug("Refreshed deployment cache with %d items, %d rolling out", len(names), rolling)
+        return changed
     except Exception as e:
-        print(f"WARNING: Failed to refresh deployment cache: {str(e)}")
-        logger.warning("Failed to refresh deployment cache: %s", str(e))
+        logger.warning("Failed to refresh deployment cache: %s", e)
+        return None
+
+def _cache_sections():
+    """Names per snapshot section, and whether both caches have had a live refresh"""
+    with cache_lock:
+        sections = {
+            "pods": pod_search_cache["names"],
+            "deployments": deployment_search_cache["names"]
+        }
+        live = pod_search_cache["refreshed_at"] > float("-inf") and deployment_search_cache["refreshed_at"] > float("-inf")
+    return sections, live
+
+def publish_snapshot():
+    """Write the in-memory caches to the shared snapshot file
+
+    Until both caches have been refreshed from the API the restored names are
+    republished, still flagged stale.
+    """
+    sections, live = _cache_sections()
+    generation = write_snapshot(SNAPSHOT_PATH, sections, flags=0 if live else FLAG_STALE)
+    logger.debug("Published resource snapshot generation %d%s", generation, "" if live else " (stale)")
+
+def persist_snapshot():
+    """Copy the live caches to SNAPSHOT_PERSIST_PATH for the next start; False while they are stale"""
+    sections, live = _cache_sections()
+    if not live:
+        return False
+    os.makedirs(os.path.dirname(SNAPSHOT_PERSIST_PATH) or ".", exist_ok=True)
+    write_snapshot(SNAPSHOT_PERSIST_PATH, sections)
+    logger.debug("Persisted resource snapshot to %s", SNAPSHOT_PERSIST_PATH)
+    return True
 
-# Start the cache updater when module loads
-print("Initializing cache updater...")
-start_cache_updater()
-print("Cache updater initialized")
+def restore_snapshot():
+    """Seed the caches from the persisted snapshot so searches work before the first refresh
+
+    Skipped when a snapshot is already shared, e.g. a new leader taking over from
+    a worker that exited. The restored snapshot is published with FLAG_STALE.
+    """
+    if not SNAPSHOT_PERSIST_PATH or snapshot_reader.current():
+        return
+    restored = read_sections(SNAPSHOT_PERSIST_PATH)
+    if not restored:
+        return
+    sections, created_at, _ = restored
+    pods, deployments = sections.get("pods", []), sections.get("deployments", [])
+    with cache_lock:
+        pod_search_cache["names"] = pods
+        pod_search_cache["lower"] = [n.lower() for n in pods]
+        deployment_search_cache["names"] = deployments
+        deployment_search_cache["lower"] = [n.lower() for n in deployments]
+    write_snapshot(SNAPSHOT_PATH, {"pods": pods, "deployments": deployments}, flags=FLAG_STALE, created_at=created_at)
+    logger.info("Restored %d pods and %d deployments from %s (%ds old), stale until the first refresh",
+                len(pods), len(deployments), SNAPSHOT_PERSIST_PATH, time.time() - created_at)
+
+def resource_cache_state():
+    """"live", "stale" (restored at startup, not yet refreshed) or "empty", for /health"""
+    snapshot = snapshot_reader.current()
+    if not snapshot:
+        return "empty"
+    return "stale" if snapshot.stale else "live"
 
 def search_pods(name_pattern, namespace="default"):
     """Optimized pod search using pre-cached data"""
-    print(f"Searching pods with pattern: '{name_pattern}' in namespace: {namespace}")
+    logger.debug("Searching pods with pattern: '%s' in namespace: %s", name_pattern, namespace)
     if namespace != "default":
-        print("Using fallback search for non-default namespace")
+        logger.debug("Using fallback search for non-default namespace")
+        _record_search(hit=False)
         return _fallback_pod_search(name_pattern, namespace)
+
+    snapshot = snapshot_reader.current()
+    if snapshot:
+        matches = snapshot.search("pods", name_pattern, 20)
+        logger.debug("Found %s matches in snapshot generation %s", len(matches), snapshot.generation)
+        _record_search(hit=True)
+        return matches
     
     name_lower = name_pattern.lower()
     
     with cache_lock:
         names = pod_search_cache["names"]
         lower_names = pod_search_cache["lower"]
+    _record_search(hit=bool(names))
     
     # Exact match (case-insensitive)
     try:
         idx = lower_names.index(name_lower)
-        print(f"Found exact match: {names[idx]}")
+        logger.debug("Found exact match: %s", names[idx])
         return [names[idx]]
     except ValueError:
         pass
@@ -701,32 +1407,41 @@ def search_pods(name_pattern, namespace="default"):
                 break
     
     if prefix_matches:
-        print(f"Found {len(prefix_matches)} prefix matches")
+        logger.debug("Found %s prefix matches", len(prefix_matches))
         return prefix_matches[:20]
     
     # Partial matches
     partial_matches = [name for name, lower in zip(names, lower_names) 
                       if name_lower in lower][:20]
-    print(f"Found {len(partial_matches)} partial matches")
+    logger.debug("Found %s partial matches", len(partial_matches))
     return partial_matches
 
 def search_deployments(name_pattern, namespace="default"):
     """Optimized deployment search using pre-cached data"""
-    print(f"Searching deployments with pattern: '{name_pattern}' in namespace: {namespace}")
+    logger.debug("Searching deployments with pattern: '%s' in namespace: %s", name_pattern, namespace)
     if namespace != "default":
-        print("Using fallback search for non-default namespace")
+        logger.debug("Using fallback search for non-default namespace")
+        _record_search(hit=False)
         return _fallback_deployment_search(name_pattern, namespace)
+
+    snapshot = snapshot_reader.current()
+    if snapshot:
+        matches = snapshot.search("deployments", name_pattern, 10)
+        logger.debug("Found %s matches in snapshot generation %s", len(matches), snapshot.generation)
+        _record_search(hit=True)
+        return matches
     
     name_lower = name_pattern.lower()
     
     with cache_lock:
         names = deployment_search_cache["names"]
         lower_names = deployment_search_cache["lower"]
+    _record_search(hit=bool(names))
     
     # Exact match (case-insensitive)
     try:
         idx = lower_names.index(name_lower)
-        print(f"Found exact match: {names[idx]}")
+        logger.debug("Found exact match: %s", names[idx])
         return [names[idx]]
     except ValueError:
         pass
@@ -740,47 +1455,45 @@ def search_deployments(name_pattern, namespace="default"):
                 break
     
     if prefix_matches:
-        print(f"Found {len(prefix_matches)} prefix matches")
+        logger.debug("Found %s prefix matches", len(prefix_matches))
         return prefix_matches[:10]
     
     # Partial matches
     partial_matches = [name for name, lower in zip(names, lower_names) 
                       if name_lower in lower][:10]
-    print(f"Found {len(partial_matches)} partial matches")
+    logger.debug("Found %s partial matches", len(partial_matches))
     return partial_matches
 
 def _fallback_pod_search(name_pattern, namespace):
     """Fallback for non-default namespaces"""
     try:
-        print(f"Running fallback pod search for namespace: {namespace}")
+        logger.debug("Running fallback pod search for namespace: %s", namespace)
         pods = k8s_api.core_v1.list_namespaced_pod(namespace).items
         return _search_list([p.metadata.name for p in pods], name_pattern, 20)
     except Exception as e:
-        print(f"ERROR in fallback pod search: {str(e)}")
-        logger.error(f"Fallback pod search failed: {str(e)}")
+        logger.error("Fallback pod search failed: %s", e)
         return []
 
 def _fallback_deployment_search(name_pattern, namespace):
     """Fallback for non-default namespaces"""
     try:
-        print(f"Running fallback deployment search for namespace: {namespace}")
+        logger.debug("Running fallback deployment search for namespace: %s", namespace)
         deployments = k8s_api.apps_v1.list_namespaced_deployment(namespace).items
         return _search_list([d.metadata.name for d in deployments], name_pattern, 10)
     except Exception as e:
-        print(f"ERROR in fallback deployment search: {str(e)}")
-        logger.error(f"Fallback deployment search failed: {str(e)}")
+        logger.error("Fallback deployment search failed: %s", e)
         return []
 
 def _search_list(items, pattern, limit):
     """Generic search helper"""
-    print(f"Running generic search on {len(items)} items with pattern: '{pattern}'")
+    logger.debug("Running generic search on %s items with pattern: '%s'", len(items), pattern)
     lower_items = [item.lower() for item in items]
     pattern_lower = pattern.lower()
     
     # Exact match
     try:
         idx = lower_items.index(pattern_lower)
-        print("Found exact match")
+        logger.debug("Found exact match")
         return [items[idx]]
     except ValueError:
         pass
@@ -794,11 +1507,11 @@ def _search_list(items, pattern, limit):
                 break
     
     if prefix_matches:
-        print(f"Found {len(prefix_matches)} prefix matches")
+        logger.debug("Found %s prefix matches", len(prefix_matches))
         return prefix_matches
     
     # Partial matches
     partial_matches = [item for item, lower in zip(items, lower_items)
                      if pattern_lower in lower][:limit]
-    print(f"Found {len(partial_matches)} partial matches")
+    logger.debug("Found %s partial matches", len(partial_matches))
     return partial_matches
\ No newline at end of file
@@ -0,0 +1,62 @@
+import os
+import fcntl
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_PATH = os.getenv("LEADER_LOCK_PATH", "/tmp/jarvis-leader.lock")
+LEADER_RETRY_INTERVAL = 15
+
+
+class FileLockElector:
+    """Elect one process per host by holding an exclusive flock
+
+    Every gunicorn worker in the container competes for the same lock file.
+    The kernel releases the lock when the holding process exits, so a standby
+    worker takes over on its next retry after the leader dies.
+    """
+    def __init__(self, lock_path=LEADER_LOCK_PATH):
+        self.lock_path = lock_path
+        self._fd = None
+
+    @property
+    def is_leader(self):
+        return self._fd is not None
+
+    def try_acquire(self):
+        if self._fd is not None:
+            return True
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        logger.info("Process %s elected leader via %s", os.getpid(), self.lock_path)
+        return True
+
+
+elector = FileLockElector()
+
+def run_when_leader(on_elected, retry_interval=LEADER_RETRY_INTERVAL):
+    """Call on_elected once this process wins the election
+
+    Tries immediately, then keeps retrying from a daemon thread so a standby
+    worker picks up leadership when the current leader exits.
+    """
+    if elector.try_acquire():
+        on_elected()
+        return
+
+    logger.info("Process %s is on standby for leadership", os.getpid())
+    def campaign():
+        while not elector.try_acquire():
+            time.sleep(retry_interval)
+        on_elected()
+
+    threading.Thread(target=campaign, daemon=True).start()
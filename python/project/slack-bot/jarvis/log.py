@@ -0,0 +1,117 @@
+"""Logging setup for the bot.
+
+Records are handed to a QueueHandler, so a request thread only formats the
+message; rendering, redaction and the write to stdout happen on a single
+listener thread. Call sites use %-style arguments, which logging formats only
+for records that pass the level check.
+
+Configuration:
+    LOG_LEVEL   root level (default INFO)
+    LOG_LEVELS  per-logger overrides, e.g. "jarvis.kubectl=DEBUG,kubernetes=WARNING"
+    LOG_FORMAT  "json" (default) or "text"
+
+Slack tokens, request signatures and email addresses are masked in every
+rendered line.
+"""
+import os
+import re
+import sys
+import json
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from jarvis import tracing
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
+REDACTIONS = [
+    (re.compile(r"\bxox[abposr]-[A-Za-z0-9-]+"), "xox?-[REDACTED]"),
+    (re.compile(r"\bxapp-[A-Za-z0-9-]+"), "xapp-[REDACTED]"),
+    (re.compile(r"\bv0=[0-9a-f]{64}\b"), "v0=[REDACTED]"),
+    (re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"), "[EMAIL]"),
+]
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+def redact(text):
+    for pattern, replacement in REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def parse_levels(spec):
+    """Parse "name=LEVEL,name=LEVEL" into {name: LEVEL}"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.strip().partition("=")
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class _TraceContextFilter(logging.Filter):
+    """Stamps records with the active trace id, read on the calling thread"""
+    def filter(self, record):
+        trace_id = tracing.current_trace_id()
+        if trace_id:
+            record.trace_id = trace_id
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra= fields as top-level keys"""
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return redact(json.dumps(entry, default=str))
+
+
+class RedactingFormatter(logging.Formatter):
+    def format(self, record):
+        return redact(super().format(record))
+
+
+def configure_logging(stream=None):
+    """Route all logging through a background queue listener; safe to call twice"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(RedactingFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    handler = QueueHandler(log_queue)
+    handler.addFilter(_TraceContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    for name, level in parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,178 @@
+"""Prometheus metrics for the bot, served on /metrics.
+
+Latency histograms are recorded inline. Cache hit ratios, snapshot age and
+executor depth are read from the owning modules at scrape time through the
+register_* hooks, so those modules keep their own counters and do not import
+prometheus_client.
+
+With several gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to aggregate the
+histograms and counters across workers. Scrape-time gauges always describe
+the worker that serves the scrape.
+"""
+import os
+import time
+import logging
+from functools import wraps
+from contextlib import contextmanager
+from contextvars import ContextVar
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# Command type of the request being handled, used to label the phase histogram
+current_command = ContextVar("current_command", default="none")
+
+PHASE_LATENCY = Histogram(
+    "jarvis_phase_duration_seconds",
+    "Time spent per command type and phase (auth, kubernetes, slack, total)",
+    ["command", "phase"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 30)
+)
+K8S_API_CALLS = Counter(
+    "jarvis_kubernetes_api_calls_total",
+    "Kubernetes API calls by verb",
+    ["verb"]
+)
+K8S_API_ERRORS = Counter(
+    "jarvis_kubernetes_api_errors_total",
+    "Failed Kubernetes API calls by verb",
+    ["verb"]
+)
+K8S_API_LATENCY = Histogram(
+    "jarvis_kubernetes_api_duration_seconds",
+    "Kubernetes API call latency, including deserialization, by verb and resource",
+    ["verb", "resource"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+)
+K8S_API_RESPONSE_BYTES = Histogram(
+    "jarvis_kubernetes_api_response_bytes",
+    "Kubernetes API response body size by verb and resource (streamed responses excluded)",
+    ["verb", "resource"],
+    buckets=(1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+)
+K8S_API_DESERIALIZE = Histogram(
+    "jarvis_kubernetes_api_deserialize_seconds",
+    "Time spent turning Kubernetes API responses into client models",
+    ["verb", "resource"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+K8S_API_RETRIES = Counter(
+    "jarvis_kubernetes_api_retries_total",
+    "Retries urllib3 made for Kubernetes API calls, by verb",
+    ["verb"]
+)
+RATE_LIMITED = Counter(
+    "jarvis_rate_limited_total",
+    "Submissions rejected by a rate limit, by command class and limit (user, concurrency)",
+    ["command_class", "reason"]
+)
+CACHE_REFRESH_DURATION = Histogram(
+    "jarvis_cache_refresh_duration_seconds",
+    "Duration of one resource cache refresh",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+)
+
+_cache_sources = []
+_executor_sources = []
+_age_sources = []
+
+
+def register_cache(stats_fn):
+    """Register a callable returning {"name", "hits", "misses", "hit_ratio", ...}"""
+    _cache_sources.append(stats_fn)
+
+
+def register_executor(stats_fn):
+    """Register a callable returning {"name", "in_flight", "queued", ...}"""
+    _executor_sources.append(stats_fn)
+
+
+def register_cache_age(name, age_fn):
+    """Register a callable returning the age in seconds of a cache, or None"""
+    _age_sources.append((name, age_fn))
+
+
+@contextmanager
+def observe_phase(phase, command=None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_LATENCY.labels(command or current_command.get(), phase).observe(time.perf_counter() - start)
+
+
+def timed(phase, command=None):
+    """Decorator form of observe_phase"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with observe_phase(phase, command):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe_k8s_call(verb, resource, seconds, response_bytes=None, deserialize_seconds=0.0, retries=0, failed=False):
+    K8S_API_CALLS.labels(verb).inc()
+    K8S_API_LATENCY.labels(verb, resource).observe(seconds)
+    if response_bytes is not None:
+        K8S_API_RESPONSE_BYTES.labels(verb, resource).observe(response_bytes)
+    if deserialize_seconds:
+        K8S_API_DESERIALIZE.labels(verb, resource).observe(deserialize_seconds)
+    if retries:
+        K8S_API_RETRIES.labels(verb).inc(retries)
+    if failed:
+        K8S_API_ERRORS.labels(verb).inc()
+
+
+class _ScrapeTimeCollector:
+    """Exposes state owned by other modules when Prometheus scrapes"""
+    def collect(self):
+        hits = CounterMetricFamily("jarvis_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("jarvis_cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily("jarvis_cache_hit_ratio", "Cache hit ratio since start", labels=["cache"])
+        for stats_fn in _cache_sources:
+            try:
+                stats = stats_fn()
+            except Exception as e:
+                logger.warning("Cache stats source failed: %s", e)
+                continue
+            hits.add_metric([stats["name"]], stats["hits"] + stats.get("stale_hits", 0))
+            misses.add_metric([stats["name"]], stats["misses"])
+            ratio.add_metric([stats["name"]], stats["hit_ratio"])
+        yield hits
+        yield misses
+        yield ratio
+
+        age = GaugeMetricFamily("jarvis_cache_age_seconds", "Seconds since the cache was last refreshed", labels=["cache"])
+        for name, age_fn in _age_sources:
+            value = age_fn()
+            if value is not None:
+                age.add_metric([name], value)
+        yield age
+
+        in_flight = GaugeMetricFamily("jarvis_executor_in_flight", "Tasks currently running", labels=["executor"])
+        queued = GaugeMetricFamily("jarvis_executor_queue_depth", "Tasks waiting for a worker", labels=["executor"])
+        for stats_fn in _executor_sources:
+            stats = stats_fn()
+            in_flight.add_metric([stats["name"]], stats["in_flight"])
+            queued.add_metric([stats["name"]], stats["queued"])
+        yield in_flight
+        yield queued
+
+
+_scrape_time_collector = _ScrapeTimeCollector()
+REGISTRY.register(_scrape_time_collector)
+
+
+def render_metrics():
+    """Return (body, content_type) for the /metrics endpoint"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_scrape_time_collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
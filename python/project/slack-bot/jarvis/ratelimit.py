@@ -0,0 +1,132 @@
+"""Token-bucket rate limits for submitted commands.
+
+Each user gets one bucket per command class, refilled continuously at
+count/period tokens per second up to count. ``exec`` and ``describe`` also
+take a slot from a global concurrency cap, so a burst from many users at
+once cannot pile onto the API server and metrics-server.
+
+Configuration:
+    COMMAND_RATE_LIMITS    "class=count/seconds,..." (default
+                           "read=30/60,expensive=6/60,mutating=5/60")
+    EXPENSIVE_CONCURRENCY  exec/describe commands running at once (default 4)
+    SLASH_COMMAND_RATE_LIMIT  /jarvis invocations per user, in the `limits`
+                           notation used by Flask-Limiter (default "20/minute")
+
+Limits are per process; with several gunicorn workers each keeps its own.
+"""
+import os
+import math
+import time
+import logging
+import threading
+from cachetools import LRUCache
+
+logger = logging.getLogger(__name__)
+
+COMMAND_RATE_LIMITS = os.getenv("COMMAND_RATE_LIMITS", "read=30/60,expensive=6/60,mutating=5/60")
+EXPENSIVE_CONCURRENCY = int(os.getenv("EXPENSIVE_CONCURRENCY", "4"))
+SLASH_COMMAND_RATE_LIMIT = os.getenv("SLASH_COMMAND_RATE_LIMIT", "20/minute")
+
+COMMAND_CLASSES = {
+    "get": "read",
+    "describe": "expensive",
+    "describe_deployment": "expensive",
+    "exec": "expensive",
+    "exec_deployment": "expensive",
+    "logs": "expensive",
+    "restart": "mutating",
+    "scale": "mutating",
+    "pause": "mutating",
+    "resume": "mutating",
+}
+
+
+def parse_limits(spec):
+    """Parse "class=count/seconds,..." into {class: (count, seconds)}"""
+    limits = {}
+    for item in spec.split(","):
+        name, _, limit = item.strip().partition("=")
+        if not name or not limit:
+            continue
+        count, _, period = limit.partition("/")
+        limits[name.strip()] = (int(count), float(period or 60))
+    return limits
+
+
+def slash_limited_response(retry_after):
+    """Ephemeral reply for a user over the slash command limit"""
+    return {
+        "response_type": "ephemeral",
+        "text": f"⏳ Too many /jarvis commands. Try again in {max(1, math.ceil(retry_after))}s."
+    }
+
+
+def command_class(command):
+    return COMMAND_CLASSES.get(command, "read")
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity, now):
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def take(self, rate, capacity, now):
+        """Take one token; returns 0 on success or the seconds until one is available"""
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / rate
+
+
+class RateLimiter:
+    """Per-key token buckets for each configured command class"""
+    def __init__(self, limits, max_keys=10000):
+        self.limits = {name: (count / period, count) for name, (count, period) in limits.items()}
+        self._buckets = LRUCache(maxsize=max_keys)
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def acquire(self, key, command_cls):
+        """Take a token for (key, class); returns 0 or the retry-after in seconds"""
+        limit = self.limits.get(command_cls)
+        if limit is None:
+            return 0
+        rate, capacity = limit
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get((key, command_cls))
+            if bucket is None:
+                bucket = self._buckets[(key, command_cls)] = TokenBucket(capacity, now)
+            retry_after = bucket.take(rate, capacity, now)
+            if retry_after:
+                self.limited += 1
+        return retry_after
+
+
+class ConcurrencyLimiter:
+    """Non-blocking cap on how many tasks of a kind run at once"""
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.rejected = 0
+
+    def try_acquire(self):
+        with self._lock:
+            if self.in_use >= self.limit:
+                self.rejected += 1
+                return False
+            self.in_use += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_use -= 1
+
+
+command_limiter = RateLimiter(parse_limits(COMMAND_RATE_LIMITS))
+expensive_slots = ConcurrencyLimiter(EXPENSIVE_CONCURRENCY)
@@ -0,0 +1,69 @@
+import logging
+from apscheduler.schedulers.background import BackgroundScheduler
+from jarvis.kubectl import start_cache_updater
+from jarvis.leader import elector
+from jarvis.top import start_metrics_collector
+from jarvis.events import start_event_digest
+from jarvis.sleep import start_sleep_schedules
+from scripts.facets_prod_release_pause_resume import FACETS_CLUSTERS, run_pause_release_batch
+
+logger = logging.getLogger(__name__)
+
+# Scheduler of this process; only set in the elected leader
+scheduler = None
+
+def scheduled_pause():
+    try:
+        logger.info("Running scheduled pause_release job")
+        results = run_pause_release_batch(FACETS_CLUSTERS, pause_releases="true")
+        failed = [name for name, error in results.items() if error]
+        logger.info("pause_release completed on %d clusters, %d failed %s", len(results), len(failed), failed)
+    except Exception as e:
+        logger.error("Scheduled pause job failed", exc_info=True)
+
+def scheduled_resume():
+    try:
+        logger.info("Running scheduled resume_release job")
+        results = run_pause_release_batch(FACETS_CLUSTERS, pause_releases="false")
+        failed = [name for name, error in results.items() if error]
+        logger.info("resume_release completed on %d clusters, %d failed %s", len(results), len(failed), failed)
+    except Exception as e:
+        logger.error("Scheduled resume job failed", exc_info=True)
+
+# (day_of_week, hour IST, job) of every release window edge
+RELEASE_SCHEDULE = [
+    ("mon", 5, scheduled_resume),
+    ("mon", 9, scheduled_pause),
+    ("mon", 22, scheduled_resume),
+    ("tue", 2, scheduled_pause),
+    ("thu", 5, scheduled_resume),
+    ("thu", 9, scheduled_pause),
+    ("thu", 22, scheduled_resume),
+    ("fri", 2, scheduled_pause),
+]
+
+def schedule_jobs():
+    scheduler = BackgroundScheduler(timezone='Asia/Kolkata')
+
+    for day_of_week, hour, job in RELEASE_SCHEDULE:
+        scheduler.add_job(job, trigger='cron', day_of_week=day_of_week, hour=hour, minute=0)
+
+    scheduler.start()
+    logger.info("Scheduled pause/resume jobs")
+    return scheduler
+
+def start_leader_services():
+    """Cron jobs, SleepSchedules, the resource cache refresher, the metrics collector and the event digest run in the elected worker only"""
+    global scheduler
+    scheduler = schedule_jobs()
+    start_sleep_schedules(scheduler)
+    start_cache_updater()
+    start_metrics_collector()
+    start_event_digest()
+
+def scheduler_state():
+    if scheduler:
+        return "active"
+    if not elector.is_leader:
+        return "standby"
+    return "inactive"
@@ -1,34 +1,147 @@
 import os
 import json
+import math
 import logging
 import datetime
-from slack_sdk import WebClient
 from flask import jsonify, Response
 from jarvis.auth import is_user_allowed, is_user_admin
 from slack_sdk.errors import SlackApiError
 import threading
+from cachetools import TTLCache
+from jarvis.cache import ResultCache, CursorStore
+from jarvis.executor import CommandExecutor
+from jarvis import metrics, tracing
+from jarvis.ratelimit import command_class, command_limiter, expensive_slots
 from jarvis.kubectl import execute_safe_kubectl, search_deployments, search_pods, k8s_api
-from scripts.facets_prod_release_pause_resume import run_pause_release
+from jarvis.top import SORT_LABELS, render_top
+from scripts.facets_prod_release_pause_resume import FACETS_CLUSTERS, run_pause_release_batch
 
 logger = logging.getLogger(__name__)
-client = WebClient(token=os.getenv("SLACK_BOT_TOKEN"))
-    
+client = tracing.TracedWebClient(token=os.getenv("SLACK_BOT_TOKEN"), base_url=tracing.SLACK_API_URL)
+
+# Idempotency keys of deliveries already accepted (trigger ID / view ID)
+DEDUP_TTL = 600
+_seen_deliveries = TTLCache(maxsize=4096, ttl=DEDUP_TTL)
+_seen_lock = threading.Lock()
+
+# Commands that target a deployment; the *_deployment variants run as the base command
+DEPLOYMENT_COMMANDS = ["restart", "scale", "describe_deployment", "logs", "exec_deployment"]
+DEPLOYMENT_VARIANTS = {"describe_deployment": "describe", "exec_deployment": "exec"}
+
+LOGS_SINCE_CHOICES = [("300", "5 minutes"), ("900", "15 minutes"), ("3600", "1 hour"), ("21600", "6 hours")]
+
+# Short-TTL cache for read-only commands; concurrent identical reads share one execution
+READ_ONLY_COMMANDS = ["get", "describe"]
+CLUSTER_NAME = os.getenv("CLUSTER_NAME", "in-cluster")
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "5"))
+result_cache = ResultCache(
+    maxsize=256,
+    ttl=RESULT_CACHE_TTL,
+    should_cache=lambda output: bool(output) and not output.startswith("Error:"),
+    name="result"
+)
+
+# Submitted commands run on a bounded pool instead of one thread per submission
+COMMAND_WORKERS = int(os.getenv("COMMAND_WORKERS", "16"))
+command_executor = CommandExecutor(max_workers=COMMAND_WORKERS, name="command")
+
+# Results longer than one Slack section are paged from a store shared by all workers
+PAGE_SIZE = 2800  # Slack caps section text at 3000 characters
+RESULT_PAGE_TTL = int(os.getenv("RESULT_PAGE_TTL", "3600"))
+RESULT_PAGE_DIR = os.getenv("RESULT_PAGE_DIR", "/tmp/jarvis-pages")
+result_pages = CursorStore(RESULT_PAGE_DIR, maxsize=256, ttl=RESULT_PAGE_TTL, name="result_pages")
+
+metrics.register_cache(result_cache.stats)
+metrics.register_cache(result_pages.stats)
+metrics.register_executor(command_executor.stats)
+
+def is_first_delivery(key):
+    """Record a (kind, id) idempotency key; False if it was already seen"""
+    if not key[1]:
+        # Without an id there is nothing to tell deliveries apart by
+        return True
+    with _seen_lock:
+        if key in _seen_deliveries:
+            return False
+        _seen_deliveries[key] = True
+        return True
+
+def invalidate_deployment_results(deployment_name, namespace="default"):
+    """Drop cached reads of a deployment and its pods after a mutation"""
+    def match(key):
+        cluster, ns, _, resource_type, name = key
+        if cluster != CLUSTER_NAME or ns != namespace:
+            return False
+        if resource_type in ["pod", "pods"]:
+            return name.startswith(f"{deployment_name}-")
+        return name == deployment_name
+    result_cache.invalidate(match)
+
+def is_slack_timeout_retry(headers):
+    """True for a Slack retry sent only because our first ack was late"""
+    return bool(headers.get("X-Slack-Retry-Num")) and headers.get("X-Slack-Retry-Reason") == "http_timeout"
+
+def admit_submission(payload):
+    """Apply rate limits to a view submission; returns (error, release)
+
+    ``error`` is a message for the modal when the submission is rejected.
+    ``release`` must be called once an admitted exec/describe finishes.
+    """
+    user_id = payload["user"].get("id")
+    values = payload["view"].get("state", {}).get("values", {})
+    command = values.get("command_type", {}).get("command_select", {}).get("selected_option", {}).get("value")
+    cls = command_class(command)
+
+    release = None
+    if cls == "expensive":
+        if not expensive_slots.try_acquire():
+            logger.warning("Concurrency cap reached, rejecting %s from %s", command, user_id)
+            metrics.RATE_LIMITED.labels(cls, "concurrency").inc()
+            return "⏳ Too many exec/describe commands are running right now. Try again in a few seconds.", None
+        release = expensive_slots.release
+
+    retry_after = command_limiter.acquire(user_id, cls)
+    if retry_after:
+        if release:
+            release()
+        logger.warning("Rate limited %s from %s for %.1fs", command, user_id, retry_after)
+        metrics.RATE_LIMITED.labels(cls, "user").inc()
+        return f"⏳ Rate limit reached for {command} commands. Try again in {math.ceil(retry_after)}s.", None
+    return None, release
+
+def process_admitted_command(payload, release=None):
+    """Run a submission accepted by admit_submission, then free its slot"""
+    try:
+        process_command_async(payload)
+    finally:
+        if release:
+            release()
+
+@tracing.traced("slack.command")
+@metrics.timed("total", command="slash")
 def handle_slash_command(form_data):
-    print(f"\n=== Handling slash command ===")
-    print(f"Received form data: {form_data}")
+    logger.debug("Handling slash command")
+    logger.debug("Received form data: %s", form_data)
     try:
         user_id = form_data.get("user_id")
         trigger_id = form_data.get("trigger_id")
         channel_id = form_data.get("channel_id")
-        is_admin = is_user_admin(user_id)
-        print(f"User: {user_id}, Trigger ID: {trigger_id}, Channel: {channel_id}")
+        logger.debug("User: %s, Trigger ID: %s, Channel: %s", user_id, trigger_id, channel_id)
+
+        if not is_first_delivery(("command", trigger_id)):
+            logger.debug("Duplicate delivery of trigger %s - ignoring", trigger_id)
+            return Response(status=200)
+
+        with metrics.observe_phase("auth", command="slash"):
+            is_admin = is_user_admin(user_id)
+            is_allowed = is_user_allowed(user_id)
         
-        if not is_user_allowed(user_id):
-            print(f"⚠️ User {user_id} is not authorized")
+        if not is_allowed:
+            logger.warning("User %s is not authorized", user_id)
             return jsonify({"response_type": "ephemeral", "text": "❌ Unauthorized"})
         
         if not trigger_id:
-            print("⚠️ Missing trigger ID")
+            logger.warning("Missing trigger ID")
             return jsonify({
                 "response_type": "ephemeral",
                 "text": "⚠️ Missing trigger ID. Please try the command again."
@@ -41,21 +154,24 @@ def handle_slash_command(form_data):
         }
         
         try:
-            print("Opening initial modal...")
+            logger.debug("Opening initial modal...")
             open_initial_modal(trigger_id, channel_id, is_admin)
-            print("✅ Modal opened successfully")
+            logger.debug("Modal opened successfully")
         except Exception as e:
-            print(f"❌ Failed to open modal: {str(e)}")
+            logger.error("Failed to open modal: %s", e)
             response["text"] = "⚠️ Failed to open command panel"
         return jsonify(response)
         
     except Exception as e:
-        print(f"❌ Slash command failed: {str(e)}")
+        logger.error("Slash command failed: %s", e)
         return jsonify({"response_type": "ephemeral", "text": "⚠️ Failed to process command"})
 
+@tracing.traced("command.process")
+@metrics.timed("total")
 def process_command_async(payload):
-    print(f"\n=== Processing command async ===")
-    print(f"Payload received: {json.dumps(payload, indent=2)}")
+    logger.debug("Processing command async")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Payload received: %s", json.dumps(payload, indent=2))
     try:
         view = payload.get("view", {})
         values = view.get("state", {}).get("values", {})
@@ -64,115 +180,132 @@ def process_command_async(payload):
         channel_invoked = metadata.get("channel_id")
         channel_id = "channel_id"
         output = ""
-        print(f"Processing for user: {user_id}, channel: {channel_invoked}")
+        logger.debug("Processing for user: %s, channel: %s", user_id, channel_invoked)
 
         # Get user info for audit before executing commands
-        print("Fetching user info...")
+        logger.debug("Fetching user info...")
         try:
             user_info = client.users_info(user=user_id).get("user", {})
             user_name = user_info.get("real_name", "Unknown User")
-            print(f"User identified: {user_name}")
+            logger.debug("User identified: %s", user_name)
         except Exception:
             user_name = "Unknown User"
-            print("⚠️ Could not fetch user info")
+            logger.warning("Could not fetch user info")
 
         # Extract command details
         command_select = values.get("command_type", {}).get("command_select", {})
         command = command_select.get("selected_option", {}).get("value")
-        print(f"Command selected: {command}")
+        logger.debug("Command selected: %s", command)
+        metrics.current_command.set(command or "invalid")
 
         # Authorization checks
-        if not is_user_allowed(user_id):
-            print(f"❌ User {user_id} not authorized for any commands")
+        with metrics.observe_phase("auth"):
+            is_allowed = is_user_allowed(user_id)
+            is_admin = is_user_admin(user_id) if is_allowed and command in ["scale", "exec", "exec_deployment"] else False
+
+        if not is_allowed:
+            logger.error("User %s not authorized for any commands", user_id)
             send_slack_message(user_id, "❌ You are not authorized to use this bot.")
             return
 
-        if command in ["scale", "exec"] and not is_user_admin(user_id):
-            print(f"❌ User {user_id} not authorized for {command} command")
+        if command in ["scale", "exec", "exec_deployment"] and not is_admin:
+            logger.error("User %s not authorized for %s command", user_id, command)
             send_slack_message(user_id, f"❌ You are not authorized to execute the '{command}' command.")
             return
 
         # Resource selection
         resource_select = values.get("resource_name", {}).get("resource_search", {})
         resource_name = resource_select.get("selected_option", {}).get("value")
-        print(f"Resource selected: {resource_name}")
+        logger.debug("Resource selected: %s", resource_name)
 
         # Validate command
-        valid_commands = ["get", "describe", "restart", "scale", "exec", "pause", "resume"]
+        valid_commands = ["get", "describe", "describe_deployment", "logs", "restart", "scale", "exec",
+                          "exec_deployment", "pause", "resume", "top_pods", "top_nodes"]
         if not command or command not in valid_commands:
-            print(f"❌ Invalid command: {command}")
+            logger.error("Invalid command: %s", command)
             send_slack_message(user_id, "❌ Invalid command")
             return
 
+        if command in ["top_pods", "top_nodes"]:
+            sort_block = values.get("top_sort", {}).get("top_sort_select", {})
+            sort = sort_block.get("selected_option", {}).get("value") or "cpu"
+            kind = "pods" if command == "top_pods" else "nodes"
+            send_command_result(user_id, f":bar_chart: *top {kind}*", render_top(kind, sort), as_code=True)
+            return
+
         if not resource_name and command not in ["pause", "resume"]:
-            print("❌ No resource selected")
+            logger.error("No resource selected")
             send_slack_message(user_id, "❌ Please select a resource from the list")
             return
 
         try:
-            resource_type = "deployment" if command in ["restart", "scale"] else "pod"
-            print(f"Executing {command} on {resource_type}/{resource_name}")
+            resource_type = "deployment" if command in DEPLOYMENT_COMMANDS else "pod"
+            command = DEPLOYMENT_VARIANTS.get(command, command)
+            as_code = False
+            logger.info("Executing %s on %s/%s for user %s", command, resource_type, resource_name, user_id)
 
             if command == "scale":
                 try:
                     # Replica validation
                     replicas_block = values.get("replica_input", {}).get("replica_count", {})
                     replicas_str = replicas_block.get("value", "").strip()
-                    print(f"Replica input: {replicas_str}")
+                    logger.debug("Replica input: %s", replicas_str)
                     
                     if not replicas_str:
-                        print("❌ Missing replica count")
+                        logger.error("Missing replica count")
                         send_slack_message(user_id, "❌ Missing replica count")
                         return
 
                     try:
                         replicas = int(replicas_str)
-                        print(f"Replica count: {replicas}")
+                        logger.debug("Replica count: %s", replicas)
                     except ValueError:
-                        print("❌ Invalid replica number format")
+                        logger.error("Invalid replica number format")
                         send_slack_message(user_id, "❌ Must be a whole number")
                         return
 
                     if not (1 <= replicas <= 10):
-                        print(f"❌ Replica count out of range: {replicas}")
+                        logger.error("Replica count out of range: %s", replicas)
                         send_slack_message(user_id, "❌ Replicas must be 1-10")
                         return
 
                     # HPA Check
                     try:
-                        print(f"Checking HPA for {resource_name}")
+                        logger.debug("Checking HPA for %s", resource_name)
                         hpa = k8s_api.autoscaling_v1.read_namespaced_horizontal_pod_autoscaler(
                             name=resource_name,
                             namespace="default"
                         )
                         if replicas > hpa.spec.max_replicas:
                             msg = f"Cannot exceed HPA max ({hpa.spec.max_replicas} replicas)"
-                            print(f"❌ {msg}")
+                            logger.error(msg)
                             send_slack_message(user_id, f"❌ {msg}")
                             return
                         if replicas < hpa.spec.min_replicas:
                             msg = f"Cannot go below HPA min ({hpa.spec.min_replicas} replicas)"
-                            print(f"❌ {msg}")
+                            logger.error(msg)
                             send_slack_message(user_id, f"❌ {msg}")
                             return
                     except Exception as e:
                         if getattr(e, 'status', None) != 404:
-                            print(f"❌ HPA check failed: {str(e)}")
+                            logger.error("HPA check failed: %s", e)
                             send_slack_message(user_id, "⚠️ HPA verification error")
                             return
 
                     # Execute scaling
                     cmd = f"scale deployment/{resource_name} --replicas={replicas}"
-                    print(f"Executing: {cmd}")
-                    output = execute_safe_kubectl(cmd)
-                    print(f"Scale command output: {output}")
+                    logger.debug("Executing: %s", cmd)
+                    with metrics.observe_phase("kubernetes"):
+                        output = execute_safe_kubectl(cmd)
+                    invalidate_deployment_results(resource_name)
+                    logger.debug("Scale command output: %s", output)
 
                     # Format messages for scale command
-                    user_message = f":white_check_mark: *{command} {resource_type}/{resource_name}*\n{output}"
+                    user_title = f":white_check_mark: *{command} {resource_type}/{resource_name}*"
                     channel_message = f":white_check_mark: {command} {resource_type}/{resource_name}\nExecuted by {user_name}"
 
                 except Exception as e:
-                    print(f"❌ Scale command failed: {str(e)}")
+                    logger.error("Scale command failed: %s", e)
                     send_slack_message(user_id, f"❌ Scale failed: {str(e)}")
                     return
             if command in ["pause", "resume"]:
@@ -180,39 +313,58 @@ def process_command_async(payload):
                     send_slack_message(user_id, "❌ Admin permission required!")
                     return
 
-                cluster = "p-2621-aps1-01"
+                cluster_block = values.get("cluster_select", {}).get("clusters", {})
+                clusters = [o["value"] for o in cluster_block.get("selected_options", [])] or FACETS_CLUSTERS[:1]
                 try:
-                    run_pause_release(
-                        cluster_name=cluster,
-                        pause_releases="true" if command == "pause" else "false"
+                    results = run_pause_release_batch(
+                        clusters,
+                        pause_releases="true" if command == "pause" else "false",
+                        user=user_name
                     )
-                    msg = f"✅ Successfully {command}d releases on {cluster}"
+                    lines = [
+                        f"✅ {command}d releases on `{cluster}`" if error is None else f"❌ `{cluster}`: {error}"
+                        for cluster, error in results.items()
+                    ]
+                    msg = "\n".join(lines)
                 except Exception as e:
                     msg = f"❌ {command} failed: {str(e)}"
                 
                 send_slack_message(user_id, msg)
                 if channel_id:
-                    send_slack_message(channel_id, f"Releases {command}d by <@{user_id}>", True)
+                    send_slack_message(channel_id, f"Releases {command}d on {len(clusters)} clusters by <@{user_id}>", True)
                 return
             
+            elif command == "logs":
+                since = values.get("logs_since", {}).get("logs_since_select", {}).get("selected_option", {}).get("value")
+                pattern = (values.get("logs_pattern", {}).get("logs_pattern_input", {}).get("value") or "").strip()
+                cmd = f"logs deployment/{resource_name} --since={since or 900}"
+                if pattern:
+                    cmd += f" -- {pattern}"
+                with metrics.observe_phase("kubernetes", command=command):
+                    output = execute_safe_kubectl(cmd)
+
+                user_title = f":mag: *logs deployment/{resource_name}*"
+                as_code = True
+                channel_message = f":mag: Searched logs of deployment/{resource_name}\nExecuted by {user_name}"
+
             elif command == "exec":
                 exec_block = values.get("exec_input", {}).get("exec_command", {})
                 exec_command = exec_block.get("value", "").strip()
-                print(f"Command to execute in pod: {exec_command}")
+                logger.debug("Command to execute in pod: %s", exec_command)
                 
                 if not exec_command:
-                    print("❌ No command provided for exec")
+                    logger.error("No command provided for exec")
                     send_slack_message(user_id, "❌ Please provide a command to execute in the pod")
                     return
                 
                 output = execute_command(command, resource_type, resource_name, exec_command)
                 
                 # Format messages for exec command
-                user_message = (
+                user_title = (
                     f":white_check_mark: *Command executed in {resource_type}/{resource_name}*\n"
-                    f"`{exec_command}`\n\n"
-                    f"```{output}```"
+                    f"`{exec_command}`\n"
                 )
+                as_code = True
                 channel_message = (
                     f":white_check_mark: Command executed in {resource_type}/{resource_name}\n"
                     f"Executed by {user_name}\n"
@@ -222,260 +374,360 @@ def process_command_async(payload):
             else:
                 # Non-scale, non-exec commands
                 output = execute_command(command, resource_type, resource_name)
-                print(f"Command output: {output[:200]}...")  # Truncate long output
+                logger.debug("Command output: %s...", output[:200])  # Truncate long output
                 if not output:
                     output = "Command executed successfully (no output returned)"
                 
                 # Format messages for other commands
-                user_message = f":white_check_mark: *{command} {resource_type}/{resource_name}*\n{output}"
+                user_title = f":white_check_mark: *{command} {resource_type}/{resource_name}*"
                 channel_message = f":white_check_mark: {command} {resource_type}/{resource_name}\nExecuted by {user_name}"
 
             # Send messages
-            print(f"Sending DM to user {user_id}")
-            send_slack_message(user_id, user_message)
+            logger.debug("Sending DM to user %s", user_id)
+            send_command_result(user_id, user_title, output, as_code)
 
             if channel_id and channel_id.startswith('C'):
-                print(f"Posting to channel {channel_id}")
+                logger.debug("Posting to channel %s", channel_id)
                 try:
                     send_slack_message(channel_id, channel_message, is_channel_message=True)
-                    print("✅ Channel message sent")
+                    logger.debug("Channel message sent")
                 except SlackApiError as e:
                     if e.response['error'] == 'not_in_channel':
-                        print("⚠️ Bot not in channel - skipping channel message")
+                        logger.warning("Bot not in channel - skipping channel message")
                     else:
-                        print(f"❌ Channel post error: {str(e)}")
+                        logger.error("Channel post error: %s", e)
                 except Exception as e:
-                    print(f"❌ Channel message error: {str(e)}")
+                    logger.error("Channel message error: %s", e)
                     send_slack_message(user_id, "❌ Failed to post to channel")
 
-            print(f"✅ Successfully processed {command} command")
+            logger.info("Successfully processed %s command", command)
 
         except Exception as e:
-            print(f"❌ Command execution error: {str(e)}")
+            logger.error("Command execution error: %s", e)
             send_slack_message(user_id, f"❌ Command failed: {str(e)}")
 
     except Exception as e:
-        print(f"❌ Async processing failed: {str(e)}")
+        logger.error("Async processing failed: %s", e)
         send_slack_message(user_id, "⚠️ Command processing encountered an error")
 
-def open_initial_modal(trigger_id, channel_id, is_admin):
-    print(f"\n=== Opening initial modal ===")
-    print(f"Trigger ID: {trigger_id}, Channel: {channel_id}")
-    try:
-        command_options = [
+def build_initial_modal(channel_id, is_admin):
+    """Initial command modal shown for the slash command"""
+    command_options = [
         {"text": {"type": "plain_text", "text": "Get"}, "value": "get"},
         {"text": {"type": "plain_text", "text": "Describe"}, "value": "describe"},
+        {"text": {"type": "plain_text", "text": "Describe Deployment"}, "value": "describe_deployment"},
+        {"text": {"type": "plain_text", "text": "Logs"}, "value": "logs"},
         {"text": {"type": "plain_text", "text": "Restart"}, "value": "restart"},
-        ]
-        
-        if is_admin:
-            command_options.extend([
-                {"text": {"type": "plain_text", "text": "Scale (in dev)"}, "value": "scale"},
-                {"text": {"type": "plain_text", "text": "Exec"}, "value": "exec"},
-                {"text": {"type": "plain_text", "text": "Pause Release"}, "value": "pause"},
-                {"text": {"type": "plain_text", "text": "Resume Release"}, "value": "resume"}
-            ])
-
-        view = {
-            "type": "modal",
-            "callback_id": "k8s_command",
-            "title": {"type": "plain_text", "text": "Kubernetes Commander"},
-            "submit": {"type": "plain_text", "text": "Execute"},
-            "private_metadata": json.dumps({
-                "channel_id": channel_id,
-                "created_at": datetime.datetime.now().isoformat(),
-                "command": "get",
-                "namespace": "default",
-                "is_admin": is_admin  # Store admin status in metadata
-            }),
-            "blocks": [
-                {
-                    "type": "section",
-                    "text": {"type": "mrkdwn", "text": "*Namespace:* `default`"}
+        {"text": {"type": "plain_text", "text": "Top Pods"}, "value": "top_pods"},
+        {"text": {"type": "plain_text", "text": "Top Nodes"}, "value": "top_nodes"},
+    ]
+
+    if is_admin:
+        command_options.extend([
+            {"text": {"type": "plain_text", "text": "Scale (in dev)"}, "value": "scale"},
+            {"text": {"type": "plain_text", "text": "Exec"}, "value": "exec"},
+            {"text": {"type": "plain_text", "text": "Exec (all replicas)"}, "value": "exec_deployment"},
+            {"text": {"type": "plain_text", "text": "Pause Release"}, "value": "pause"},
+            {"text": {"type": "plain_text", "text": "Resume Release"}, "value": "resume"}
+        ])
+
+    return {
+        "type": "modal",
+        "callback_id": "k8s_command",
+        "title": {"type": "plain_text", "text": "Kubernetes Commander"},
+        "submit": {"type": "plain_text", "text": "Execute"},
+        "private_metadata": json.dumps({
+            "channel_id": channel_id,
+            "created_at": datetime.datetime.now().isoformat(),
+            "command": "get",
+            "namespace": "default",
+            "is_admin": is_admin  # Store admin status in metadata
+        }),
+        "blocks": [
+            {
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": "*Namespace:* `default`"}
+            },
+            {
+                "block_id": "command_type",
+                "type": "input",
+                "element": {
+                    "type": "radio_buttons",
+                    "options": command_options,
+                    "action_id": "command_select"
                 },
-                {
-                    "block_id": "command_type",
-                    "type": "input",
-                    "element": {
-                        "type": "radio_buttons",
-                        "options": command_options,
-                        "action_id": "command_select"
-                    },
-                    "label": {"type": "plain_text", "text": "Select command:"},
-                    "dispatch_action": True
+                "label": {"type": "plain_text", "text": "Select command:"},
+                "dispatch_action": True
+            },
+            {
+                "block_id": "resource_name",
+                "type": "input",
+                "element": {
+                    "type": "external_select",
+                    "action_id": "resource_search",
+                    "placeholder": {"type": "plain_text", "text": "Type at least 3 characters..."},
+                    "min_query_length": 3
                 },
-                {
-                    "block_id": "resource_name",
-                    "type": "input",
-                    "element": {
-                        "type": "external_select",
-                        "action_id": "resource_search",
-                        "placeholder": {"type": "plain_text", "text": "Type at least 3 characters..."},
-                        "min_query_length": 3
-                    },
-                    "label": {"type": "plain_text", "text": "Search resource:"}
-                }
-            ]
-        }
-        client.views_open(trigger_id=trigger_id, view=view)
-        print("✅ Modal view sent successfully")
+                "label": {"type": "plain_text", "text": "Search resource:"}
+            }
+        ]
+    }
+
+@metrics.timed("slack", command="slash")
+def open_initial_modal(trigger_id, channel_id, is_admin):
+    logger.debug("Opening initial modal")
+    logger.debug("Trigger ID: %s, Channel: %s", trigger_id, channel_id)
+    try:
+        client.views_open(trigger_id=trigger_id, view=build_initial_modal(channel_id, is_admin))
+        logger.debug("Modal view sent successfully")
     except SlackApiError as e:
-        print(f"❌ Modal open failed: {e.response['error']}")
+        logger.error("Modal open failed: %s", e.response['error'])
         raise
 
+def resolve_resource_options(payload):
+    """Options for the resource search box of an options/block_suggestion payload"""
+    view = payload.get("view", {})
+    metadata = json.loads(view.get("private_metadata", "{}"))
+    namespace = metadata.get("namespace", "default")
+    command = metadata.get("command")
+    logger.debug("Namespace: %s, Command: %s", namespace, command)
+
+    # Fallback to checking view state values
+    if not command:
+        state_values = view.get("state", {}).get("values", {})
+        command_block = state_values.get("command_type", {}).get("command_select", {})
+        command = command_block.get("selected_option", {}).get("value")
+        logger.debug("Fallback command: %s", command)
+
+    query = payload.get("value", "").strip().lower()
+    logger.debug("Search query: '%s'", query)
+    
+    # Determine resource type based on command
+    if command in DEPLOYMENT_COMMANDS:
+        logger.debug("Searching deployments...")
+        resources = search_deployments(query)
+    else:
+        logger.debug("Searching pods...")
+        resources = search_pods(query)
+
+    logger.debug("Found %s matching resources", len(resources))
+    return [{"text": {"type": "plain_text", "text": res}, "value": res} for res in resources[:100]]
+
+@tracing.traced("slack.options")
+@metrics.timed("total", command="options")
 def handle_options_request(payload):
-    print(f"\n=== Handling options request ===")
+    logger.debug("Handling options request")
     try:
-        print(f"Payload: {json.dumps(payload, indent=2)}")
-        view = payload.get("view", {})
-        metadata = json.loads(view.get("private_metadata", "{}"))
-        namespace = metadata.get("namespace", "default")
-        command = metadata.get("command")
-        print(f"Namespace: {namespace}, Command: {command}")
-
-        # Fallback to checking view state values
-        if not command:
-            state_values = view.get("state", {}).get("values", {})
-            command_block = state_values.get("command_type", {}).get("command_select", {})
-            command = command_block.get("selected_option", {}).get("value")
-            print(f"Fallback command: {command}")
-
-        query = payload.get("value", "").strip().lower()
-        print(f"Search query: '{query}'")
-        
-        # Determine resource type based on command
-        if command in ["restart", "scale"]:
-            print("Searching deployments...")
-            resources = search_deployments(query)
-        else:
-            print("Searching pods...")
-            resources = search_pods(query)
-
-        print(f"Found {len(resources)} matching resources")
-        return jsonify({
-            "options": [{"text": {"type": "plain_text", "text": res}, "value": res} for res in resources[:100]]
-        })
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Payload: %s", json.dumps(payload, indent=2))
+        return jsonify({"options": resolve_resource_options(payload)})
     except Exception as e:
-        print(f"❌ Options request failed: {str(e)}")
+        logger.error("Options request failed: %s", e)
         return jsonify({"options": []})
 
+def build_command_view(view, new_command):
+    """Modal view updated for a newly selected command"""
+    # Keep all blocks except conditional ones
+    blocks = [b for b in view["blocks"] if b.get("block_id") not in [
+        "warning_block", "replica_input", "exec_input", "release_warning", "cluster_select", "top_sort",
+        "logs_since", "logs_pattern"]]
+    
+    # Remove resource selection for commands without a target resource
+    if new_command in ["pause", "resume", "top_pods", "top_nodes"]:
+        blocks = [b for b in blocks if b.get("block_id") != "resource_name"]
+
+    if new_command == "restart":
+        logger.debug("Adding restart warning block")
+        warning_block = {
+            "type": "section",
+            "block_id": "warning_block",
+            "text": {
+                "type": "mrkdwn",
+                "text": ":warning: *You are restarting a pod in the production environment. Proceed with caution.*"
+            }
+        }
+        insert_index = next((i for i, b in enumerate(blocks) if b.get("block_id") == "command_type"), len(blocks)) + 1
+        blocks.insert(insert_index, warning_block)
+
+    if new_command in ["pause", "resume"]:
+        blocks.append({
+            "type": "section",
+            "block_id": "release_warning",
+            "text": {
+                "type": "mrkdwn",
+                "text": f"⚠️ *You are about to {new_command} production releases!*"
+            }
+        })
+        cluster_options = [{"text": {"type": "plain_text", "text": c}, "value": c} for c in FACETS_CLUSTERS]
+        blocks.append({
+            "type": "input",
+            "block_id": "cluster_select",
+            "element": {
+                "type": "multi_static_select",
+                "action_id": "clusters",
+                "options": cluster_options,
+                "initial_options": cluster_options[:1],
+                "placeholder": {"type": "plain_text", "text": "Select clusters"}
+            },
+            "label": {"type": "plain_text", "text": "Clusters"}
+        })
+
+    if new_command in ["top_pods", "top_nodes"]:
+        sort_options = [{"text": {"type": "plain_text", "text": label}, "value": value}
+                        for value, label in SORT_LABELS.items()]
+        blocks.append({
+            "type": "input",
+            "block_id": "top_sort",
+            "element": {
+                "type": "static_select",
+                "action_id": "top_sort_select",
+                "options": sort_options,
+                "initial_option": sort_options[0]
+            },
+            "label": {"type": "plain_text", "text": "Sort by"}
+        })
+
+    if new_command == "logs":
+        since_options = [{"text": {"type": "plain_text", "text": label}, "value": value}
+                         for value, label in LOGS_SINCE_CHOICES]
+        blocks.append({
+            "type": "input",
+            "block_id": "logs_since",
+            "element": {
+                "type": "static_select",
+                "action_id": "logs_since_select",
+                "options": since_options,
+                "initial_option": since_options[1]
+            },
+            "label": {"type": "plain_text", "text": "Since"}
+        })
+        blocks.append({
+            "type": "input",
+            "block_id": "logs_pattern",
+            "optional": True,
+            "element": {
+                "type": "plain_text_input",
+                "action_id": "logs_pattern_input",
+                "max_length": 200,
+                "placeholder": {"type": "plain_text", "text": "Regular expression, e.g. ERROR|timeout"}
+            },
+            "label": {"type": "plain_text", "text": "Pattern"}
+        })
+
+    if new_command == "scale":
+        logger.debug("Adding replica input block")
+        blocks.append({
+            "type": "input",
+            "block_id": "replica_input",
+            "element": {
+                "type": "plain_text_input",
+                "action_id": "replica_count",
+                "placeholder": {"type": "plain_text", "text": "Enter number of replicas"}
+            },
+            "label": {"type": "plain_text", "text": "Replicas"}
+        })
+    
+    if new_command in ["exec", "exec_deployment"]:
+        logger.debug("Adding user command input block")
+        blocks.append({
+            "type": "input",
+            "block_id": "exec_input",
+            "element": {
+                "type": "plain_text_input",
+                "action_id": "exec_command",
+                "placeholder": {"type": "plain_text", "text": "Enter the command to execute inside the pod"}
+            },
+            "label": {"type": "plain_text", "text": "Command to execute"}
+        })
+
+    return {
+        "type": "modal",
+        "callback_id": view["callback_id"],
+        "title": view["title"],
+        "blocks": blocks,
+        "private_metadata": json.dumps({
+            **json.loads(view["private_metadata"]),
+            "command": new_command
+        }),
+        "submit": view["submit"]
+    }
+
+@tracing.traced("slack.interaction")
 def handle_interaction(form_data):
-    print(f"\n=== Handling interaction ===")
-    print(f"Form data: {form_data}")
+    logger.debug("Handling interaction")
+    logger.debug("Form data: %s", form_data)
     try:
         payload_str = form_data.get("payload")
         if not payload_str:
-            print("⚠️ Empty payload received")
+            logger.warning("Empty payload received")
             return jsonify({"response_type": "ephemeral", "text": "Empty request"})
 
         payload = json.loads(payload_str)
-        print(f"Interaction type: {payload.get('type')}")
+        logger.debug("Interaction type: %s", payload.get('type'))
 
         if payload.get("type") == "block_actions":
+            if not is_first_delivery(("action", payload.get("trigger_id"))):
+                logger.debug("Duplicate block action delivery - ignoring")
+                return Response(status=200)
+
             action = payload["actions"][0]
-            print(f"Action ID: {action['action_id']}")
+            logger.debug("Action ID: %s", action['action_id'])
+            if action["action_id"] in PAGE_ACTIONS:
+                update = page_update(payload, action)
+                if update:
+                    with metrics.observe_phase("slack", command="page"):
+                        client.chat_update(**update)
+                return Response(status=200)
+
             # Modify the command_select handler section to:
             if action["action_id"] == "command_select":
                 view = payload["view"]
                 new_command = action["selected_option"]["value"]
-                print(f"Command changed to: {new_command}")
-                
-                # Keep all blocks except conditional ones
-                blocks = [b for b in view["blocks"] if b.get("block_id") not in [
-                    "warning_block", "replica_input", "exec_input"]]
+                logger.debug("Command changed to: %s", new_command)
                 
-                # Remove resource selection for pause/resume commands
-                if new_command in ["pause", "resume"]:
-                    blocks = [b for b in blocks if b.get("block_id") != "resource_name"]
-
-                if new_command == "restart":
-                    print("Adding restart warning block")
-                    warning_block = {
-                        "type": "section",
-                        "block_id": "warning_block",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": ":warning: *You are restarting a pod in the production environment. Proceed with caution.*"
-                        }
-                    }
-                    insert_index = next((i for i, b in enumerate(blocks) if b.get("block_id") == "command_type"), len(blocks)) + 1
-                    blocks.insert(insert_index, warning_block)
-
-                if new_command in ["pause", "resume"]:
-                    blocks.append({
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": f"⚠️ *You are about to {new_command} production releases!*"
-                        }
-                    })
-
-                if new_command == "scale":
-                    print("Adding replica input block")
-                    blocks.append({
-                        "type": "input",
-                        "block_id": "replica_input",
-                        "element": {
-                            "type": "plain_text_input",
-                            "action_id": "replica_count",
-                            "placeholder": {"type": "plain_text", "text": "Enter number of replicas"}
-                        },
-                        "label": {"type": "plain_text", "text": "Replicas"}
-                    })
-                
-                if new_command == "exec":
-                    print("Adding user command input block")
-                    blocks.append({
-                        "type": "input",
-                        "block_id": "exec_input",
-                        "element": {
-                            "type": "plain_text_input",
-                            "action_id": "exec_command",
-                            "placeholder": {"type": "plain_text", "text": "Enter the command to execute inside the pod"}
-                        },
-                        "label": {"type": "plain_text", "text": "Command to execute"}
-                    })
-
-                print("Updating modal view...")
-                client.views_update(
-                    view_id=view["id"],
-                    hash=view["hash"],
-                    view={
-                        "type": "modal",
-                        "callback_id": view["callback_id"],
-                        "title": view["title"],
-                        "blocks": blocks,
-                        "private_metadata": json.dumps({
-                            **json.loads(view["private_metadata"]),
-                            "command": new_command
-                        }),
-                        "submit": view["submit"]
-                    }
-                )
+                logger.debug("Updating modal view...")
+                with metrics.observe_phase("slack", command="select"):
+                    client.views_update(
+                        view_id=view["id"],
+                        hash=view["hash"],
+                        view=build_command_view(view, new_command)
+                    )
                 return Response(status=200)
 
         if payload.get("type") == "view_submission":
-            print("Handling view submission")
+            logger.debug("Handling view submission")
             if not all(key in payload for key in ["user", "view"]):
-                print("⚠️ Invalid payload structure")
+                logger.warning("Invalid payload structure")
                 return jsonify({"response_action": "errors", "errors": {"_": "Invalid payload structure"}})
+
+            # Limits are checked before dedup so a rejected modal can be resubmitted
+            error, release = admit_submission(payload)
+            if error:
+                return jsonify({"response_action": "errors", "errors": {"command_type": error}})
+
+            if not is_first_delivery(("view", payload["view"].get("id"))):
+                logger.debug("Duplicate submission of view %s - ignoring", payload['view'].get('id'))
+                if release:
+                    release()
+                return Response(response=json.dumps({"response_action": "clear"}), status=200, mimetype='application/json')
             
-            print("Starting async processing...")
-            threading.Thread(target=process_command_async, args=(payload,)).start()
+            logger.debug("Starting async processing...")
+            command_executor.submit(process_admitted_command, payload, release)
             return Response(response=json.dumps({"response_action": "clear"}), status=200, mimetype='application/json')
 
         return Response(status=200)
     
     except json.JSONDecodeError:
-        print("❌ Invalid JSON payload")
+        logger.error("Invalid JSON payload")
         return jsonify({"response_type": "ephemeral", "text": "Invalid payload format"})
     except Exception as e:
-        print(f"❌ Interaction handler failed: {str(e)}")
+        logger.error("Interaction handler failed: %s", e)
         return jsonify({"response_type": "ephemeral", "text": "Processing started (check logs for errors)"})
         
+@tracing.traced("command.execute")
 def execute_command(command, resource_type, resource_name, exec_command=None):
-    print(f"\n=== Executing command ===")
-    print(f"Command: {command}, Resource: {resource_type}/{resource_name}")
+    logger.debug("Executing command")
+    logger.debug("Command: %s, Resource: %s/%s", command, resource_type, resource_name)
     try:
         if command == "get":
             resource_type = {"pod": "pods", "deployment": "deployments"}.get(resource_type, resource_type)
@@ -493,34 +745,123 @@ def execute_command(command, resource_type, resource_name, exec_command=None):
         else:
             raise ValueError(f"Unsupported command: {command}")
 
-        print(f"Executing: {cmd}")
-        result = execute_safe_kubectl(cmd)
-        print(f"Command executed successfully")
+        logger.debug("Executing: %s", cmd)
+        if command in READ_ONLY_COMMANDS:
+            key = (CLUSTER_NAME, "default", command, resource_type, resource_name)
+            with metrics.observe_phase("kubernetes", command=command):
+                result, age = result_cache.get_or_load(key, lambda: execute_safe_kubectl(cmd))
+            if age is not None:
+                logger.debug("Serving cached result (%.1fs old)", age)
+                result = f"{result}\n_(cached result, {int(age)}s old)_"
+        else:
+            with metrics.observe_phase("kubernetes", command=command):
+                result = execute_safe_kubectl(cmd)
+            if command == "restart":
+                invalidate_deployment_results(resource_name)
+        logger.debug("Command executed successfully")
         return result
 
     except Exception as e:
-        print(f"❌ Command execution failed: {str(e)}")
+        logger.error("Command execution failed: %s", e)
         return f"Error: {str(e)}"
 
-def send_slack_message(channel, text, is_channel_message=False):
-    print(f"\n=== Sending Slack message ===")
-    print(f"Channel: {channel}, Is channel: {is_channel_message}")
-    print(f"Message content: {text[:200]}...")  # Truncate long messages
+@metrics.timed("slack")
+def send_slack_message(channel, text, is_channel_message=False, blocks=None):
+    logger.debug("Sending Slack message")
+    logger.debug("Channel: %s, Is channel: %s", channel, is_channel_message)
+    logger.debug("Message content: %s...", text[:200])  # Truncate long messages
     try:
         if is_channel_message and channel.startswith('C'):
             try:
-                print("Posting to channel...")
+                logger.debug("Posting to channel...")
                 return client.chat_postMessage(channel=channel, text=text, mrkdwn=True)
             except SlackApiError as e:
                 if e.response['error'] == 'not_in_channel':
-                    print("⚠️ Bot not in channel - skipping")
+                    logger.warning("Bot not in channel - skipping")
                     return None
-                print(f"❌ Channel post error: {str(e)}")
+                logger.error("Channel post error: %s", e)
                 raise
         
-        print("Sending direct message...")
-        return client.chat_postMessage(channel=channel, text=text, mrkdwn=True)
+        logger.debug("Sending direct message...")
+        return client.chat_postMessage(channel=channel, text=text, mrkdwn=True, blocks=blocks)
         
     except Exception as e:
-        print(f"❌ Failed to send Slack message: {str(e)}")
-        return None
\ No newline at end of file
+        logger.error("Failed to send Slack message: %s", e)
+        return None
+
+PAGE_ACTIONS = ("page_prev", "page_next")
+
+def split_pages(text, page_size=PAGE_SIZE):
+    """Split text into pages of at most page_size characters, on line boundaries where possible"""
+    pages, current, size = [], [], 0
+    for line in text.splitlines():
+        while len(line) > page_size:
+            if current:
+                pages.append("\n".join(current))
+                current, size = [], 0
+            pages.append(line[:page_size])
+            line = line[page_size:]
+        if current and size + len(line) + 1 > page_size:
+            pages.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        pages.append("\n".join(current))
+    return pages or [""]
+
+def build_result_page(cursor, entry, page):
+    """Message text and blocks for one page of a stored result"""
+    pages = entry["pages"]
+    body = f"```{pages[page]}```" if entry["code"] else pages[page]
+    buttons = []
+    if page > 0:
+        buttons.append({"type": "button", "action_id": "page_prev",
+                        "text": {"type": "plain_text", "text": "◀ Prev"}, "value": f"{cursor}:{page - 1}"})
+    if page < len(pages) - 1:
+        buttons.append({"type": "button", "action_id": "page_next",
+                        "text": {"type": "plain_text", "text": "Next ▶"}, "value": f"{cursor}:{page + 1}"})
+    blocks = [
+        {"type": "section", "text": {"type": "mrkdwn", "text": entry["title"]}},
+        {"type": "section", "text": {"type": "mrkdwn", "text": body}},
+        {"type": "context", "elements": [{"type": "mrkdwn", "text": f"Page {page + 1} of {len(pages)}"}]},
+    ]
+    if buttons:
+        # Slack rejects an actions block without elements
+        blocks.append({"type": "actions", "block_id": "result_pages", "elements": buttons})
+    return f"{entry['title']}\n{body}", blocks
+
+def send_command_result(user_id, title, output, as_code=False):
+    """DM a command result, paging it through result_pages when it is too long for one message"""
+    pages = split_pages(output) if len(output) > PAGE_SIZE else [output]
+    if len(pages) == 1:
+        body = f"```{pages[0]}```" if as_code else pages[0]
+        return send_slack_message(user_id, f"{title}\n{body}")
+
+    entry = {"title": title, "pages": pages, "code": as_code, "owner": user_id}
+    cursor = result_pages.put(entry)
+    logger.debug("Stored %d result pages under cursor %s", len(entry["pages"]), cursor)
+    text, blocks = build_result_page(cursor, entry, 0)
+    return send_slack_message(user_id, text, blocks=blocks)
+
+def page_update(payload, action):
+    """chat_update arguments for a next/prev page click, or None if there is nothing to update"""
+    container = payload.get("container", {})
+    update = {"channel": container.get("channel_id"), "ts": container.get("message_ts")}
+    cursor, _, page = action["value"].rpartition(":")
+    entry = result_pages.get(cursor)
+    if entry is not None and entry["owner"] != payload.get("user", {}).get("id"):
+        return None
+    if entry is None:
+        # Keep the page on screen; only swap the buttons for a note
+        message = payload.get("message", {})
+        if not message.get("blocks"):
+            return None
+        update["text"] = message.get("text", "")
+        update["blocks"] = [block for block in message["blocks"] if block.get("block_id") != "result_pages"]
+        update["blocks"].append({"type": "context", "elements": [{
+            "type": "mrkdwn", "text": "⌛ Paging has expired. Run the command again to see the rest."}]})
+        return update
+    page = min(max(int(page), 0), len(entry["pages"]) - 1)
+    update["text"], update["blocks"] = build_result_page(cursor, entry, page)
+    return update
@@ -0,0 +1,262 @@
+"""Sleep/wake transitions for SleepSchedule objects, run by the leader's scheduler.
+
+A SleepSchedule (snorlax.nyc/v1alpha1, kubernetes/snorlax/sleepschedule-crd.yaml)
+names deployments and two cron expressions. Every SLEEP_SYNC_INTERVAL seconds
+the schedules in SLEEP_NAMESPACES are listed and one APScheduler cron job per
+transition is added, replaced or removed to match.
+
+Sleep scales each deployment to 0 with a single patch. The same patch stores the
+current replica count in the snorlax.nyc/prior-replicas annotation, with the
+deployment's resourceVersion as a precondition. Wake restores that count and
+removes the annotation in one patch. Sleep skips deployments already at 0 or
+already annotated, and wake skips deployments without the annotation, so a
+repeated or missed transition never overwrites a recorded count.
+
+Deployments of one transition are scaled concurrently on the sleep pool, and
+all writes are paced by a shared token bucket.
+
+Configuration:
+    SLEEP_NAMESPACES      comma-separated namespaces to read schedules from (default "default")
+    SLEEP_SYNC_INTERVAL   seconds between schedule re-lists (default 60)
+    SLEEP_WORKERS         deployments scaled at once (default 8)
+    SLEEP_SCALE_RATE      deployment reads+writes per second across all transitions (default 5)
+    SLEEP_NOTIFY_CHANNEL  channel ID for a summary of each transition; off when unset
+
+This replaces the Snorlax operator (snorlax.moonbeam.nyc/v1beta1, clock-time
+wakeTime/sleepTime), which is no longer deployed; its example schedule in
+kubernetes/snorlax/crds/sleepschedule.yaml was migrated to this CRD.
+
+Runs in the elected leader only.
+"""
+import os
+import time
+import logging
+import datetime
+import threading
+from concurrent.futures import wait
+from apscheduler.triggers.cron import CronTrigger
+from kubernetes.client.exceptions import ApiException
+from jarvis import metrics, tracing
+from jarvis.executor import CommandExecutor
+from jarvis.kubectl import k8s_api
+from jarvis.ratelimit import TokenBucket
+from jarvis.slack_handler import send_slack_message
+
+logger = logging.getLogger(__name__)
+
+SLEEP_NAMESPACES = [ns.strip() for ns in os.getenv("SLEEP_NAMESPACES", "default").split(",") if ns.strip()]
+SLEEP_SYNC_INTERVAL = int(os.getenv("SLEEP_SYNC_INTERVAL", "60"))
+SLEEP_SCALE_RATE = float(os.getenv("SLEEP_SCALE_RATE", "5"))
+SLEEP_NOTIFY_CHANNEL = os.getenv("SLEEP_NOTIFY_CHANNEL", "")
+SLEEP_TRANSITION_TIMEOUT = 300
+# A transition missed while no leader was running still runs if the bot is back within this
+SLEEP_MISFIRE_GRACE = 600
+
+GROUP, VERSION, PLURAL = "snorlax.nyc", "v1alpha1", "sleepschedules"
+PRIOR_REPLICAS_ANNOTATION = "snorlax.nyc/prior-replicas"
+JOB_PREFIX = "sleepschedule:"
+
+sleep_executor = CommandExecutor(max_workers=int(os.getenv("SLEEP_WORKERS", "8")), name="sleep")
+metrics.register_executor(sleep_executor.stats)
+
+
+class Pacer:
+    """Blocking token bucket shared by every scaling task"""
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._bucket = TokenBucket(self.capacity, time.monotonic())
+        self._lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self._lock:
+                delay = self._bucket.take(self.rate, self.capacity, time.monotonic())
+            if not delay:
+                return
+            time.sleep(delay)
+
+
+pacer = Pacer(SLEEP_SCALE_RATE)
+
+
+def sleep_deployment(name, namespace):
+    """Scale one deployment to 0, recording its replicas; returns a short outcome"""
+    pacer.wait()
+    deployment = k8s_api.apps_v1.read_namespaced_deployment(name, namespace)
+    annotations = deployment.metadata.annotations or {}
+    if PRIOR_REPLICAS_ANNOTATION in annotations:
+        return f"already asleep ({annotations[PRIOR_REPLICAS_ANNOTATION]} replicas recorded)"
+    replicas = deployment.spec.replicas or 0
+    if replicas == 0:
+        return "skipped: already at 0 replicas"
+    pacer.wait()
+    k8s_api.apps_v1.patch_namespaced_deployment(name, namespace, {
+        "metadata": {
+            "annotations": {PRIOR_REPLICAS_ANNOTATION: str(replicas)},
+            # Fails with 409 if the deployment changed since the read, so the recorded count is the one being replaced
+            "resourceVersion": deployment.metadata.resource_version,
+        },
+        "spec": {"replicas": 0},
+    })
+    return f"scaled {replicas} → 0"
+
+
+def wake_deployment(name, namespace):
+    """Restore one deployment to its recorded replicas; returns a short outcome"""
+    pacer.wait()
+    deployment = k8s_api.apps_v1.read_namespaced_deployment(name, namespace)
+    prior = (deployment.metadata.annotations or {}).get(PRIOR_REPLICAS_ANNOTATION)
+    if prior is None:
+        return "skipped: not put to sleep by a schedule"
+    replicas = int(prior)
+    pacer.wait()
+    k8s_api.apps_v1.patch_namespaced_deployment(name, namespace, {
+        "metadata": {
+            "annotations": {PRIOR_REPLICAS_ANNOTATION: None},
+            "resourceVersion": deployment.metadata.resource_version,
+        },
+        "spec": {"replicas": replicas},
+    })
+    return f"scaled {deployment.spec.replicas or 0} → {replicas}"
+
+
+TRANSITIONS = {"sleep": sleep_deployment, "wake": wake_deployment}
+
+
+def scale_all(action, deployments, namespace, timeout=SLEEP_TRANSITION_TIMEOUT):
+    """Run one transition over deployments concurrently; returns {name: (ok, outcome)}"""
+    step = TRANSITIONS[action]
+    futures = {sleep_executor.submit(step, name, namespace): name for name in deployments}
+    done, not_done = wait(futures, timeout=timeout)
+    results = {}
+    for future, name in futures.items():
+        if future in not_done:
+            future.cancel()
+            results[name] = (False, "timed out")
+            continue
+        try:
+            results[name] = (True, future.result())
+        except ApiException as e:
+            results[name] = (False, f"{e.status} {e.reason}")
+        except Exception as e:
+            results[name] = (False, str(e))
+    return results
+
+
+def format_transition(schedule, namespace, action, results):
+    failed = sum(1 for ok, _ in results.values() if not ok)
+    icon = ":zzz:" if action == "sleep" else ":sunrise:"
+    lines = [f"{icon} *{action.capitalize()}* `{namespace}/{schedule}`: "
+             f"{len(results) - failed} of {len(results)} deployments done"]
+    for name, (ok, outcome) in sorted(results.items()):
+        lines.append(f"{'•' if ok else '✗'} {name}: {outcome}")
+    return "\n".join(lines)
+
+
+def _update_status(schedule, namespace, action, results):
+    failed = sorted(name for name, (ok, _) in results.items() if not ok)
+    status = {
+        "state": "sleeping" if action == "sleep" else "awake",
+        "lastTransitionTime": datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "message": f"{action}: {len(results) - len(failed)} of {len(results)} deployments done"
+                   + (f", failed: {', '.join(failed)}" if failed else ""),
+    }
+    try:
+        k8s_api.custom_metrics.patch_namespaced_custom_object_status(
+            GROUP, VERSION, namespace, PLURAL, schedule, {"status": status}
+        )
+    except Exception as e:
+        logger.warning("Failed to update status of SleepSchedule %s/%s: %s", namespace, schedule, e)
+
+
+def run_transition(schedule, namespace, action):
+    """Scheduled job: apply one schedule's sleep or wake to its current deployment list"""
+    try:
+        obj = k8s_api.custom_metrics.get_namespaced_custom_object(GROUP, VERSION, namespace, PLURAL, schedule)
+    except Exception as e:
+        logger.warning("SleepSchedule %s/%s unavailable for %s: %s", namespace, schedule, action, e)
+        return
+    deployments = [d["name"] for d in obj.get("spec", {}).get("deployments", []) if d.get("name")]
+    if not deployments:
+        logger.info("SleepSchedule %s/%s lists no deployments, nothing to %s", namespace, schedule, action)
+        return
+
+    with tracing.span(f"sleepschedule.{action}", schedule=f"{namespace}/{schedule}"):
+        results = scale_all(action, deployments, namespace)
+    failed = [name for name, (ok, _) in results.items() if not ok]
+    logger.info("SleepSchedule %s/%s %s: %d deployments, %d failed %s",
+                namespace, schedule, action, len(results), len(failed), failed)
+    _update_status(schedule, namespace, action, results)
+    if SLEEP_NOTIFY_CHANNEL:
+        try:
+            send_slack_message(SLEEP_NOTIFY_CHANNEL, format_transition(schedule, namespace, action, results),
+                               is_channel_message=True)
+        except Exception as e:
+            logger.error("Failed to post %s summary for %s/%s: %s", action, namespace, schedule, e)
+
+
+def desired_jobs(schedules, default_timezone):
+    """{job_id: (trigger, kwargs, signature)} for the listed SleepSchedule objects"""
+    jobs = {}
+    for obj in schedules:
+        namespace, name = obj["metadata"]["namespace"], obj["metadata"]["name"]
+        spec = obj.get("spec", {})
+        timezone = spec.get("timezone") or default_timezone
+        for action in TRANSITIONS:
+            expression = spec.get(action)
+            if not expression:
+                continue
+            try:
+                trigger = CronTrigger.from_crontab(expression, timezone=timezone)
+            except Exception as e:
+                logger.warning("SleepSchedule %s/%s has an invalid %s schedule %r: %s",
+                               namespace, name, action, expression, e)
+                continue
+            jobs[f"{JOB_PREFIX}{namespace}/{name}:{action}"] = (
+                trigger,
+                {"schedule": name, "namespace": namespace, "action": action},
+                (expression, str(timezone)),
+            )
+    return jobs
+
+
+# job_id -> (expression, timezone) of the jobs currently scheduled, to leave unchanged ones alone
+_scheduled = {}
+
+
+def sync_schedules(scheduler):
+    """Make the scheduler's SleepSchedule jobs match the objects in the cluster"""
+    schedules = []
+    for namespace in SLEEP_NAMESPACES:
+        try:
+            listing = k8s_api.custom_metrics.list_namespaced_custom_object(GROUP, VERSION, namespace, PLURAL)
+        except Exception as e:
+            # A failed list (API error or unreachable server) keeps the current jobs rather than dropping them
+            logger.warning("Failed to list SleepSchedules in %s: %s", namespace, e)
+            return
+        schedules.extend(listing.get("items", []))
+
+    jobs = desired_jobs(schedules, scheduler.timezone)
+    for job_id in _scheduled.keys() - jobs.keys():
+        scheduler.remove_job(job_id)
+        del _scheduled[job_id]
+        logger.info("Removed %s", job_id)
+    for job_id, (trigger, kwargs, signature) in jobs.items():
+        if _scheduled.get(job_id) == signature:
+            continue
+        scheduler.add_job(
+            run_transition, trigger, kwargs=kwargs, id=job_id, replace_existing=True,
+            misfire_grace_time=SLEEP_MISFIRE_GRACE, coalesce=True, max_instances=1
+        )
+        _scheduled[job_id] = signature
+        logger.info("Scheduled %s at %r (%s)", job_id, *signature)
+
+
+def start_sleep_schedules(scheduler):
+    """Re-list SleepSchedules on the leader's scheduler, starting now"""
+    scheduler.add_job(
+        sync_schedules, "interval", args=[scheduler], seconds=SLEEP_SYNC_INTERVAL,
+        id=f"{JOB_PREFIX}sync", next_run_time=datetime.datetime.now(scheduler.timezone), max_instances=1
+    )
+    logger.info("SleepSchedule sync started for %s every %ss", ",".join(SLEEP_NAMESPACES), SLEEP_SYNC_INTERVAL)
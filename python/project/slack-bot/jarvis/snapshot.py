@@ -0,0 +1,201 @@
+"""Versioned binary snapshot of resource names, shared between workers via mmap.
+
+Layout (little endian)::
+
+    header   magic "JVSN" | version u16 | section count u16 | generation u64
+             | created_at f64 | flags u32
+    table    per section: kind 16s | count u32 | offsets pos u32 | blob pos u32 | blob len u32
+    offsets  per section: count + 1 u32 offsets into the blob
+    blob     per section: b"\\n" + b"\\n".join(names) + b"\\n"
+
+Kubernetes object names are lowercase DNS-1123 labels, so the blob doubles as
+the lowercase search index and lookups run directly against the mapped bytes.
+The writer builds a complete file next to the target and os.replace()s it in;
+readers notice the new inode and remap, so a reader never sees a partial file.
+FLAG_STALE marks a snapshot restored from disk at startup rather than built
+from a live listing.
+"""
+import os
+import mmap
+import struct
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"JVSN"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQdI")
+SECTION = struct.Struct("<16sIIII")
+OFFSET = struct.Struct("<I")
+
+FLAG_STALE = 0x1
+
+
+def _encode(names):
+    blob = b"\n" + b"\n".join(name.lower().encode() for name in names) + b"\n"
+    offsets = []
+    position = 1
+    for name in names:
+        offsets.append(position)
+        position += len(name.encode()) + 1
+    offsets.append(position)
+    return blob, offsets
+
+
+def read_generation(path):
+    """Generation of the snapshot currently at path, or 0 if there is none"""
+    try:
+        with open(path, "rb") as f:
+            magic, version, _, generation, _, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic == MAGIC and version == VERSION:
+            return generation
+    except (OSError, struct.error):
+        pass
+    return 0
+
+
+def write_snapshot(path, sections, flags=0, created_at=None):
+    """Atomically replace the snapshot at path; returns the new generation
+
+    ``sections`` maps a kind (e.g. "pods") to its list of names. ``created_at``
+    defaults to now; a restored snapshot keeps the time its names were listed.
+    """
+    generation = read_generation(path) + 1
+    encoded = [(kind, *_encode(names), len(names)) for kind, names in sections.items()]
+
+    position = HEADER.size + SECTION.size * len(encoded)
+    table = []
+    for kind, blob, offsets, count in encoded:
+        offsets_pos = position
+        blob_pos = offsets_pos + OFFSET.size * len(offsets)
+        table.append((kind, count, offsets_pos, blob_pos, len(blob)))
+        position = blob_pos + len(blob)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(encoded), generation, created_at or time.time(), flags))
+        for kind, count, offsets_pos, blob_pos, blob_len in table:
+            f.write(SECTION.pack(kind.encode(), count, offsets_pos, blob_pos, blob_len))
+        for _, blob, offsets, _ in encoded:
+            f.write(b"".join(OFFSET.pack(o) for o in offsets))
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return generation
+
+
+def read_sections(path):
+    """(names per kind, created_at, flags) of the snapshot at path, or None if it is missing or unreadable"""
+    try:
+        snapshot = _MappedSnapshot(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning("Failed to read snapshot %s: %s", path, e)
+        return None
+    return {kind: snapshot.names(kind) for kind in snapshot.sections}, snapshot.created_at, snapshot.flags
+
+
+class _MappedSnapshot:
+    """One immutable mapping of a snapshot file"""
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns)
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, self.generation, self.created_at, self.flags = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported snapshot format in {path}")
+        self.sections = {}
+        for i in range(count):
+            kind, n, offsets_pos, blob_pos, blob_len = SECTION.unpack_from(self.mm, HEADER.size + i * SECTION.size)
+            self.sections[kind.rstrip(b"\0").decode()] = (n, offsets_pos, blob_pos, blob_pos + blob_len)
+
+    @property
+    def stale(self):
+        return bool(self.flags & FLAG_STALE)
+
+    def name_at(self, kind, index):
+        _, offsets_pos, blob_pos, _ = self.sections[kind]
+        start, = OFFSET.unpack_from(self.mm, offsets_pos + index * OFFSET.size)
+        end, = OFFSET.unpack_from(self.mm, offsets_pos + (index + 1) * OFFSET.size)
+        return self.mm[blob_pos + start:blob_pos + end - 1].decode()
+
+    def _name_around(self, start, end, pos):
+        name_start = self.mm.rfind(b"\n", start, pos + 1) + 1
+        name_end = self.mm.find(b"\n", pos, end)
+        return name_start, name_end
+
+    def search(self, kind, pattern, limit):
+        """Exact match, else prefix matches, else substring matches"""
+        if kind not in self.sections or not pattern:
+            return []
+        _, _, start, end = self.sections[kind]
+        needle = pattern.lower().encode()
+        mm = self.mm
+
+        if mm.find(b"\n" + needle + b"\n", start, end) != -1:
+            return [pattern.lower()]
+
+        matches = []
+        pos = mm.find(b"\n" + needle, start, end)
+        while pos != -1 and len(matches) < limit:
+            name_end = mm.find(b"\n", pos + 1, end)
+            matches.append(mm[pos + 1:name_end].decode())
+            pos = mm.find(b"\n" + needle, name_end, end)
+        if matches:
+            return matches
+
+        pos = mm.find(needle, start, end)
+        while pos != -1 and len(matches) < limit:
+            name_start, name_end = self._name_around(start, end, pos)
+            matches.append(mm[name_start:name_end].decode())
+            pos = mm.find(needle, name_end, end)
+        return matches
+
+    def names(self, kind):
+        if kind not in self.sections:
+            return []
+        n = self.sections[kind][0]
+        return [self.name_at(kind, i) for i in range(n)]
+
+
+class SnapshotReader:
+    """Zero-copy view of the latest snapshot, remapped when the file is swapped"""
+    def __init__(self, path, recheck_interval=1.0):
+        self.path = path
+        self.recheck_interval = recheck_interval
+        self._current = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Latest mapping, or None if no snapshot has been written yet"""
+        now = time.monotonic()
+        if now - self._checked_at < self.recheck_interval:
+            return self._current
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._checked_at = now
+                return self._current
+            identity = (stat.st_ino, stat.st_mtime_ns)
+            if self._current is None or self._current.identity != identity:
+                try:
+                    # The previous mapping is left to the GC so in-flight searches stay valid
+                    self._current = _MappedSnapshot(self.path)
+                    logger.debug("Mapped snapshot generation %d", self._current.generation)
+                except (OSError, ValueError, struct.error) as e:
+                    logger.warning("Failed to map snapshot %s: %s", self.path, e)
+            # Stamped only once mapped, so concurrent first callers wait on the lock instead of seeing None
+            self._checked_at = now
+            return self._current
+
+    @property
+    def generation(self):
+        snapshot = self.current()
+        return snapshot.generation if snapshot else 0
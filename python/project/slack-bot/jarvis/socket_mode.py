@@ -0,0 +1,124 @@
+"""Slack Socket Mode transport, an alternative to the public HTTP routes.
+
+The bot opens one websocket to Slack with an app-level token and receives
+slash commands, interactions and options requests over it. Each request goes
+to the same handlers app.py uses, inside a Flask app context, and the
+handler's response body becomes the ack payload. The connection itself is
+authenticated, so there is no per-request signature check, TLS handshake or
+ingress hop.
+
+    SLACK_APP_TOKEN=xapp-... python -m jarvis.socket_mode
+
+Configuration:
+    SLACK_APP_TOKEN          app-level token with connections:write
+    SOCKET_MODE_CONCURRENCY  threads handling envelopes (default 10)
+
+Socket Mode must be enabled for the Slack app; Slack then stops calling the
+HTTP request URLs.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from flask import Flask
+from limits import parse as parse_limit, storage, strategies
+from slack_sdk import WebClient
+from slack_sdk.socket_mode import SocketModeClient
+from slack_sdk.socket_mode.response import SocketModeResponse
+from jarvis import metrics, tracing
+from jarvis.leader import run_when_leader
+from jarvis.log import configure_logging
+from jarvis.ratelimit import SLASH_COMMAND_RATE_LIMIT, slash_limited_response
+from jarvis.scheduler import start_leader_services
+from jarvis.slack_handler import handle_slash_command, handle_interaction, handle_options_request
+
+logger = logging.getLogger(__name__)
+
+SOCKET_MODE_CONCURRENCY = int(os.getenv("SOCKET_MODE_CONCURRENCY", "10"))
+
+# The handlers build Flask responses, which need an application context
+flask_app = Flask(__name__)
+
+# Same per-user slash command limit as app.py and asgi.py apply
+slash_limit = parse_limit(SLASH_COMMAND_RATE_LIMIT)
+slash_limiter = strategies.FixedWindowRateLimiter(storage.MemoryStorage())
+
+FALLBACK_BODIES = {
+    "slash_commands": {"response_type": "ephemeral", "text": "⚠️ Command processing failed"},
+    "interactive": None,
+}
+
+
+def response_body(response):
+    """JSON body of a handler's Flask response, or None for an empty ack"""
+    if isinstance(response, tuple):
+        response = response[0]
+    if not response.get_data():
+        return None
+    return response.get_json(silent=True)
+
+
+def dispatch(req):
+    """Ack payload for one Socket Mode request"""
+    if req.type == "slash_commands":
+        form = req.payload
+        user_id = form.get("user_id", "")
+        if not slash_limiter.hit(slash_limit, "slash", user_id):
+            logger.warning("Slash command rate limit hit", extra={'user_id': user_id})
+            reset_at = slash_limiter.get_window_stats(slash_limit, "slash", user_id).reset_time
+            return slash_limited_response(reset_at - time.time())
+        with tracing.span("slack.command"), metrics.observe_phase("total", command="slash"):
+            return response_body(handle_slash_command(form))
+
+    if req.type == "interactive":
+        payload = req.payload
+        if payload.get("type") == "block_suggestion":
+            with tracing.span("slack.options"), metrics.observe_phase("total", command="options"):
+                return response_body(handle_options_request(payload))
+        with tracing.span("slack.interaction"):
+            return response_body(handle_interaction({"payload": json.dumps(payload)}))
+
+    logger.debug("Ignoring Socket Mode request of type %s", req.type)
+    return None
+
+
+def on_request(client, req):
+    """Ack every envelope, with the handler's response as the payload"""
+    if req.retry_attempt and "timeout" in (req.retry_reason or ""):
+        # Slack resends envelopes it thinks were not acked in time; the first delivery is already being handled
+        logger.info("Dropping Socket Mode retry", extra={'retry_num': req.retry_attempt, 'type': req.type})
+        client.send_socket_mode_response(SocketModeResponse(envelope_id=req.envelope_id))
+        return
+    try:
+        with flask_app.app_context():
+            body = dispatch(req)
+    except Exception:
+        logger.error("Socket Mode %s processing failed", req.type, exc_info=True)
+        body = FALLBACK_BODIES.get(req.type)
+    client.send_socket_mode_response(SocketModeResponse(envelope_id=req.envelope_id, payload=body))
+
+
+def build_client(app_token, web_client=None):
+    client = SocketModeClient(
+        app_token=app_token,
+        web_client=web_client or WebClient(base_url=tracing.SLACK_API_URL),
+        logger=logging.getLogger("slack_sdk.socket_mode"),
+        concurrency=SOCKET_MODE_CONCURRENCY
+    )
+    client.socket_mode_request_listeners.append(on_request)
+    return client
+
+
+def main():
+    configure_logging()
+    client = build_client(os.environ["SLACK_APP_TOKEN"])
+    # Only the elected process runs the scheduler and the cache refresher
+    run_when_leader(start_leader_services)
+    client.connect()
+    logger.info("Connected to Slack in Socket Mode")
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
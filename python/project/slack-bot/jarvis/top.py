@@ -0,0 +1,217 @@
+"""Rolling CPU/memory samples behind the `top pods` and `top nodes` commands.
+
+The leader polls metrics-server every TOP_INTERVAL seconds and keeps a ring
+buffer of the last TOP_WINDOW seconds of samples per pod and per node. After
+each poll it publishes current and window-average usage to TOP_PATH, which
+every worker reloads when the file is swapped, so a `top` command is a heap
+selection over an in-memory table and never calls the metrics API.
+
+Configuration:
+    TOP_INTERVAL  seconds between metrics-server polls (default 30)
+    TOP_WINDOW    seconds of samples averaged (default 300)
+    TOP_PATH      shared usage table (default /tmp/jarvis-top.json)
+    TOP_LIMIT     rows returned by a top command (default 10)
+"""
+import os
+import json
+import time
+import heapq
+import logging
+import threading
+from collections import deque
+from jarvis.kubectl import k8s_api
+from jarvis import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+TOP_INTERVAL = int(os.getenv("TOP_INTERVAL", "30"))
+TOP_WINDOW = int(os.getenv("TOP_WINDOW", "300"))
+TOP_PATH = os.getenv("TOP_PATH", "/tmp/jarvis-top.json")
+TOP_LIMIT = int(os.getenv("TOP_LIMIT", "10"))
+
+# Column of each sort order in a published row: [cpu_m, memory_bytes, avg_cpu_m, avg_memory_bytes]
+SORT_COLUMNS = {"cpu": 0, "memory": 1, "cpu_avg": 2, "memory_avg": 3}
+SORT_LABELS = {
+    "cpu": "CPU (now)",
+    "memory": "Memory (now)",
+    "cpu_avg": f"CPU ({TOP_WINDOW // 60}m avg)",
+    "memory_avg": f"Memory ({TOP_WINDOW // 60}m avg)",
+}
+
+CPU_UNITS = {"n": 1e-6, "u": 1e-3, "m": 1}
+MEMORY_UNITS = {
+    "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40,
+    "k": 10 ** 3, "M": 10 ** 6, "G": 10 ** 9, "T": 10 ** 12,
+}
+
+
+def parse_cpu(quantity):
+    """CPU quantity ("250m", "1", "123456n") in millicores"""
+    unit = quantity[-1]
+    if unit in CPU_UNITS:
+        return float(quantity[:-1]) * CPU_UNITS[unit]
+    return float(quantity) * 1000
+
+
+def parse_memory(quantity):
+    """Memory quantity ("128Mi", "1G", "1024") in bytes"""
+    for suffix in (quantity[-2:], quantity[-1:]):
+        if suffix in MEMORY_UNITS:
+            return float(quantity[:-len(suffix)]) * MEMORY_UNITS[suffix]
+    return float(quantity)
+
+
+class UsageWindow:
+    """Fixed-length sample history per object; objects gone from a poll are dropped"""
+    def __init__(self, samples):
+        self.samples = samples
+        self.history = {}
+
+    def record(self, usage):
+        """Append one poll of {name: (cpu_m, memory_bytes)}"""
+        for name in self.history.keys() - usage.keys():
+            del self.history[name]
+        for name, sample in usage.items():
+            ring = self.history.get(name)
+            if ring is None:
+                ring = self.history[name] = deque(maxlen=self.samples)
+            ring.append(sample)
+
+    def table(self):
+        """{name: [cpu_m, memory_bytes, avg_cpu_m, avg_memory_bytes]}"""
+        rows = {}
+        for name, ring in self.history.items():
+            cpu, memory = ring[-1]
+            rows[name] = [
+                round(cpu, 1), int(memory),
+                round(sum(s[0] for s in ring) / len(ring), 1),
+                int(sum(s[1] for s in ring) / len(ring)),
+            ]
+        return rows
+
+
+windows = {
+    "pods": UsageWindow(max(1, TOP_WINDOW // TOP_INTERVAL)),
+    "nodes": UsageWindow(max(1, TOP_WINDOW // TOP_INTERVAL)),
+}
+
+
+def _usage(items):
+    usage = {}
+    for item in items:
+        # Pod metrics list containers; node metrics carry a single usage
+        parts = item.get("containers") or [item]
+        usage[item["metadata"]["name"]] = (
+            sum(parse_cpu(p["usage"]["cpu"]) for p in parts),
+            sum(parse_memory(p["usage"]["memory"]) for p in parts),
+        )
+    return usage
+
+
+def collect_once(namespace="default"):
+    """Poll metrics-server once and publish the updated table"""
+    pods = k8s_api.custom_metrics.list_namespaced_custom_object(
+        "metrics.k8s.io", "v1beta1", namespace, "pods", _request_timeout=10
+    )
+    windows["pods"].record(_usage(pods.get("items", [])))
+    try:
+        nodes = k8s_api.custom_metrics.list_cluster_custom_object(
+            "metrics.k8s.io", "v1beta1", "nodes", _request_timeout=10
+        )
+        windows["nodes"].record(_usage(nodes.get("items", [])))
+    except Exception as e:
+        logger.warning("Node metrics unavailable: %s", e)
+    publish_table()
+
+
+def publish_table(path=TOP_PATH):
+    """Atomically replace the shared usage table"""
+    table = {"collected_at": time.time(), "interval": TOP_INTERVAL}
+    for kind, window in windows.items():
+        table[kind] = window.table()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(table, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class TableReader:
+    """Latest published usage table, reloaded when the file is swapped"""
+    def __init__(self, path, recheck_interval=1.0):
+        self.path = path
+        self.recheck_interval = recheck_interval
+        self._table = None
+        self._identity = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.recheck_interval:
+            return self._table
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+                identity = (stat.st_ino, stat.st_mtime_ns)
+                if identity != self._identity:
+                    with open(self.path) as f:
+                        self._table = json.load(f)
+                    self._identity = identity
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.warning("Failed to load usage table %s: %s", self.path, e)
+            self._checked_at = now
+            return self._table
+
+
+table_reader = TableReader(TOP_PATH)
+
+
+def _table_age():
+    table = table_reader.current()
+    return time.time() - table["collected_at"] if table else None
+
+
+metrics.register_cache_age("top", _table_age)
+
+
+def top(kind, sort="cpu", limit=TOP_LIMIT):
+    """Top `limit` (name, row) pairs of kind by sort, and the table's age in seconds"""
+    table = table_reader.current()
+    if not table or not table.get(kind):
+        return [], None
+    column = SORT_COLUMNS[sort]
+    rows = heapq.nlargest(limit, table[kind].items(), key=lambda item: item[1][column])
+    return rows, time.time() - table["collected_at"]
+
+
+def render_top(kind, sort="cpu", limit=TOP_LIMIT):
+    """Text table for a top command"""
+    rows, age = top(kind, sort, limit)
+    if age is None:
+        return "No metrics collected yet. Try again in a minute."
+    header = ("POD" if kind == "pods" else "NODE", "CPU", "MEMORY", "CPU AVG", "MEMORY AVG")
+    lines = [header] + [
+        (name, f"{cpu:.0f}m", f"{memory / 2 ** 20:.0f}Mi", f"{avg_cpu:.0f}m", f"{avg_memory / 2 ** 20:.0f}Mi")
+        for name, (cpu, memory, avg_cpu, avg_memory) in rows
+    ]
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    text = "\n".join("  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip() for line in lines)
+    return f"{text}\n\nSorted by {SORT_LABELS[sort]}, sampled {int(age)}s ago"
+
+
+def start_metrics_collector():
+    """Background thread polling metrics-server into the usage windows"""
+    def collector():
+        while True:
+            try:
+                with tracing.span("top.collect"):
+                    collect_once()
+            except Exception as e:
+                logger.warning("Metrics collection failed: %s", e)
+            time.sleep(TOP_INTERVAL)
+
+    thread = threading.Thread(target=collector, daemon=True, name="top-collector")
+    thread.start()
+    logger.info("Metrics collector started (every %ss, %ss window)", TOP_INTERVAL, TOP_WINDOW)
@@ -0,0 +1,230 @@
+"""Lightweight request tracing with parent/child spans.
+
+Spans nest through a ContextVar, so a span opened while another is active
+becomes its child, including across the command pool (tasks run in a copy
+of the submitter's context). Finished spans are exported in batches from a
+background thread, either as JSON lines to a local file or as OTLP/HTTP JSON
+to a collector.
+
+Configuration:
+    TRACE_SAMPLE_RATE  fraction of root spans recorded (default 0 = off)
+    TRACE_EXPORTER     "jsonl" (default) or "otlp"
+    TRACE_FILE         JSONL output path (default /tmp/jarvis-traces.jsonl)
+    OTLP_ENDPOINT      collector URL (default http://localhost:4318/v1/traces)
+    SLACK_API_URL      Web API base URL of the Slack clients (default
+                       https://slack.com/api/; point at a stand-in for load tests)
+
+With the sample rate at 0 a span is a single float comparison, so tracing
+costs nothing when off. Children of an unsampled root are not recorded.
+"""
+import os
+import json
+import time
+import queue
+import random
+import logging
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from contextvars import ContextVar
+import requests
+from slack_sdk import WebClient
+from slack_sdk.web.async_client import AsyncWebClient
+
+logger = logging.getLogger(__name__)
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "jsonl")
+TRACE_FILE = os.getenv("TRACE_FILE", "/tmp/jarvis-traces.jsonl")
+OTLP_ENDPOINT = os.getenv("OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+SLACK_API_URL = os.getenv("SLACK_API_URL", WebClient.BASE_URL)
+SERVICE_NAME = "jarvis"
+EXPORT_BATCH_SIZE = 256
+EXPORT_INTERVAL = 2
+
+_UNSAMPLED = object()
+_current_span = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+@contextmanager
+def span(name, **attributes):
+    """Record a span around the block; yields the Span or None when not sampled"""
+    if TRACE_SAMPLE_RATE <= 0:
+        yield None
+        return
+
+    parent = _current_span.get()
+    if parent is _UNSAMPLED:
+        yield None
+        return
+    if parent is None:
+        if random.random() >= TRACE_SAMPLE_RATE:
+            token = _current_span.set(_UNSAMPLED)
+            try:
+                yield None
+            finally:
+                _current_span.reset(token)
+            return
+        current = Span(name, f"{random.getrandbits(128):032x}", None, attributes)
+    else:
+        current = Span(name, parent.trace_id, parent.span_id, attributes)
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+        _exporter.export(current)
+
+
+def current_trace_id():
+    """Trace id of the active sampled span, or None"""
+    current = _current_span.get()
+    if current is None or current is _UNSAMPLED:
+        return None
+    return current.trace_id
+
+
+def traced(name):
+    """Decorator form of span()"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracedWebClient(WebClient):
+    """WebClient recording a span per Slack API call"""
+    def api_call(self, api_method, *args, **kwargs):
+        with span(f"slack.{api_method}", **{"slack.method": api_method}):
+            return super().api_call(api_method, *args, **kwargs)
+
+
+class TracedAsyncWebClient(AsyncWebClient):
+    """AsyncWebClient recording a span per Slack API call"""
+    async def api_call(self, api_method, *args, **kwargs):
+        with span(f"slack.{api_method}", **{"slack.method": api_method}):
+            return await super().api_call(api_method, *args, **kwargs)
+
+
+def _otlp_attributes(attributes):
+    values = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            values.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            values.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            values.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            values.append({"key": key, "value": {"stringValue": str(value)}})
+    return values
+
+
+def _otlp_payload(spans):
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+        "scopeSpans": [{
+            "scope": {"name": SERVICE_NAME},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent_id or "",
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": _otlp_attributes(s.attributes),
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class _BatchExporter:
+    """Queues finished spans and writes them out from one background thread"""
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=10000)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._session = None
+
+    def export(self, finished):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            pass  # Drop spans rather than block a request on a slow exporter
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + EXPORT_INTERVAL
+            while len(batch) < EXPORT_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.warning("Trace export of %s spans failed: %s", len(batch), e)
+
+    def _write(self, batch):
+        if TRACE_EXPORTER == "otlp":
+            if self._session is None:
+                self._session = requests.Session()
+            self._session.post(OTLP_ENDPOINT, json=_otlp_payload(batch), timeout=5).raise_for_status()
+        else:
+            with open(TRACE_FILE, "a") as f:
+                f.write("".join(json.dumps(s.to_dict()) + "\n" for s in batch))
+
+
+_exporter = _BatchExporter()
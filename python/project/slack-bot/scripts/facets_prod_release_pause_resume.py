@@ -4,12 +4,60 @@ import sys
 import os
 import logging
 import base64
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 CONTROL_PLANE = "url"
 STACK = "stack_name"
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# (connect, read) timeouts in seconds for every control plane and webhook call
+REQUEST_TIMEOUT = (
+    float(os.getenv("FACETS_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("FACETS_READ_TIMEOUT", "30"))
+)
+# Cluster IDs never change for a name, so the lookup can be cached for long
+CLUSTER_ID_TTL = int(os.getenv("FACETS_CLUSTER_ID_TTL", "86400"))
+# An unknown name triggers a refetch only if the map is older than this
+MISSING_REFETCH_AFTER = 60
+# Clusters targeted by the bot's scheduled jobs and pause/resume command
+FACETS_CLUSTERS = [c.strip() for c in os.getenv("FACETS_CLUSTERS", "p-2621-aps1-01").split(",") if c.strip()]
+BATCH_WORKERS = int(os.getenv("FACETS_BATCH_WORKERS", "8"))
+
+
+def build_session():
+    """Pooled keep-alive session with bounded retries and backoff"""
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        # pause-release sets an absolute state, so retrying the POST is safe
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    http = requests.Session()
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+    return http
+
+
+session = build_session()
+
+# name -> cluster ID, shared by every ClusterPauseResume in the process
+_cluster_ids = {"ids": {}, "fetched_at": float("-inf")}
+_cluster_ids_lock = threading.Lock()
+
+
+def invalidate_cluster_ids():
+    with _cluster_ids_lock:
+        _cluster_ids["fetched_at"] = float("-inf")
+
 class ClusterPauseResume:
 
     def __init__(self, cluster_name, environment, pause_releases, user, facets_auth_token):
@@ -26,12 +74,28 @@ class ClusterPauseResume:
         self.user_name = user
 
     def get_cluster_from_stack(self):
-        clusters = self.get_clusters()
-        for cluster in clusters:
-            if cluster['name'] == self.cluster_name:
-                self.cluster = cluster
-                return
-        raise Exception(f"Cluster '{self.cluster_name}' not found.")
+        cluster_id = self.get_cluster_id(self.cluster_name)
+        if cluster_id is None:
+            raise Exception(f"Cluster '{self.cluster_name}' not found.")
+        self.cluster = {"name": self.cluster_name, "id": cluster_id}
+
+    def get_cluster_id(self, cluster_name):
+        """Look up a cluster ID, refetching the stack's clusters when stale or unknown"""
+        with _cluster_ids_lock:
+            age = time.monotonic() - _cluster_ids["fetched_at"]
+            if age < CLUSTER_ID_TTL and cluster_name in _cluster_ids["ids"]:
+                return _cluster_ids["ids"][cluster_name]
+            if age < MISSING_REFETCH_AFTER:
+                return None
+
+        return self.refresh_cluster_ids().get(cluster_name)
+
+    def refresh_cluster_ids(self):
+        ids = {cluster['name']: cluster['id'] for cluster in self.get_clusters()}
+        with _cluster_ids_lock:
+            _cluster_ids["ids"] = ids
+            _cluster_ids["fetched_at"] = time.monotonic()
+        return ids
 
     def get_clusters(self):
         url = f"{self.url}/cc-ui/v1/stacks/{self.stack_name}/clusters"
@@ -39,12 +103,12 @@ class ClusterPauseResume:
         return response
 
     def get(self, url):
-        response = requests.get(url, headers=self.headers)
+        response = session.get(url, headers=self.headers, timeout=REQUEST_TIMEOUT)
         return self.check_api_response(response)
 
     def post(self, url, payload):
         try:
-            response = requests.post(url, headers=self.headers, data=json.dumps(payload))
+            response = session.post(url, headers=self.headers, data=json.dumps(payload), timeout=REQUEST_TIMEOUT)
             print(f"API response status: {response.status_code}")
             result = self.check_api_response(response)
             print("API result:", result)
@@ -68,11 +132,12 @@ class ClusterPauseResume:
         message = f"Cluster `{cluster_name}` releases has been `{status}` by `{user_name}`"
         slack_data = {'text': message}
         headers = {'Content-Type': "application/json"}
-        response = requests.post(slack_url, data=json.dumps(slack_data), headers=headers)
+        response = session.post(slack_url, data=json.dumps(slack_data), headers=headers, timeout=REQUEST_TIMEOUT)
         if response.status_code != 200:
             raise Exception(response.status_code, response.text)
 
-    def execute_pause_resume(self):
+    def execute_pause_resume(self, notify=True):
+        """Pause or resume this cluster's releases; returns False if the request failed"""
         self.get_cluster_from_stack()
         cluster_id = self.cluster["id"]
         payload = {
@@ -81,26 +146,96 @@ class ClusterPauseResume:
         }
         pause_resume_url = f"{self.url}/cc-ui/v1/clusters/{cluster_id}/pause-release"
         print(f"{'Pausing' if self.pause_releases else 'Resuming'} releases for cluster {self.cluster_name}...")
-        self.post(pause_resume_url, payload)
-        self.send_notification(self.cluster_name, self.pause_releases, self.user_name)
-
-
-def run_pause_release(cluster_name, pause_releases, user="jarvis", environment="production"):
+        result = self.post(pause_resume_url, payload)
+        if result is None:
+            # The cached ID may be stale if the cluster was recreated
+            invalidate_cluster_ids()
+            self.get_cluster_from_stack()
+            if self.cluster["id"] != cluster_id:
+                payload["clusterId"] = self.cluster["id"]
+                result = self.post(f"{self.url}/cc-ui/v1/clusters/{self.cluster['id']}/pause-release", payload)
+        if notify:
+            self.send_notification(self.cluster_name, self.pause_releases, self.user_name)
+        return result is not None
+
+
+def send_batch_notification(results, pause_releases, user_name):
+    """One webhook message summarising a batch; results maps cluster -> error or None"""
+    slack_url = os.environ.get("SLACK_WEBHOOK_URL")
+    status = "PAUSED" if pause_releases else "RESUMED"
+    lines = [f"Releases `{status}` by `{user_name}` on {len(results)} clusters:"]
+    for cluster_name, error in results.items():
+        lines.append(f"• `{cluster_name}` ✅" if error is None else f"• `{cluster_name}` ❌ {error}")
+    response = session.post(
+        slack_url,
+        data=json.dumps({'text': "\n".join(lines)}),
+        headers={'Content-Type': "application/json"},
+        timeout=REQUEST_TIMEOUT
+    )
+    if response.status_code != 200:
+        raise Exception(response.status_code, response.text)
+
+
+def get_facets_auth_token():
     auth_token = os.environ.get("FACETS_AUTH_TOKEN")
     if not auth_token:
         raise Exception("FACETS_AUTH_TOKEN is not set in environment variables.")
-    
-    facets_auth_token = base64.b64encode(auth_token.encode()).decode()
+    return base64.b64encode(auth_token.encode()).decode()
+
+
+def run_pause_release(cluster_name, pause_releases, user="jarvis", environment="production"):
+    facets_auth_token = get_facets_auth_token()
 
     controller = ClusterPauseResume(cluster_name, environment, pause_releases, user, facets_auth_token)
     controller.execute_pause_resume()
 
+def run_pause_release_batch(cluster_names, pause_releases, user="jarvis", environment="production",
+                            max_workers=BATCH_WORKERS):
+    """Pause or resume several clusters concurrently; returns {cluster: error or None}"""
+    facets_auth_token = get_facets_auth_token()
+    controllers = {
+        name: ClusterPauseResume(name, environment, pause_releases, user, facets_auth_token)
+        for name in dict.fromkeys(cluster_names)
+    }
+    if not controllers:
+        return {}
+
+    # One cluster list fetch serves the ID lookups of the whole batch
+    next(iter(controllers.values())).refresh_cluster_ids()
+
+    def run(controller):
+        try:
+            if not controller.execute_pause_resume(notify=False):
+                return "pause-release request failed"
+            return None
+        except Exception as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(controllers))) as pool:
+        results = dict(zip(controllers, pool.map(run, controllers.values())))
+
+    failed = [name for name, error in results.items() if error]
+    logger.info("Batch %s: %d succeeded, %d failed",
+                "pause" if pause_releases.lower() == 'true' else "resume",
+                len(results) - len(failed), len(failed))
+    if failed:
+        logger.warning("Failed clusters: %s", ", ".join(failed))
+    # The clusters have already changed; a failed summary must not hide their results
+    try:
+        send_batch_notification(results, pause_releases.lower() == 'true', user)
+    except Exception as e:
+        logger.error("Failed to send batch notification: %s", e)
+    return results
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
-        print("Usage: python facets_prod_release_pause_resume.py <cluster_name> <pause_releases>")
+        print("Usage: python facets_prod_release_pause_resume.py <cluster_name>[,<cluster_name>...] <pause_releases>")
         sys.exit(1)
 
-    cluster_name = sys.argv[1]
+    cluster_names = sys.argv[1].split(",")
     pause_releases = sys.argv[2]
 
-    run_pause_release(cluster_name, pause_releases)
+    if len(cluster_names) > 1:
+        run_pause_release_batch(cluster_names, pause_releases)
+    else:
+        run_pause_release(cluster_names[0], pause_releases)